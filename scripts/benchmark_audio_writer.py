@@ -0,0 +1,152 @@
+import os
+import sys
+
+"""
+adds the abspath of MAAP source root to the syspath.
+"""
+sys.path.append(os.path.abspath(os.path.join(__file__, "../../src")))
+
+
+import argparse
+import shutil
+import tempfile
+
+import numpy as np
+
+from MAAP.AudioSignal import AudioSignal
+from MAAP.AudioWriter import AudioWriter
+
+# (file extension, subtype, compression level) of each configuration benchmarked
+WRITE_CONFIGURATIONS = [
+    ("wav", "FLOAT", None),
+    ("wav", "PCM_24", None),
+    ("wav", "PCM_16", None),
+    ("flac", "PCM_16", 0),
+    ("flac", "PCM_16", 0.5),
+    ("flac", "PCM_16", 1),
+    ("flac", "PCM_24", 0.5),
+    ("ogg", "VORBIS", 0.2),
+    ("ogg", "VORBIS", 0.6),
+]
+
+example_text = "" "Examples:\n" "-n 200 -t 1\n" "-n 50 -t 10 -w 4 -d /mnt/disk"
+
+parser = argparse.ArgumentParser(
+    description="Benchmark of the write throughput and bytes on disk of the AudioWriter formats and subtypes",
+    epilog=example_text,
+    formatter_class=argparse.RawTextHelpFormatter,
+)
+parser.add_argument(
+    "-n",
+    "--nr-files",
+    default=100,
+    type=int,
+    help="Number of files written per configuration. Default value is 100",
+)
+parser.add_argument(
+    "-t",
+    "--time",
+    default=1,
+    type=float,
+    help="Duration of each file, in seconds. Default value is 1",
+)
+parser.add_argument(
+    "-sr",
+    "--sample-rate",
+    default=16000,
+    type=int,
+    help="Sample rate of the signals. Default value is 16000",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    default=None,
+    type=int,
+    help="Number of threads used to write the files. Default value is the default of ThreadPoolExecutor",
+)
+parser.add_argument(
+    "-d",
+    "--dir",
+    default=None,
+    type=str,
+    help="Directory where a temporary directory with the files is created. Default value is the system "
+    "temporary directory",
+)
+
+
+def make_signal(duration, sample_rate, seed=0):
+    """
+    Tone with noise, so compression ratios are neither trivial (silence) nor worst case (white noise)
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    y = 0.3 * np.sin(2 * np.pi * 440 * t) + 0.05 * rng.standard_normal(len(t))
+    return AudioSignal(y, sample_rate)
+
+
+def benchmark(audio_signal, nr_files, workers, dir_path):
+    results = list()
+    for extension, subtype, compression_level in WRITE_CONFIGURATIONS:
+        configuration_dir_path = os.path.join(
+            dir_path, "{}_{}_{}".format(extension, subtype, compression_level)
+        )
+        os.mkdir(configuration_dir_path)
+        items = (
+            ("{:06d}.{}".format(i, extension), audio_signal) for i in range(nr_files)
+        )
+        report = AudioWriter.write_many(
+            configuration_dir_path,
+            items,
+            workers=workers,
+            subtype=subtype,
+            compression_level=compression_level,
+        )
+        if report.errors:
+            raise report.errors[0][2]
+        results.append((extension, subtype, compression_level, report))
+        shutil.rmtree(configuration_dir_path)
+    return results
+
+
+def print_results(results, audio_signal):
+    audio_duration = audio_signal.get_duration()
+    print(
+        "{:<6} {:<8} {:>11} {:>10} {:>13} {:>12} {:>9}".format(
+            "format",
+            "subtype",
+            "compression",
+            "files/s",
+            "audio s/s",
+            "bytes/file",
+            "ratio",
+        )
+    )
+    reference_bytes = None
+    for extension, subtype, compression_level, report in results:
+        bytes_per_file = report.nr_written_bytes / report.nr_written_files
+        if reference_bytes is None:
+            reference_bytes = bytes_per_file
+        print(
+            "{:<6} {:<8} {:>11} {:>10.1f} {:>13.1f} {:>12.0f} {:>9.3f}".format(
+                extension,
+                subtype,
+                "-" if compression_level is None else compression_level,
+                report.files_per_second,
+                report.files_per_second * audio_duration,
+                bytes_per_file,
+                bytes_per_file / reference_bytes,
+            )
+        )
+
+
+if __name__ == "__main__":
+
+    args = parser.parse_args()
+    audio_signal = make_signal(args.time, args.sample_rate)
+
+    dir_path = tempfile.mkdtemp(dir=args.dir)
+    try:
+        results = benchmark(audio_signal, args.nr_files, args.workers, dir_path)
+    finally:
+        shutil.rmtree(dir_path)
+    print_results(results, audio_signal)
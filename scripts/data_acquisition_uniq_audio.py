@@ -17,28 +17,32 @@ Some features:
     - Write a report of the recording session
 """
 
+import os
 import sys
 
 sys.path.append("../.")
+sys.path.append(os.path.abspath(os.path.join(__file__, "../../src")))
 
 import argparse
 import datetime
 import json
-import os
+import queue
+import threading
 import time
 
 import git
-
-from src.MAAP.native.AudioReceiver import AudioReceiver
-from src.MAAP.native.AudioWriter import AudioWriter
-from src.MAAP.native.UtilsMAAP import concat_audio_signals
 from src.resources.FSHandler import FSHandler
 
+from MAAP.AudioReceiver import AudioReceiver
+from MAAP.AudioStreamWriter import AudioStreamWriter
+
 FATHER_DIR_NAME = "../data.acquisition/"
 SUBFOLDER_PREFIX = "set"
 REPORT_FILE_NAME = "report.txt"
 SEGMENTS_DURATION = 0.25
-OUTPUT_AUDIO_FILENAME = "all.wav"
+OUTPUT_AUDIO_FILE_PREFIX = "all"
+# audio is split in files of at most this duration, in seconds
+OUTPUT_AUDIO_FILE_DURATION = 3600
 
 example_text = (
     ""
@@ -84,34 +88,67 @@ def get_str_minutes_second(seconds: int):
     return "{} ({} seconds)".format(datetime.timedelta(seconds=seconds), seconds)
 
 
+def get_stop_function(stop_condition, stop_condition_parameters):
+    """
+    :return: function that returns True once the capture must stop
+    """
+    if stop_condition == "timeout":
+        end_time = time.time() + stop_condition_parameters["timeout_duration"]
+        return lambda: time.time() >= end_time
+    if stop_condition == "by_command":
+        stop_event = threading.Event()
+
+        def wait_command():
+            input("Press Enter to stop the capture\n")
+            stop_event.set()
+
+        threading.Thread(target=wait_command, daemon=True).start()
+        return stop_event.is_set
+    raise Exception(
+        "Stop condition '{}' not available. Use 'timeout' or 'by_command'".format(
+            stop_condition
+        )
+    )
+
+
 def capture(dir_name, stop_condition, stop_condition_parameters, buffer_size_duration):
 
     dir = os.path.join(FATHER_DIR_NAME, dir_name)
     audioReceiver = AudioReceiver()
     audioReceiver.config_capture(
-        stop_condition,
-        SEGMENTS_DURATION,
-        buffer_size_duration,
-        True,
-        stop_condition_parameters,
+        segments_duration=SEGMENTS_DURATION, buffer_duration=buffer_size_duration
     )
+    if not audioReceiver.is_configured():
+        raise Exception("AudioReceiver could not be configured")
 
-    # waits two seconds to allow initialization of thread until audioReceiver
-    # starts capture
-    audioReceiver.start_capture()
-    time.sleep(1)
     counter_segments_recorded = 0
-    audio_signals = list()
-    while audioReceiver.is_capturing() or audioReceiver.output_queue_has_samples():
-        counter_segments_recorded = counter_segments_recorded + 1
-        audio_signals.append(audioReceiver.get_sample_from_output_queue())
-
-    # write the audioSignal audio
-    audioWriter = AudioWriter(
-        dir, OUTPUT_AUDIO_FILENAME, concat_audio_signals(audio_signals)
-    )
-    audioWriter.write()
-    return audioReceiver, counter_segments_recorded
+    # segments are written to disk as they are captured, so memory does not grow with the session
+    with AudioStreamWriter(
+        dir,
+        OUTPUT_AUDIO_FILE_PREFIX,
+        audioReceiver.get_sample_rate(),
+        rotation_duration=OUTPUT_AUDIO_FILE_DURATION,
+    ) as audioStreamWriter:
+        with audioReceiver:
+            is_stop_requested = get_stop_function(
+                stop_condition, stop_condition_parameters
+            )
+            while not is_stop_requested():
+                try:
+                    segment = audioReceiver.get_sample_from_output_queue(
+                        timeout=SEGMENTS_DURATION
+                    )
+                except queue.Empty:
+                    continue
+                counter_segments_recorded = counter_segments_recorded + 1
+                audioStreamWriter.write(segment)
+        # segments emitted before the capture stopped
+        while audioReceiver.output_queue_has_samples():
+            counter_segments_recorded = counter_segments_recorded + 1
+            audioStreamWriter.write(audioReceiver.get_sample_from_output_queue())
+    audioReceiver.close()
+
+    return audioReceiver, counter_segments_recorded, audioStreamWriter.get_file_paths()
 
 
 def make_report(
@@ -119,8 +156,11 @@ def make_report(
     dir_name,
     run_date,
     stop_condition,
+    stop_condition_parameters,
+    buffer_size_duration,
     audioReceiver: AudioReceiver,
     nr_segments_recorded,
+    audio_file_paths,
 ):
     report = dict()
     report["name"] = capture_name
@@ -128,19 +168,19 @@ def make_report(
     report["script"] = os.path.relpath(__file__, "../")
     report["audio_sample_rate"] = "{} Hz".format(audioReceiver.get_sample_rate())
     report["stop_condition"] = stop_condition
-    report["stop_parameters"] = audioReceiver.get_stop_condition_parameters()
+    report["stop_parameters"] = stop_condition_parameters
 
-    buffer_size_seconds = audioReceiver.get_length_buffer_seconds()
-    if buffer_size_seconds == 0:
-        buffer_size_str = "inf"
+    if buffer_size_duration is None:
+        buffer_size_str = "default"
     else:
-        buffer_size_str = get_str_minutes_second(buffer_size_seconds)
+        buffer_size_str = get_str_minutes_second(buffer_size_duration)
 
     report["buffer_size"] = buffer_size_str
     report["audio_segment_duration"] = get_str_minutes_second(SEGMENTS_DURATION)
     report["total_segments_acquired"] = nr_segments_recorded
     total_time_acquired_seconds = SEGMENTS_DURATION * nr_segments_recorded
     report["total_time_acquired"] = get_str_minutes_second(total_time_acquired_seconds)
+    report["audio_files"] = [os.path.basename(path) for path in audio_file_paths]
     report["MAAP_commit_sha"] = git.Repo("../.").head.commit
 
     with open(os.path.join(dir_name, REPORT_FILE_NAME), "w") as file_writer:
@@ -159,7 +199,7 @@ if __name__ == "__main__":
     run_date = get_current_date_time()
 
     print("Audio is being recorded")
-    audioReceiver, nr_segments_recorded = capture(
+    audioReceiver, nr_segments_recorded, audio_file_paths = capture(
         dir_to_save, args.stop_condition, args.stop_parameters, args.buffer_size
     )
 
@@ -168,7 +208,10 @@ if __name__ == "__main__":
         dir_to_save,
         run_date,
         args.stop_condition,
+        args.stop_parameters,
+        args.buffer_size,
         audioReceiver,
         nr_segments_recorded,
+        audio_file_paths,
     )
     print("End")
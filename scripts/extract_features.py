@@ -5,15 +5,16 @@ import sys
 adds the abspath of MAAP source root to the syspath.
 """
 sys.path.append(os.path.abspath(os.path.join(__file__, "../..")))
+sys.path.append(os.path.abspath(os.path.join(__file__, "../../src")))
 
 
 import argparse
 import pickle
 
+from src.resources.FSCrawler.FSCrawler import FSCrawler
 from tqdm import tqdm
 
-from src.MAAP.native.AudioFeatureExtractor import AudioFeatureExtractor
-from src.resources.FSCrawler.FSCrawler import FSCrawler
+from MAAP.AudioFeatureExtractor import AudioFeatureExtractor
 
 EXTENSION = ".wav"
 
@@ -45,15 +46,40 @@ parser.add_argument(
     help="It will create a uniq pickle file for all the audio files. The pickle file will be saved in the path "
     "given by -d/--dir",
 )
+parser.add_argument(
+    "-w",
+    "--workers",
+    default=None,
+    type=int,
+    help="Number of processes used to extract the features. Default value is the number of CPUs",
+)
 
 
-def extract_features_and_make_uniq_pickle(list_audios_paths, dir_to_save):
-    list_audios_features = []
-    for audio_file_path in tqdm(list_audios_paths, ncols=100):
-        # obtain features
-        featureExtractor.load_audio_file(audio_file_path)
-        features = featureExtractor.compute_all_features()
-        list_audios_features.append((audio_file_path, features))
+def extract_features(list_audios_paths, workers):
+    """
+    Yields (audio_file_path, features) as files are processed. Files that fail are reported and skipped
+    """
+    results = featureExtractor.extract_many(
+        list_audios_paths, workers=workers, ordered=False
+    )
+    for result in tqdm(results, total=len(list_audios_paths), ncols=100):
+        if result.error is not None:
+            print(
+                "Skipping {}. Error: {}".format(result.file_path, result.error),
+                file=sys.stderr,
+            )
+            continue
+        yield result.file_path, result.features
+
+
+def extract_features_and_make_uniq_pickle(list_audios_paths, dir_to_save, workers):
+    features_by_path = dict(extract_features(list_audios_paths, workers))
+    # keep the order of list_audios_paths
+    list_audios_features = [
+        (audio_file_path, features_by_path[audio_file_path])
+        for audio_file_path in list_audios_paths
+        if audio_file_path in features_by_path
+    ]
 
     # compute the final path for the pickle
     pickle_file_name = "all.ft.pickle"
@@ -62,13 +88,9 @@ def extract_features_and_make_uniq_pickle(list_audios_paths, dir_to_save):
     pickle.dump(list_audios_features, open(pickle_file_path, "wb"))
 
 
-def extract_features_and_make_feature_per_file(list_audios_paths):
+def extract_features_and_make_feature_per_file(list_audios_paths, workers):
     # Should iterate over audio_files. For each one of them, make a pickle with in the dir.
-    for audio_file_path in tqdm(list_audios_paths, ncols=100):
-        # obtain features
-        featureExtractor.load_audio_file(audio_file_path)
-        features = featureExtractor.compute_all_features()
-
+    for audio_file_path, features in extract_features(list_audios_paths, workers):
         # compute the final path for the pickle
         audio_file_dir = os.path.dirname(audio_file_path)
         pickle_file_name = "".join(
@@ -96,7 +118,7 @@ if __name__ == "__main__":
 
     if args.uniq_pickle:
         # stores in a uniq pickle
-        extract_features_and_make_uniq_pickle(list_audios_paths, root_dir)
+        extract_features_and_make_uniq_pickle(list_audios_paths, root_dir, args.workers)
     else:
         # stores a pickle per audio_file
-        extract_features_and_make_feature_per_file(list_audios_paths)
+        extract_features_and_make_feature_per_file(list_audios_paths, args.workers)
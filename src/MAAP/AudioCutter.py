@@ -143,15 +143,13 @@ class AudioCutter:
         # compute the duration of each segment
         self.set_output_segment_duration(float((end_time - start_time)) / n)
 
-        # create the audioSignals
+        # create the audioSignals. The times are computed from the segment index, and not accumulated, to
+        # avoid floating point drift
         cut_audio_signal_list = list()
-
-        start = start_time
-        end = start_time + self._output_segment_duration
         for segment_i in np.arange(0, n):
-            cut_audio_signal_list.append(self.cut_audio(start, end))
-            start = end
+            start = start_time + segment_i * self._output_segment_duration
             end = start + self._output_segment_duration
+            cut_audio_signal_list.append(self.cut_audio(start, end))
 
         return cut_audio_signal_list
 
@@ -176,18 +174,99 @@ class AudioCutter:
             float((end_time - start_time)) / self._output_segment_duration
         )
 
-        # create the audioSignals
+        # create the audioSignals. The times are computed from the segment index, and not accumulated, to
+        # avoid floating point drift
         cut_audio_signal_list = list()
-
-        start = start_time
-        end = start_time + self._output_segment_duration
         for segment_i in np.arange(0, nr_segments):
+            start = start_time + segment_i * self._output_segment_duration
+            end = start + self._output_segment_duration
             cut_audio_signal_list.append(self.cut_audio(start, end))
-            start = end
-            end = end + self._output_segment_duration
 
         return cut_audio_signal_list
 
+    def frame_signal(
+        self,
+        segment_duration,
+        hop_duration=None,
+        start_time=START_TIME_DEFAULT,
+        end_time=END_TIME_DEFAULT,
+    ):
+        """
+        Frames the signal in segments with sample-exact boundaries, without copying it: the output is a
+        read-only strided view over the data of the loaded AudioSignal.
+        Note: like slice_signal_in_multi, the last segment is ignored if it does not have segment_duration
+        :param segment_duration: in seconds
+        :param hop_duration: time between the start of consecutive segments, in seconds. If lower than
+            segment_duration, segments overlap. If None, it is equal to segment_duration
+        :param start_time:
+        :param end_time:
+        :return: np.ndarray with shape (nr_segments, segment frames), or (nr_segments, segment frames,
+            channels) for multi-channel signals
+        """
+        start_frame, segment_frames, hop_frames, nr_segments = self._compute_framing(
+            segment_duration, hop_duration, start_time, end_time
+        )
+
+        # the channels axis, if any, is kept as is
+        y = self.y[start_frame:]
+        return np.lib.stride_tricks.as_strided(
+            y,
+            shape=(nr_segments, segment_frames) + y.shape[1:],
+            strides=(hop_frames * y.strides[0],) + y.strides,
+            writeable=False,
+        )
+
+    def iter_frames(
+        self,
+        segment_duration,
+        hop_duration=None,
+        start_time=START_TIME_DEFAULT,
+        end_time=END_TIME_DEFAULT,
+    ):
+        """
+        Lazy version of frame_signal. Yields each segment as an AudioSignal whose data is a view over the
+        data of the loaded AudioSignal.
+        """
+        frames = self.frame_signal(segment_duration, hop_duration, start_time, end_time)
+        for segment in frames:
+            yield AudioSignal(segment, self.sample_rate)
+
+    def _compute_framing(self, segment_duration, hop_duration, start_time, end_time):
+        """
+        :return: start_frame, segment_frames, hop_frames, nr_segments
+        """
+        self.check_if_audio_signal_is_loaded(raise_exception=True)
+        # the default end_time is resolved first, since the check compares it with start_time
+        if end_time == END_TIME_DEFAULT:
+            end_time = self.audioSignal.get_duration()
+        start_time, end_time = self._check_start_and_end_time(start_time, end_time)
+        if hop_duration is None:
+            hop_duration = segment_duration
+
+        start_frame = int(round(start_time * self.sample_rate))
+        end_frame = min(int(round(end_time * self.sample_rate)), len(self.y))
+        segment_frames = int(round(segment_duration * self.sample_rate))
+        hop_frames = int(round(hop_duration * self.sample_rate))
+        if segment_frames <= 0 or hop_frames <= 0:
+            raise Exception(
+                "segment_duration and hop_duration must be higher than one sample. "
+                "{} and {} were given".format(segment_duration, hop_duration)
+            )
+
+        nr_segments = self.compute_nr_segments(
+            end_frame - start_frame, segment_frames, hop_frames
+        )
+        return start_frame, segment_frames, hop_frames, nr_segments
+
+    @staticmethod
+    def compute_nr_segments(nr_frames, segment_frames, hop_frames):
+        """
+        :return: number of complete segments of segment_frames, spaced by hop_frames, that fit in nr_frames
+        """
+        if nr_frames < segment_frames:
+            return 0
+        return 1 + (nr_frames - segment_frames) // hop_frames
+
 
 if __name__ == "__main__":
 
@@ -1,10 +1,17 @@
+import os
+import pickle
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import librosa.display
 import matplotlib.pyplot as plt
 import numpy as np
 
+from MAAP.AudioCutter import AudioCutter
 from MAAP.AudioFeature import AudioFeature
 from MAAP.AudioReader import AudioReader
 from MAAP.AudioSignal import AudioSignal
+from MAAP.utils.SharedSegmentSlab import SharedSegmentSlab
 
 DEFAULT_OUTPUT_FORMAT = "dict_key_per_feature"
 AVAILABLE_OUTPUT_FORMAT = ["dict_key_per_feature", "dict_key_per_feature_dim"]
@@ -13,18 +20,54 @@ AVAILABLE_KEYS_MAIN_SECTION_CONFIG = [
     "output_format",
 ]  # module config parser is case insensitive
 N_MFCC_DEFAULT = 20
+N_MELS_DEFAULT = 128
+# hop length, in samples, between the frames of the frame-level features (librosa default)
+HOP_LENGTH_DEFAULT = 512
+
+ExtractionResult = namedtuple("ExtractionResult", ["file_path", "features", "error"])
 
 compute_feature_functions_dict = dict()
+compute_feature_requirements_dict = dict()
+compute_intermediate_functions_dict = dict()
+compute_intermediate_requirements_dict = dict()
+
 
+def _make_requirement_key(requirement):
+    """
+    A requirement is the name of an intermediate, or a tuple (name, kwargs dict) for a parametrized
+    intermediate, e.g. ("mel_spectrogram", {"n_mels": 128}).
+    :return: hashable key (name, sorted kwargs items)
+    """
+    if isinstance(requirement, str):
+        return requirement, tuple()
+    intermediate_name, intermediate_kwargs = requirement
+    return intermediate_name, tuple(sorted(dict(intermediate_kwargs).items()))
 
-def audio_feature(feature_name):
+
+def audio_feature(feature_name, requires=()):
     def decorate(compute_feature_function):
         compute_feature_functions_dict[feature_name] = compute_feature_function
+        compute_feature_requirements_dict[feature_name] = tuple(
+            _make_requirement_key(requirement) for requirement in requires
+        )
         return compute_feature_function
 
     return decorate
 
 
+def audio_intermediate(intermediate_name, requires=()):
+    def decorate(compute_intermediate_function):
+        compute_intermediate_functions_dict[
+            intermediate_name
+        ] = compute_intermediate_function
+        compute_intermediate_requirements_dict[intermediate_name] = tuple(
+            _make_requirement_key(requirement) for requirement in requires
+        )
+        return compute_intermediate_function
+
+    return decorate
+
+
 class AudioFeatureExtractor:
     """"""
 
@@ -37,21 +80,55 @@ class AudioFeatureExtractor:
         self._config_features = None
         self._config_audio_feature_output = AudioFeature()
         self._config_features_functions_kwarg_dict = None
+        self._config_execution_plan = None
+        self._config_args = None
         self._configured = False
+        self._intermediates_cache = dict()
+        self._features_batch_columns = None
 
     def load_audio_file(self, file_path):
 
-        self.audioSignal = AudioReader(file_path).read()
+        # multi-channel files are loaded as multi-channel signals (see load_audio_signal)
+        self.load_audio_signal(AudioReader(file_path).read())
         self.audio_file_path = file_path
-        self.y = self.audioSignal.get_data()
-        self.sample_rate = self.audioSignal.get_sample_rate()
 
     def load_audio_signal(self, audioSignal: AudioSignal):
         # check if it is an AudioSignal
         self.audio_file_path = None
         self.audioSignal = audioSignal
         self.y = self.audioSignal.get_data()
+        if self.y.ndim == 2:
+            # multi-channel signals (frames, channels) are processed as a batch of channels, so features
+            # get one row per channel
+            self.y = np.ascontiguousarray(self.y.T)
         self.sample_rate = self.audioSignal.get_sample_rate()
+        self.reset_intermediates_cache()
+
+    def load_audio_batch(self, y_batch, sample_rate):
+        """
+        Loads a batch of segments with the same number of samples, e.g. the output of
+        AudioCutter.frame_signal, to be processed in one vectorized pass by compute_features_batch.
+        :param y_batch: 2-D np.ndarray with shape (nr_segments, segment frames)
+        :param sample_rate:
+        """
+        if (not isinstance(y_batch, np.ndarray)) or (y_batch.ndim != 2):
+            raise Exception(
+                "y_batch must be a numpy.ndarray data type with 2-dimensions"
+            )
+
+        self.audio_file_path = None
+        self.audioSignal = None
+        # strided views (e.g. overlapped segments) are copied once to a contiguous array
+        self.y = np.ascontiguousarray(y_batch)
+        self.sample_rate = sample_rate
+        self.reset_intermediates_cache()
+
+    def reset_intermediates_cache(self):
+        """
+        Forgets the intermediate representations (see @audio_intermediate) computed for the loaded signal.
+        It is called every time a new signal is loaded.
+        """
+        self._intermediates_cache = dict()
 
     def config(self, features_to_use, output_format=DEFAULT_OUTPUT_FORMAT, **kwargs):
         self.reset_config()
@@ -126,6 +203,16 @@ class AudioFeatureExtractor:
             feature_name: kwargs["{}_func_args".format(feature_name)]
             for feature_name in features_to_use
         }
+        self._config_execution_plan = self.compile_execution_plan(features_to_use)
+        # arguments needed to replicate this configuration in other processes (see extract_many)
+        self._config_args = (
+            self._config_features,
+            output_format,
+            {
+                "{}_func_args".format(feature_name): feature_kwarg_dict
+                for feature_name, feature_kwarg_dict in self._config_features_functions_kwarg_dict.items()
+            },
+        )
         self._configured = True
         self._prepare_output_dict_format()
 
@@ -133,6 +220,8 @@ class AudioFeatureExtractor:
         self._config_features = None
         self._config_output_format = None
         self._config_features_functions_kwarg_dict = None
+        self._config_execution_plan = None
+        self._config_args = None
         self._configured = False
 
         # also re-instance AudioFeature object, to forget the keys previously inserted
@@ -182,7 +271,8 @@ class AudioFeatureExtractor:
         if not self._configured:
             raise Exception("FeatureExtractor instance is not configured")
 
-        # get the list with the functions to be run
+        # compute the intermediates required by the features, in dependency order
+        self._run_execution_plan(self._config_execution_plan)
 
         features_values_dict = dict()
         for feature_name in self._config_features:
@@ -198,44 +288,372 @@ class AudioFeatureExtractor:
                 feature_name
             ]
 
+        # the values of each dimension are taken from the axis after the channels, if the loaded signal
+        # has several channels (or is a batch)
+        dim_axis = self.y.ndim - 1
         for feature_name, start_i, final_i in self._config_output_feature_fetch_iterate:
             i = 0
             for j in range(start_i, final_i):
                 self._config_audio_feature_output[
                     "{}_{}".format(feature_name, j)
-                ] = features_values_dict[feature_name][i]
+                ] = np.take(features_values_dict[feature_name], i, axis=dim_axis)
                 i += 1
 
         return self._config_audio_feature_output
 
+    def compute_features_batch(self):
+        """
+        Computes the configured features for all the segments loaded with load_audio_batch. The librosa
+        functions are called once for the whole batch. Every configured feature must have a pooling
+        strategy, so that it gives a fixed number of values per segment.
+        :return: 2-D np.ndarray with shape (nr_segments, nr_features values). The name of each column is
+            given by get_features_batch_columns
+        """
+        global compute_feature_functions_dict
+        if not self._configured:
+            raise Exception("FeatureExtractor instance is not configured")
+        if self.y.ndim != 2:
+            raise Exception("A batch was not loaded. Run load_audio_batch method")
+
+        self._check_config_features_have_pooling("to be computed in batch")
+        self._run_execution_plan(self._config_execution_plan)
+
+        features_values_dict = {
+            feature_name: compute_feature_functions_dict[feature_name](
+                self, **self._config_features_functions_kwarg_dict[feature_name]
+            )
+            for feature_name in self._config_features
+        }
+        return self._make_features_columns(features_values_dict)
+
+    def compute_features_by_texture_windows(self, segment_duration, hop_duration=None):
+        """
+        Computes segment-level features from a single pass over the loaded signal: the frame-level
+        features are computed once for the whole signal, and then the frames of each segment (texture
+        window) are pooled with the pooling strategy configured for each feature. The segments follow
+        AudioCutter.frame_signal, i.e., sample-exact boundaries, and the last segment is ignored if it does
+        not have segment_duration. A frame belongs to the segments that contain its center.
+        :param segment_duration: in seconds
+        :param hop_duration: time between the start of consecutive segments, in seconds. If None, it is
+            equal to segment_duration
+        :return: 2-D np.ndarray with shape (nr_segments, nr_features values). The name of each column is
+            given by get_features_batch_columns
+        """
+        global compute_feature_functions_dict
+        if not self._configured:
+            raise Exception("FeatureExtractor instance is not configured")
+        if self.y.ndim != 1:
+            raise Exception(
+                "Texture windows can only be computed for mono signals. Load one channel of the signal"
+            )
+        self._check_config_features_have_pooling("to be computed by texture windows")
+        if hop_duration is None:
+            hop_duration = segment_duration
+
+        segment_frames = int(round(segment_duration * self.sample_rate))
+        hop_frames = int(round(hop_duration * self.sample_rate))
+        if segment_frames <= 0 or hop_frames <= 0:
+            raise Exception(
+                "segment_duration and hop_duration must be higher than one sample. "
+                "{} and {} were given".format(segment_duration, hop_duration)
+            )
+        nr_segments = AudioCutter.compute_nr_segments(
+            len(self.y), segment_frames, hop_frames
+        )
+        segments_start = np.arange(nr_segments) * hop_frames
+
+        # indexes [first, last[ of the feature frames whose center is inside each segment
+        windows_first_frame = -(-segments_start // HOP_LENGTH_DEFAULT)
+        windows_last_frame = -(-(segments_start + segment_frames) // HOP_LENGTH_DEFAULT)
+        windows_last_frame = np.maximum(windows_last_frame, windows_first_frame + 1)
+
+        self._run_execution_plan(self._config_execution_plan)
+
+        features_values_dict = dict()
+        for feature_name in self._config_features:
+            feature_kwarg_dict = self._config_features_functions_kwarg_dict[
+                feature_name
+            ].copy()
+            pooling = feature_kwarg_dict.pop("pooling")
+            frame_level_values = compute_feature_functions_dict[feature_name](
+                self, **feature_kwarg_dict
+            )
+            features_values_dict[feature_name] = self._pool_texture_windows(
+                frame_level_values, windows_first_frame, windows_last_frame, pooling
+            )
+
+        return self._make_features_columns(features_values_dict)
+
+    @staticmethod
+    def _pool_texture_windows(array, windows_first_frame, windows_last_frame, pooling):
+        """
+        Pools the last axis of array (which indexes the frames) inside each window [first, last[.
+        :return: array with shape (nr_windows, ...)
+        """
+        nr_frames = array.shape[-1]
+        windows_first_frame = np.minimum(windows_first_frame, nr_frames - 1)
+        windows_last_frame = np.minimum(windows_last_frame, nr_frames)
+
+        # reduceat reduces between consecutive indexes. With the indexes (first_0, last_0, first_1, ...),
+        # the even positions give the reduction of each window, also when windows overlap. A padding frame
+        # is added since the last index can be equal to nr_frames.
+        padded_array = np.concatenate(
+            (array, np.zeros(array.shape[:-1] + (1,))), axis=-1
+        )
+        reduceat_indexes = np.stack(
+            (windows_first_frame, windows_last_frame), axis=-1
+        ).ravel()
+
+        if pooling == "max":
+            pooled = np.maximum.reduceat(padded_array, reduceat_indexes, axis=-1)
+        elif pooling in ("sum", "mean"):
+            pooled = np.add.reduceat(padded_array, reduceat_indexes, axis=-1)
+        else:
+            raise Exception("Pooling strategy '{}' is not valid".format(pooling))
+
+        pooled = pooled[..., ::2]
+        if pooling == "mean":
+            pooled = pooled / (windows_last_frame - windows_first_frame)
+
+        return np.moveaxis(pooled, -1, 0)
+
+    def _check_config_features_have_pooling(self, purpose):
+        not_pooled = [
+            feature_name
+            for feature_name in self._config_features
+            if not self._config_features_functions_kwarg_dict[feature_name].get(
+                "pooling"
+            )
+        ]
+        if len(not_pooled) != 0:
+            raise Exception(
+                "features {} must be configured with a pooling strategy {}".format(
+                    not_pooled, purpose
+                )
+            )
+
+    def _make_features_columns(self, features_values_dict):
+        """
+        Stacks the features values of each segment as columns. Features with several values per segment
+        (e.g. mfcc) give a column per value, named as in the "dict_key_per_feature_dim" output format.
+        :param features_values_dict: dict whose values have shape (nr_segments,) or (nr_segments, n)
+        :return: 2-D np.ndarray with shape (nr_segments, nr_features values)
+        """
+        columns_values = list()
+        columns_names = list()
+        for feature_name in self._config_features:
+            feature_values = features_values_dict[feature_name]
+            if feature_values.ndim == 1:
+                columns_values.append(feature_values[:, np.newaxis])
+                columns_names.append(feature_name)
+            elif feature_values.ndim == 2:
+                columns_values.append(feature_values)
+                columns_names.extend(
+                    "{}_{}".format(feature_name, i)
+                    for i in range(1, feature_values.shape[1] + 1)
+                )
+            else:
+                raise Exception(
+                    "feature {} does not give a fixed number of values per segment".format(
+                        feature_name
+                    )
+                )
+
+        self._features_batch_columns = columns_names
+        return np.concatenate(columns_values, axis=1)
+
+    def get_features_batch_columns(self):
+        return self._features_batch_columns
+
     def compute_all_features(self):
         audio_feature = AudioFeature()
         features = compute_feature_functions_dict.keys()
+        self._run_execution_plan(self.compile_execution_plan(features))
         for feature_name in sorted(features):
             audio_feature[feature_name] = compute_feature_functions_dict[feature_name](
                 self
             )
         return audio_feature
 
+    def extract_many(self, file_paths, workers=None, ordered=True):
+        """
+        Computes the features of many audio files on a pool of processes. Each process replicates the
+        configuration of this instance: the configured features if config was called, all the features
+        otherwise. Files are scheduled from the largest to the smallest, to avoid a long file being the last
+        one to start.
+
+        :param file_paths: iterable with the paths of the audio files
+        :param workers: number of processes. If None, uses the number of CPUs
+        :param ordered: if True, returns a list of ExtractionResult in the same order of file_paths.
+            If False, returns an iterator that yields each ExtractionResult as soon as it is computed
+        :return: ExtractionResult(file_path, features, error). A file that fails does not stop the others:
+            its features is None and error holds the exception, with its original type
+        """
+        file_paths = list(file_paths)
+        results_iterator = self._iter_extract_many(file_paths, workers)
+        if not ordered:
+            return (result for _, result in results_iterator)
+
+        results_by_index = dict(results_iterator)
+        return [results_by_index[i] for i in range(len(file_paths))]
+
+    def _iter_extract_many(self, file_paths, workers):
+        # longest files first. The file size is used as a proxy of the duration
+        scheduled_indexes = sorted(
+            range(len(file_paths)),
+            key=lambda i: self._get_file_size(file_paths[i]),
+            reverse=True,
+        )
+
+        with self.create_worker_pool(workers) as executor:
+            futures_index_dict = {
+                executor.submit(_extract_many_worker, file_paths[i]): i
+                for i in scheduled_indexes
+            }
+            for future in as_completed(futures_index_dict):
+                yield futures_index_dict[future], future.result()
+
+    def create_worker_pool(self, workers=None, slab_layout=None):
+        """
+        :param workers: number of processes. If None, uses the number of CPUs
+        :param slab_layout: SlabLayout of a SharedSegmentSlab the processes attach to, so segments can be
+            submitted with submit_segment_descriptor
+        :return: ProcessPoolExecutor whose processes replicate the configuration of this instance: the
+            configured features if config was called, all the features otherwise
+        """
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self._config_args, slab_layout),
+        )
+
+    @staticmethod
+    def submit_audio_signal(worker_pool, audio_signal):
+        """
+        :param worker_pool: ProcessPoolExecutor created by create_worker_pool
+        :param audio_signal:
+        :return: concurrent.futures.Future whose result is the AudioFeature of audio_signal
+        """
+        return worker_pool.submit(_audio_signal_worker, audio_signal)
+
+    @staticmethod
+    def submit_segment_descriptor(worker_pool, segment_descriptor):
+        """
+        Submits a segment written in a SharedSegmentSlab. Only the descriptor is sent to the worker, which
+        reads the frames directly from the shared memory.
+        :param worker_pool: ProcessPoolExecutor created by create_worker_pool with the slab_layout of the slab
+        :param segment_descriptor: SegmentDescriptor
+        :return: concurrent.futures.Future whose result is the AudioFeature of the segment
+        """
+        return worker_pool.submit(_segment_descriptor_worker, segment_descriptor)
+
+    @staticmethod
+    def _get_file_size(file_path):
+        try:
+            return os.path.getsize(file_path)
+        except OSError:
+            return 0
+
     @staticmethod
     def _make_poling_array(array: np.array, pooling_strategy=None):
+        """
+        Pools the last axis of array, which indexes time. The other axes (e.g. segments of a batch, or
+        mfcc coefficients) are kept.
+        """
         if not pooling_strategy:
             return array
         if pooling_strategy == "mean":
-            return array.mean()
+            return array.mean(axis=-1)
         if pooling_strategy == "max":
-            return array.max()
+            return array.max(axis=-1)
         if pooling_strategy == "sum":
-            return array.sum()
+            return array.sum(axis=-1)
 
         raise Exception("Pooling strategy '{}' is not valid".format(pooling_strategy))
 
-    @audio_feature("spectrogram_magnitude")
+    """
+    Intermediates
+    Each feature declares, in @audio_feature, the intermediates it requires. The config method compiles the
+    selected features into an execution plan, i.e., the required intermediates sorted by dependency order.
+    Intermediates are computed at most once per loaded signal and shared by all the features.
+    """
+
+    @staticmethod
+    def compile_execution_plan(features):
+        """
+        :param features: iterable with the names of the features to compute
+        :return: list of the required intermediates keys (name, kwargs items), where each intermediate
+            comes after the intermediates it depends on
+        """
+        execution_plan = list()
+        visiting = set()
+
+        def visit(requirement_key):
+            if requirement_key in execution_plan:
+                return
+            intermediate_name = requirement_key[0]
+            if intermediate_name not in compute_intermediate_functions_dict:
+                raise Exception(
+                    "Intermediate '{}' does not exist. Allowed intermediates are {}".format(
+                        intermediate_name,
+                        list(compute_intermediate_functions_dict.keys()),
+                    )
+                )
+            if requirement_key in visiting:
+                raise Exception(
+                    "Intermediate '{}' has a circular dependency".format(
+                        intermediate_name
+                    )
+                )
+            visiting.add(requirement_key)
+            for dependency_key in compute_intermediate_requirements_dict[
+                intermediate_name
+            ]:
+                visit(dependency_key)
+            visiting.remove(requirement_key)
+            execution_plan.append(requirement_key)
+
+        for feature_name in sorted(features):
+            for requirement_key in compute_feature_requirements_dict[feature_name]:
+                visit(requirement_key)
+
+        return execution_plan
+
+    def _run_execution_plan(self, execution_plan):
+        for intermediate_name, intermediate_kwargs in execution_plan:
+            self.get_intermediate(intermediate_name, **dict(intermediate_kwargs))
+
+    def get_intermediate(self, intermediate_name, **kwargs):
+        requirement_key = _make_requirement_key((intermediate_name, kwargs))
+        if requirement_key not in self._intermediates_cache:
+            self._intermediates_cache[
+                requirement_key
+            ] = compute_intermediate_functions_dict[intermediate_name](self, **kwargs)
+        return self._intermediates_cache[requirement_key]
+
+    @audio_intermediate("stft_magnitude")
+    def compute_intermediate_stft_magnitude(self):
+        S_full, _ = librosa.magphase(librosa.stft(self.y))
+        return S_full
+
+    @audio_intermediate("power_spectrum", requires=("stft_magnitude",))
+    def compute_intermediate_power_spectrum(self):
+        return self.get_intermediate("stft_magnitude") ** 2
+
+    @audio_intermediate("mel_spectrogram", requires=("power_spectrum",))
+    def compute_intermediate_mel_spectrogram(self, n_mels=N_MELS_DEFAULT):
+        return librosa.feature.melspectrogram(
+            S=self.get_intermediate("power_spectrum"),
+            sr=self.sample_rate,
+            n_mels=n_mels,
+        )
+
+    @audio_feature("spectrogram_magnitude", requires=("stft_magnitude",))
     def compute_spectrogram_magnitude(
         self, return_in_db=True, plot=False, pooling=None
     ):
         # And compute the spectrogram magnitude and phase
-        S_full, _ = librosa.magphase(librosa.stft(self.y))
+        S_full = self.get_intermediate("stft_magnitude")
 
         if plot:
             # Plot the spectrum
@@ -257,39 +675,106 @@ class AudioFeatureExtractor:
 
     @audio_feature("zero_cross_rate")
     def compute_feature_zero_cross_rate(self, pooling=None):
-        zcr = librosa.feature.zero_crossing_rate(self.y)[0]
+        zcr = librosa.feature.zero_crossing_rate(y=self.y)[..., 0, :]
         return self._make_poling_array(zcr, pooling)
 
-    @audio_feature("spectral_centroid")
+    @audio_feature("spectral_centroid", requires=("stft_magnitude",))
     def compute_feature_spectral_centroid(self, pooling=None):
-        ctr = librosa.feature.spectral_centroid(self.y)[0]
+        ctr = librosa.feature.spectral_centroid(
+            S=self.get_intermediate("stft_magnitude")
+        )[..., 0, :]
         return self._make_poling_array(ctr, pooling)
 
-    @audio_feature("spectral_rolloff")
+    @audio_feature("spectral_rolloff", requires=("stft_magnitude",))
     def compute_feature_spectral_rolloff(self, roll_percent=0.85, pooling=None):
         roll_percent = float(roll_percent)
         rol = librosa.feature.spectral_rolloff(
-            self.y, self.sample_rate, roll_percent=roll_percent
-        )[0]
+            S=self.get_intermediate("stft_magnitude"),
+            sr=self.sample_rate,
+            roll_percent=roll_percent,
+        )[..., 0, :]
         return self._make_poling_array(rol, pooling)
 
-    @audio_feature("mfcc")
+    @audio_feature("mfcc", requires=(("mel_spectrogram", {"n_mels": N_MELS_DEFAULT}),))
     def compute_feature_mfcc(self, n_mfcc=N_MFCC_DEFAULT, pooling=None):
         # from config files, values are fetched as string. This n_mfcc must be converted to int
         n_mfcc = int(n_mfcc)
-        mfccs = librosa.feature.mfcc(self.y, self.sample_rate, n_mfcc=n_mfcc)
+        log_mel = librosa.power_to_db(
+            self.get_intermediate("mel_spectrogram", n_mels=N_MELS_DEFAULT),
+            top_db=None,
+        )
+        # the dynamic range is limited to 80 dB below the maximum of each signal (as power_to_db does),
+        # and not below the maximum of the whole batch
+        log_mel = np.maximum(log_mel, log_mel.max(axis=(-2, -1), keepdims=True) - 80.0)
+        mfccs = librosa.feature.mfcc(S=log_mel, n_mfcc=n_mfcc)
         if pooling is not None:
-            mfccs = np.array(
-                [
-                    self._make_poling_array(mfcc_i_array, pooling)
-                    for mfcc_i_array in mfccs
-                ]
-            )
+            mfccs = self._make_poling_array(mfccs, pooling)
         return mfccs
 
     @audio_feature("rms")
-    def compute_feature_rms(self):
-        return librosa.feature.rms(self.y)[0]
+    def compute_feature_rms(self, pooling=None):
+        rms = librosa.feature.rms(y=self.y)[..., 0, :]
+        return self._make_poling_array(rms, pooling)
+
+
+# extractor, and attached shared segment slab, of each process created by
+# AudioFeatureExtractor.create_worker_pool
+_worker_extractor = None
+_worker_slab = None
+
+
+def _init_worker(config_args, slab_layout=None):
+    global _worker_extractor, _worker_slab
+    _worker_extractor = AudioFeatureExtractor()
+    if config_args is not None:
+        features_to_use, output_format, kwargs = config_args
+        _worker_extractor.config(features_to_use, output_format, **kwargs)
+    if slab_layout is not None:
+        _worker_slab = SharedSegmentSlab.attach(slab_layout)
+
+
+def _compute_worker_features():
+    extractor = _worker_extractor
+    if extractor.is_configured_by_file():
+        # compute_features_by_config reuses its output instance, so a copy is returned
+        features = AudioFeature()
+        features.update(extractor.compute_features_by_config())
+        return features
+    return extractor.compute_all_features()
+
+
+def _extract_many_worker(file_path):
+    try:
+        _worker_extractor.load_audio_file(file_path)
+        features = _compute_worker_features()
+    except Exception as e:
+        return ExtractionResult(file_path, None, _make_picklable_error(e))
+
+    return ExtractionResult(file_path, features, None)
+
+
+def _make_picklable_error(error):
+    """
+    The error is sent to the parent process, so it must survive pickling. Errors whose constructor takes
+    other arguments than their args can not be unpickled, and would break the worker pool; those are
+    replaced by an Exception whose message starts with their type name.
+    """
+    try:
+        pickle.loads(pickle.dumps(error))
+    except Exception:
+        return Exception("{}: {}".format(type(error).__name__, error))
+    return error
+
+
+def _audio_signal_worker(audio_signal):
+    _worker_extractor.load_audio_signal(audio_signal)
+    return _compute_worker_features()
+
+
+def _segment_descriptor_worker(segment_descriptor):
+    y = _worker_slab.get_descriptor_array(segment_descriptor)
+    _worker_extractor.load_audio_signal(AudioSignal(y, segment_descriptor.sample_rate))
+    return _compute_worker_features()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,277 @@
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from MAAP.AudioFeatureExtractor import AudioFeatureExtractor
+from MAAP.AudioReceiver import AudioReceiver
+
+PipelineResult = namedtuple(
+    "PipelineResult",
+    [
+        "index",
+        "timestamp",
+        "features",
+        "error",
+        "processing_time",
+        "real_time_factor",
+        "capture_start_time",
+        "latency",
+    ],
+)
+
+REAL_TIME_FACTOR_HISTORY_SIZE = 100
+# maximum time the dispatcher waits for a segment before checking if the pipeline was stopped, in seconds
+DISPATCHER_POLL_TIMEOUT = 0.1
+
+
+class AudioFeaturePipeline:
+    """
+    Real-time pipeline from an AudioReceiver to an AudioFeatureExtractor: segments are taken from the output
+    queue of the receiver, their features are computed on a pool of worker processes, and the results are
+    put in the output queue of the pipeline in capture order.
+
+    Each result reports its processing time, measured from the moment the segment is taken from the
+    receiver until its features are available, and the real-time factor, i.e., the processing time divided
+    by the duration of the segment. Real-time factors growing above 1 mean that the pipeline is falling
+    behind the capture. The latency is the time from the capture of the last frame of the segment until
+    its features are available. The latencies of each stage are kept by the receiver (see
+    AudioReceiver.get_latency_statistics).
+    """
+
+    def __init__(self, audio_receiver, audio_feature_extractor, workers=None):
+        """
+        Constructor for AudioFeaturePipeline
+
+        :param audio_receiver: AudioReceiver instance, already configured
+        :param audio_feature_extractor: AudioFeatureExtractor instance. Its configuration is replicated by
+            the workers: the configured features if config was called, all the features otherwise
+        :param workers: number of worker processes. If None, uses the number of CPUs
+        """
+        if not isinstance(audio_receiver, AudioReceiver):
+            raise Exception(
+                "audio_receiver must be an instance of class {}".format(
+                    AudioReceiver.__name__
+                )
+            )
+        if not isinstance(audio_feature_extractor, AudioFeatureExtractor):
+            raise Exception(
+                "audio_feature_extractor must be an instance of class {}".format(
+                    AudioFeatureExtractor.__name__
+                )
+            )
+
+        self._audio_receiver = audio_receiver
+        self._audio_feature_extractor = audio_feature_extractor
+        self._workers = workers
+        self.outQueue = queue.Queue()
+
+        self._worker_pool = None
+        self._dispatcher_thread = None
+        self._collector_thread = None
+        self._is_running = False
+        self._is_dispatcher_finished = False
+        self._dispatcher_error = None
+
+        # segments submitted to the workers, in capture order, waiting for their features
+        self._pending_segments = deque()
+        self._pending_segments_condition = threading.Condition()
+        self._real_time_factors = deque(maxlen=REAL_TIME_FACTOR_HISTORY_SIZE)
+
+    def __repr__(self):
+        class_name = type(self).__name__
+        return "{}(workers = {}; pending segments = {}; outQueue = {};)".format(
+            class_name,
+            self._workers,
+            self.get_nr_pending_segments(),
+            repr(self.outQueue),
+        )
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    """
+    Getters
+    """
+
+    def get_output_queue(self):
+        return self.outQueue
+
+    def get_result_from_output_queue(self, timeout=None):
+        """
+        :param timeout: maximum time to wait for a result, in seconds. If None, waits until there is one
+        :return: PipelineResult. Raises queue.Empty if timeout expires, and the error of the dispatcher if
+            it failed and the results of the segments submitted before were all taken
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            poll_timeout = DISPATCHER_POLL_TIMEOUT
+            if deadline is not None:
+                poll_timeout = min(poll_timeout, max(deadline - time.monotonic(), 0))
+            try:
+                return self.outQueue.get(timeout=poll_timeout)
+            except queue.Empty:
+                if (
+                    self._collector_thread is not None
+                    and not self._collector_thread.is_alive()
+                ):
+                    self._check_dispatcher_error()
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+
+    def get_nr_pending_segments(self):
+        """
+        :return: number of segments submitted to the workers whose results were not yet put in the output
+            queue
+        """
+        return len(self._pending_segments)
+
+    def get_real_time_factor_statistics(self):
+        """
+        :return: dict with the last, mean and max real-time factors of the most recent segments
+        """
+        real_time_factors = np.array(self._real_time_factors)
+        if len(real_time_factors) == 0:
+            return {"last": None, "mean": None, "max": None}
+        return {
+            "last": real_time_factors[-1],
+            "mean": real_time_factors.mean(),
+            "max": real_time_factors.max(),
+        }
+
+    """
+    Workers
+    """
+
+    def start(self):
+        if self._is_running:
+            raise Exception("Pipeline is already running")
+
+        shared_segment_slab = self._audio_receiver.get_shared_segment_slab()
+        self._worker_pool = self._audio_feature_extractor.create_worker_pool(
+            self._workers,
+            shared_segment_slab.get_layout() if shared_segment_slab else None,
+        )
+        self._is_running = True
+        self._is_dispatcher_finished = False
+        self._dispatcher_error = None
+        self._dispatcher_thread = threading.Thread(
+            target=self._dispatch_segments, daemon=True
+        )
+        self._collector_thread = threading.Thread(
+            target=self._collect_results, daemon=True
+        )
+        self._dispatcher_thread.start()
+        self._collector_thread.start()
+
+    def stop(self):
+        """
+        Stops taking segments from the receiver. The segments already submitted are processed, and their
+        results put in the output queue, before returning. If the pipeline was not started, it does nothing.
+        Raises the error of the dispatcher, if it failed.
+        """
+        self._is_running = False
+        if self._dispatcher_thread is None:
+            return
+        self._dispatcher_thread.join()
+        self._collector_thread.join()
+        self._worker_pool.shutdown()
+        self._dispatcher_thread = None
+        self._check_dispatcher_error()
+
+    def _dispatch_segments(self):
+        """
+        Submits the segments of the receiver to the workers. If submitting fails (e.g., the worker pool is
+        broken), the pipeline stops taking segments, and the error is raised to the caller by stop and
+        get_result_from_output_queue. The collector always gets notified that the dispatcher finished.
+        """
+        try:
+            index = 0
+            while self._is_running:
+                try:
+                    segment = self._audio_receiver.get_sample_from_output_queue(
+                        timeout=DISPATCHER_POLL_TIMEOUT
+                    )
+                except queue.Empty:
+                    continue
+
+                try:
+                    future = self._submit_segment(segment)
+                except Exception:
+                    self._audio_receiver.mark_segment_finished(segment)
+                    raise
+                pending_segment = (index, time.time(), segment, future)
+                with self._pending_segments_condition:
+                    self._pending_segments.append(pending_segment)
+                    self._pending_segments_condition.notify()
+                index += 1
+        except Exception as e:
+            self._dispatcher_error = e
+            self._is_running = False
+        finally:
+            with self._pending_segments_condition:
+                self._is_dispatcher_finished = True
+                self._pending_segments_condition.notify()
+
+    def _submit_segment(self, segment):
+        if segment.get_shared_memory_slot() is None:
+            return AudioFeatureExtractor.submit_audio_signal(self._worker_pool, segment)
+        return AudioFeatureExtractor.submit_segment_descriptor(
+            self._worker_pool, self._audio_receiver.get_segment_descriptor(segment)
+        )
+
+    def _check_dispatcher_error(self):
+        if self._dispatcher_error is not None:
+            raise Exception(
+                "Error while dispatching segments to the workers; Message: {}".format(
+                    self._dispatcher_error
+                )
+            ) from self._dispatcher_error
+
+    def _collect_results(self):
+        while True:
+            with self._pending_segments_condition:
+                while not self._pending_segments and not self._is_dispatcher_finished:
+                    self._pending_segments_condition.wait()
+                if not self._pending_segments:
+                    return
+                # the oldest segment is awaited first, to keep the capture order
+                index, timestamp, segment, future = self._pending_segments[0]
+
+            try:
+                features, error = future.result(), None
+            except Exception as e:
+                features, error = None, e
+            self._audio_receiver.mark_segment_finished(segment)
+            latencies = segment.get_latencies()
+            processing_time = latencies["processing"]
+            real_time_factor = processing_time / segment.get_duration()
+            self._real_time_factors.append(real_time_factor)
+
+            with self._pending_segments_condition:
+                self._pending_segments.popleft()
+            self.outQueue.put(
+                PipelineResult(
+                    index,
+                    timestamp,
+                    features,
+                    error,
+                    processing_time,
+                    real_time_factor,
+                    segment.get_capture_start_time(),
+                    latencies["end_to_end"],
+                )
+            )
+
+    """
+    Boolean methods
+    """
+
+    def is_running(self):
+        return self._is_running
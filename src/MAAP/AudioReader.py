@@ -1,5 +1,9 @@
+import csv
 import os
 import re
+import struct
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import soundfile as sf
@@ -7,12 +11,43 @@ import soundfile as sf
 from MAAP.AudioSignal import AudioSignal
 from MAAP.AudioWriter import AudioWriter
 
+AudioFileInfo = namedtuple(
+    "AudioFileInfo",
+    [
+        "file_path",
+        "sample_rate",
+        "channels",
+        "frames",
+        "duration",
+        "file_size",
+        "modification_time",
+        "error",
+    ],
+    defaults=(None,),
+)
+
+# numpy dtypes (little-endian) of the WAV subtypes that can be memory-mapped without decoding
+MEMMAP_WAV_SUBTYPES_DTYPES = {
+    "PCM_U8": "u1",
+    "PCM_16": "<i2",
+    "PCM_32": "<i4",
+    "FLOAT": "<f4",
+    "DOUBLE": "<f8",
+}
+
 
 class AudioReader:
     """"""
 
-    def __init__(self, file_paths=None):
-        """Constructor for """
+    def __init__(self, file_paths=None, workers=None):
+        """
+        Constructor for AudioReader
+
+        :param file_paths: path, or list of paths, of the .wav files
+        :param workers: number of threads used to decode several files concurrently. If None, uses the
+            default of ThreadPoolExecutor
+        """
+        self._workers = workers
         if file_paths is None:
             pass
         else:
@@ -37,30 +72,423 @@ class AudioReader:
             else:
                 Exception("The file {} must be an .wav file".format(file_path))
 
-    def read(self, file_paths=None):
+    @classmethod
+    def info(cls, paths, workers=None, index_path=None):
+        """
+        Reads the metadata of audio files from their headers only, without decoding the audio.
+
+        :param paths: path, or list of paths, of .wav files or directories. Directories are searched
+            recursively for .wav files
+        :param workers: number of threads used to search the directories and read the headers. If None,
+            uses the default of ThreadPoolExecutor
+        :param index_path: path of a csv index file. If it exists, the files whose size and modification
+            time did not change are not read again. The index is then updated with the result
+        :return: list of AudioFileInfo, sorted by file path. A file that can not be read does not stop the
+            others: its error is set instead of its audio metadata, and it is left out of the index
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+
+        indexed_files_info = dict()
+        if index_path is not None and os.path.isfile(index_path):
+            indexed_files_info = cls.load_index(index_path)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            file_paths = sorted(
+                file_path
+                for found_file_paths in executor.map(cls._search_wav_files, paths)
+                for file_path in found_file_paths
+            )
+            files_info = list(
+                executor.map(
+                    lambda file_path: cls._read_file_info(
+                        file_path, indexed_files_info.get(file_path)
+                    ),
+                    file_paths,
+                )
+            )
+
+        if index_path is not None:
+            cls.save_index(
+                index_path, [info for info in files_info if info.error is None]
+            )
+
+        return files_info
+
+    @staticmethod
+    def load_index(index_path):
+        """
+        :return: dict whose keys are the file paths and values the AudioFileInfo saved in the index
+        """
+        with open(index_path, newline="") as index_file:
+            return {
+                row["file_path"]: AudioFileInfo(
+                    row["file_path"],
+                    int(row["sample_rate"]),
+                    int(row["channels"]),
+                    int(row["frames"]),
+                    float(row["duration"]),
+                    int(row["file_size"]),
+                    float(row["modification_time"]),
+                )
+                for row in csv.DictReader(index_file)
+            }
+
+    @staticmethod
+    def save_index(index_path, files_info):
+        # the index is written to a temporary file first, to never leave an incomplete index
+        tmp_index_path = "{}.tmp".format(index_path)
+        with open(tmp_index_path, "w", newline="") as index_file:
+            writer = csv.writer(index_file)
+            # the error column is not saved, since only the files that could be read are indexed
+            writer.writerow(AudioFileInfo._fields[:-1])
+            writer.writerows(info[:-1] for info in files_info)
+        os.replace(tmp_index_path, index_path)
+
+    @classmethod
+    def _search_wav_files(cls, path):
+        if not os.path.isdir(path):
+            return [path]
+
+        return [
+            os.path.join(dir_path, file_name)
+            for dir_path, _, file_names in os.walk(path)
+            for file_name in file_names
+            if cls.valid_extension(file_name)
+        ]
+
+    @staticmethod
+    def _read_file_info(file_path, indexed_file_info=None):
+        try:
+            file_stat = os.stat(file_path)
+        except OSError as e:
+            return AudioFileInfo(file_path, None, None, None, None, None, None, e)
+
+        if (
+            indexed_file_info is not None
+            and indexed_file_info.file_size == file_stat.st_size
+            and indexed_file_info.modification_time == file_stat.st_mtime
+        ):
+            return indexed_file_info
+
+        try:
+            info = sf.info(file_path)
+        except Exception as e:
+            return AudioFileInfo(
+                file_path,
+                None,
+                None,
+                None,
+                None,
+                file_stat.st_size,
+                file_stat.st_mtime,
+                e,
+            )
+
+        return AudioFileInfo(
+            file_path,
+            info.samplerate,
+            info.channels,
+            info.frames,
+            info.frames / info.samplerate,
+            file_stat.st_size,
+            file_stat.st_mtime,
+        )
 
+    def read(self, file_paths=None, start_time=None, end_time=None):
+        """
+        Reads the audio files as one signal. If start_time or end_time are given, only the frames of that
+        time range are decoded, i.e., the files are seeked instead of being entirely read.
+
+        :param file_paths: if given, replaces the file paths of the reader
+        :param start_time: in seconds. If None, starts at the beginning of the first file
+        :param end_time: in seconds. If None, ends at the end of the last file
+        :return: AudioSignal
+        """
         if file_paths:
             self.set_file_path(file_paths)
 
-        list_y = list()
-        list_sr = list()
-        for file_path in self._file_path:
-            try:
-                y, sr = sf.read(file_path)
-                list_y.append(y)
-                list_sr.append(sr)
-            except Exception as e:
-                raise Exception("{}".format(e))
-
-        set_sr = set(list_sr)
-        if len(set_sr) > 1:
+        return self.read_ranges([(start_time, end_time)])[0]
+
+    def read_ranges(self, time_ranges, file_paths=None):
+        """
+        Reads several time ranges of the audio files, decoding only the frames of each range. The headers
+        are read once for all the ranges. The files are seen as one signal, so a range can span two files.
+
+        :param time_ranges: iterable of (start_time, end_time) tuples, in seconds. None in start_time
+            (end_time) means the beginning (end) of the signal
+        :param file_paths: if given, replaces the file paths of the reader
+        :return: list of AudioSignal, one per range
+        """
+        if file_paths:
+            self.set_file_path(file_paths)
+
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            files_info = self._read_files_info(executor)
+            sample_rate = files_info[0].samplerate
+            total_frames = sum(info.frames for info in files_info)
+
+            audio_signals = list()
+            for start_time, end_time in time_ranges:
+                start_frame, stop_frame = self._time_range_to_frames(
+                    start_time, end_time, sample_rate, total_frames
+                )
+                y = self._read_frames(files_info, start_frame, stop_frame, executor)
+                audio_signals.append(AudioSignal(y, sample_rate))
+
+        return audio_signals
+
+    def _read_files_info(self, executor):
+        """
+        Reads the headers of the files, and checks that their sample rates and number of channels are
+        equal, before any audio is decoded.
+        """
+        files_info = list(executor.map(sf.info, self._file_path))
+
+        if len(set(info.samplerate for info in files_info)) > 1:
             raise Exception(
                 "The sample rates of audios are differents. Audio paths {}".format(
                     self._file_path
                 )
             )
+        if len(set(info.channels for info in files_info)) > 1:
+            raise Exception(
+                "The number of channels of audios are differents. Audio paths {}".format(
+                    self._file_path
+                )
+            )
+        return files_info
 
-        return AudioSignal(np.concatenate(list_y), list_sr[0])
+    @staticmethod
+    def _time_range_to_frames(start_time, end_time, sample_rate, total_frames):
+        start_frame = 0 if start_time is None else int(start_time * sample_rate)
+        stop_frame = total_frames if end_time is None else int(end_time * sample_rate)
+
+        if total_frames == 0:
+            # the audio files are empty, so only the whole (empty) signal can be read
+            if start_frame == 0 and end_time is None:
+                return 0, 0
+            raise Exception(
+                "The audio files have no frames. start_time of {} and end_time {} were given.".format(
+                    start_time, end_time
+                )
+            )
+        if start_frame < 0 or start_frame >= total_frames:
+            raise Exception(
+                "start_time must be positive or zero, and lower than audio duration. "
+                "start_time of {} and audio_duration {} were given.".format(
+                    start_time, total_frames / sample_rate
+                )
+            )
+        if stop_frame <= start_frame:
+            raise Exception(
+                "start_time must be lower than end_time."
+                "start_time of {} and end_time {} were given.".format(
+                    start_time, end_time
+                )
+            )
+
+        return start_frame, min(stop_frame, total_frames)
+
+    def _read_frames(self, files_info, start_frame, stop_frame, executor):
+        """
+        Decodes the frames [start_frame, stop_frame[ of the signal made by the files concatenation.
+        The output array is allocated once, and each file is decoded into its slice concurrently
+        (libsndfile releases the GIL while decoding).
+        """
+        y = self._make_empty_block(stop_frame - start_frame, files_info[0].channels)
+
+        futures = list()
+        file_start_frame = 0
+        for file_path, info in zip(self._file_path, files_info):
+            file_stop_frame = file_start_frame + info.frames
+            if start_frame < file_stop_frame and stop_frame > file_start_frame:
+                read_start_frame = max(start_frame, file_start_frame)
+                read_stop_frame = min(stop_frame, file_stop_frame)
+                futures.append(
+                    executor.submit(
+                        self._read_file_frames_into,
+                        file_path,
+                        read_start_frame - file_start_frame,
+                        y[
+                            read_start_frame
+                            - start_frame : read_stop_frame
+                            - start_frame
+                        ],
+                    )
+                )
+            file_start_frame = file_stop_frame
+
+        # the errors of the threads are raised here, with their original type and traceback
+        for future in futures:
+            future.result()
+
+        return y
+
+    @staticmethod
+    def _read_file_frames_into(file_path, file_start_frame, out):
+        with sf.SoundFile(file_path) as sound_file:
+            sound_file.seek(file_start_frame)
+            nr_read_frames = len(sound_file.read(out=out))
+        if nr_read_frames != len(out):
+            raise Exception(
+                "The file {} has less frames than declared in its header".format(
+                    file_path
+                )
+            )
+
+    def read_memmap(self, file_path=None):
+        """
+        Memory-maps the data chunk of an uncompressed WAV file, instead of decoding it. Samples are only
+        read from disk when accessed (e.g. the slice of AudioCutter.cut_audio), and processes mapping the
+        same file share its pages through the OS cache.
+
+        The data keeps the sample format of the file, i.e., it is not converted to float64 in [-1, 1].
+        For instance, a PCM_16 file gives an int16 memmap. The memmap is read-only.
+
+        :param file_path: if given, replaces the file paths of the reader. Only one file can be mapped
+        :return: AudioSignal backed by a numpy.memmap
+        """
+        if file_path:
+            self.set_file_path(file_path)
+        if len(self._file_path) != 1:
+            raise Exception(
+                "Only one file can be memory-mapped. Audio paths {}".format(
+                    self._file_path
+                )
+            )
+        file_path = self._file_path[0]
+
+        info = sf.info(file_path)
+        if info.format not in ("WAV", "WAVEX") or (
+            info.subtype not in MEMMAP_WAV_SUBTYPES_DTYPES
+        ):
+            raise Exception(
+                "The file {} can not be memory-mapped. Its format is {} {}, and only WAV with "
+                "subtypes {} are allowed".format(
+                    file_path,
+                    info.format,
+                    info.subtype,
+                    list(MEMMAP_WAV_SUBTYPES_DTYPES.keys()),
+                )
+            )
+
+        if info.channels == 1:
+            shape = (info.frames,)
+        else:
+            shape = (info.frames, info.channels)
+
+        y = np.memmap(
+            file_path,
+            dtype=MEMMAP_WAV_SUBTYPES_DTYPES[info.subtype],
+            mode="r",
+            offset=self._find_wav_data_chunk_offset(file_path),
+            shape=shape,
+        )
+        return AudioSignal(y, info.samplerate)
+
+    @staticmethod
+    def _find_wav_data_chunk_offset(file_path):
+        """
+        :return: position, in bytes, of the first sample of the data chunk of a RIFF WAVE file
+        """
+        with open(file_path, "rb") as file:
+            riff_id, _, wave_id = struct.unpack("<4sI4s", file.read(12))
+            if riff_id != b"RIFF" or wave_id != b"WAVE":
+                raise Exception("The file {} is not a RIFF WAVE file".format(file_path))
+
+            while True:
+                chunk_header = file.read(8)
+                if len(chunk_header) < 8:
+                    raise Exception("The file {} has no data chunk".format(file_path))
+                chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+                if chunk_id == b"data":
+                    return file.tell()
+                # chunks are word aligned
+                file.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+    def iter_blocks(self, block_duration, overlap_duration=0, file_paths=None):
+        """
+        Reads the audio files block by block, so only one block is held in memory at a time. The files are
+        read as one continuous signal, i.e., a block can span the end of a file and the start of the next.
+
+        :param block_duration: duration of each block, in seconds
+        :param overlap_duration: duration shared by consecutive blocks, in seconds
+        :param file_paths: if given, replaces the file paths of the reader
+        :return: generator of AudioSignal. The last block may be shorter than block_duration
+        """
+        if file_paths:
+            self.set_file_path(file_paths)
+
+        sample_rate = None
+        channels = None
+        block = None
+        nr_filled_frames = 0
+        # frames at the start of the block that were already yielded in the previous block
+        nr_carried_frames = 0
+        for file_path in self._file_path:
+            with sf.SoundFile(file_path) as sound_file:
+                if sample_rate is None:
+                    sample_rate = sound_file.samplerate
+                    channels = sound_file.channels
+                    block_frames, overlap_frames = self._compute_block_frames(
+                        block_duration, overlap_duration, sample_rate
+                    )
+                    block = self._make_empty_block(block_frames, channels)
+                elif sound_file.samplerate != sample_rate:
+                    raise Exception(
+                        "The sample rates of audios are differents. Audio paths {}".format(
+                            self._file_path
+                        )
+                    )
+                elif sound_file.channels != channels:
+                    raise Exception(
+                        "The number of channels of audios are differents. Audio paths {}".format(
+                            self._file_path
+                        )
+                    )
+
+                while True:
+                    nr_filled_frames += len(
+                        sound_file.read(out=block[nr_filled_frames:])
+                    )
+                    if nr_filled_frames < block_frames:
+                        # end of the file. The block continues being filled by the next file
+                        break
+
+                    yield AudioSignal(block, sample_rate)
+
+                    # the yielded block is not reused, since it is owned by the AudioSignal
+                    next_block = self._make_empty_block(block_frames, channels)
+                    next_block[:overlap_frames] = block[block_frames - overlap_frames :]
+                    block = next_block
+                    nr_filled_frames = nr_carried_frames = overlap_frames
+
+        if nr_filled_frames > nr_carried_frames:
+            yield AudioSignal(block[:nr_filled_frames], sample_rate)
+
+    @staticmethod
+    def _compute_block_frames(block_duration, overlap_duration, sample_rate):
+        block_frames = int(round(block_duration * sample_rate))
+        overlap_frames = int(round(overlap_duration * sample_rate))
+        if block_frames <= 0:
+            raise Exception(
+                "block_duration must be higher than one sample. {} was given".format(
+                    block_duration
+                )
+            )
+        if overlap_frames < 0 or overlap_frames >= block_frames:
+            raise Exception(
+                "overlap_duration must be positive or zero, and lower than block_duration. "
+                "{} was given".format(overlap_duration)
+            )
+        return block_frames, overlap_frames
+
+    @staticmethod
+    def _make_empty_block(nr_frames, channels):
+        if channels == 1:
+            return np.empty(nr_frames)
+        return np.empty((nr_frames, channels))
 
 
 if __name__ == "__main__":
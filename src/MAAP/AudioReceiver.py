@@ -1,60 +1,226 @@
+import asyncio
+import functools
 import queue
 import sys
+import threading
+import time as time_module
 import warnings
+from collections import deque
 
 import numpy as np
-import sounddevice as sd
 
-from MAAP.AudioSignal import AudioSignal
+try:
+    import sounddevice as sd
+except OSError:
+    # PortAudio library not found. Only a VirtualInputDevice can be used
+    sd = None
+
+from MAAP.CapturedAudioSignal import CapturedAudioSignal
+from MAAP.utils.CallbackStatistics import CallbackStatistics
+from MAAP.utils.LatencyTracker import LATENCY_HISTORY_SIZE_DEFAULT, LatencyTracker
+from MAAP.utils.RingBuffer import RingBuffer
+from MAAP.utils.SegmentQueue import QUEUE_POLICY_DEFAULT, SegmentQueue
+from MAAP.utils.SharedSegmentSlab import SegmentDescriptor, SharedSegmentSlab
+from MAAP.VirtualInputDevice import VirtualInputDevice, VirtualInputStream
 
 warnings.simplefilter("always", UserWarning)
 
+BLOCKSIZE_DEFAULT = 0  # PortAudio chooses the optimal (and possibly varying) block size
+
 
 class AudioReceiver:
     """"""
 
-    def __init__(self, channels=1, device_id=None):
-        """Constructor for AudioReceiver"""
-        # Defines device to be used
-        if device_id is None:
-            device_id = sd.default.device[0]
-        if type(device_id) != int:
-            raise Exception("Device ID should be int or None")
-
-        self._audio_buffer = np.empty((0, 1))
-        self.outQueue = queue.Queue()
-
-        self._device_id = device_id
-        self._device_info = sd.query_devices(self._device_id, "input")
-        self._sr = self._device_info["default_samplerate"]
+    def __init__(self, channels=1, device_id=None, virtual_device=None):
+        """
+        Constructor for AudioReceiver
+
+        Several devices can be captured simultaneously. Each one has its own stream and ring buffer, and
+        the segments have the channels of all devices, in the order of the devices, aligned by the capture
+        time of their first frames. The devices must have the same sample rate. Note that the drift between
+        the clocks of different devices is not compensated.
+
+        :param channels: number of channels captured from each device, or list with the number of channels
+            of each device
+        :param device_id: id of the PortAudio input device, or list of ids. If None, uses the default input
+            device
+        :param virtual_device: VirtualInputDevice, or list of them, used instead of PortAudio devices, e.g.,
+            to replay files without audio hardware. If given, device_id is ignored
+        """
+        self._audio_buffers = []
+        self.outQueue = SegmentQueue()
 
-        self._channels = 1
+        if virtual_device is not None:
+            devices = self._to_list(virtual_device)
+            for device in devices:
+                if not isinstance(device, VirtualInputDevice):
+                    raise Exception(
+                        "virtual_device must be an instance of class {}".format(
+                            VirtualInputDevice.__name__
+                        )
+                    )
+            sample_rates = [device.get_sample_rate() for device in devices]
+            max_channels = [device.get_channels() for device in devices]
+            speeds = [device.get_speed() for device in devices]
+            self._is_virtual = True
+        else:
+            if sd is None:
+                raise Exception(
+                    "sounddevice could not be loaded (PortAudio library not found). Use a virtual_device"
+                )
+            # Defines device to be used
+            if device_id is None:
+                device_id = sd.default.device[0]
+            devices = self._to_list(device_id)
+            for device in devices:
+                if type(device) != int:
+                    raise Exception("Device ID should be int, list of int or None")
+
+            self._devices_info = [
+                sd.query_devices(device, "input") for device in devices
+            ]
+            sample_rates = [info["default_samplerate"] for info in self._devices_info]
+            max_channels = [info["max_input_channels"] for info in self._devices_info]
+            speeds = [1] * len(devices)
+            self._is_virtual = False
+
+        if len(set(sample_rates)) > 1:
+            raise Exception(
+                "The sample rates of the devices are different: {}".format(sample_rates)
+            )
+        self._devices = devices
+        self._sr = sample_rates[0]
+        # time between the capture of consecutive frames of each device, in time.perf_counter seconds.
+        # Virtual devices replay, and report ADC times, at speed times real time
+        self._devices_frame_durations = [1 / (self._sr * speed) for speed in speeds]
+
+        devices_channels = self._to_list(channels)
+        if len(devices_channels) == 1:
+            devices_channels = devices_channels * len(devices)
+        if len(devices_channels) != len(devices):
+            raise Exception(
+                "channels must be an int or a list with one value per device. "
+                "{} devices and {} values were given".format(
+                    len(devices), len(devices_channels)
+                )
+            )
+        for device, device_channels, device_max_channels in zip(
+            devices, devices_channels, max_channels
+        ):
+            if not 1 <= device_channels <= device_max_channels:
+                raise Exception(
+                    "Device {} has {} input channels. {} were requested".format(
+                        device, device_max_channels, device_channels
+                    )
+                )
+        self._devices_channels = devices_channels
+        self._channels = sum(devices_channels)
+        # columns of the channels of each device in the segments
+        channels_ends = np.cumsum(devices_channels)
+        self._devices_channels_slices = [
+            slice(end - device_channels, end)
+            for end, device_channels in zip(channels_ends, devices_channels)
+        ]
 
         self._segments_duration = None
+        self._segments_hop = None
         self._nr_frames_per_segment = None
+        self._nr_frames_per_hop = None
         self._is_capturing = False
         self._is_configured = False
 
-        self._audioStream = sd.InputStream(
-            samplerate=self._sr,
-            blocksize=0,
-            device=self._device_id,
-            channels=self._channels,
-            callback=self._audio_stream_callback,
-        )
+        self._audioStreams = []
+
+        # for each device, capture time, in time.perf_counter seconds, of the frame with absolute index
+        # _capture_time_frame_index of its ring buffer. Updated by each block of the callback
+        self._capture_times = [None] * len(devices)
+        self._capture_time_frame_indexes = [0] * len(devices)
+        # the ring buffers are aligned once all devices gave a block. See _align_audio_buffers
+        self._are_audio_buffers_aligned = False
+        # callbacks of different devices run in different threads
+        self._capture_lock = threading.Lock()
+
+        # shared memory where segments are written, if configured, and the number of segments discarded
+        # because all its slots were in use
+        self._shared_segment_slab = None
+        self._nr_slab_dropped_segments = 0
+
+        # activity gate (see config_activity_gate). Thresholds are kept in the units compared in the
+        # callback: mean square of the frames and zero-crossings per frame
+        self._blocksize = BLOCKSIZE_DEFAULT
+        self._is_activity_gate_enabled = False
+        self._activity_mean_square_threshold = None
+        self._activity_zcr_threshold = None
+        self._nr_frames_pre_roll = 0
+        self._nr_frames_hang_over = 0
+        # (start, stop) absolute frame indexes, of the first device, of the blocks with activity
+        self._activity_intervals = deque()
+        self._nr_suppressed_segments = 0
+        self._latency_tracker = LatencyTracker()
+        self._callback_statistics = CallbackStatistics()
+
+        # thread that periodically prints the callback statistics, and the event used to stop it
+        self._statistics_dump_interval = None
+        self._statistics_dump_file = sys.stderr
+        self._statistics_dump_thread = None
+        self._statistics_dump_stop_event = threading.Event()
+
+        # asyncio loop of the consumer of the async iterator interface, and the event used to wake it up
+        self._async_loop = None
+        self._async_segment_event = None
 
     def __repr__(self):
         class_name = type(self).__name__
 
-        repr_str = "{}.(sample_rate = {}; " "_outQueue = {};)"
+        repr_str = "{}.(sample_rate = {}; " "channels = {}; " "_outQueue = {};)"
 
-        return repr_str.format(class_name, self._sr, repr(self.outQueue))
+        return repr_str.format(
+            class_name, self._sr, self._channels, repr(self.outQueue)
+        )
 
     def __enter__(self):
-        self._audioStream.__enter__()
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    async def __aenter__(self):
+        self._bind_async_loop()
+        # start and stop wait for the streams, so they run in the default executor to not block the loop
+        await asyncio.get_running_loop().run_in_executor(None, self.start)
+        return self
 
-    def __exit__(self):
-        self._audioStream.__exit__()
+    async def __aexit__(self, *args):
+        await asyncio.get_running_loop().run_in_executor(None, self.stop)
+
+    def __aiter__(self):
+        self._bind_async_loop()
+        return self
+
+    async def __anext__(self):
+        """
+        Waits, without blocking the event loop, for the next segment of the output queue. The iteration
+        stops when the capture stops and the output queue is empty.
+        """
+        while True:
+            try:
+                segment = self.outQueue.get_nowait()
+            except queue.Empty:
+                pass
+            else:
+                segment.mark_dequeued()
+                return segment
+
+            if not self.is_capturing():
+                raise StopAsyncIteration
+
+            # the event is set by the audio callback (through call_soon_threadsafe) after putting a
+            # segment. The queue is checked again after clearing the event, to not miss a segment put
+            # in-between
+            self._async_segment_event.clear()
+            if self.outQueue.empty():
+                await self._async_segment_event.wait()
 
     """
     Setters/Loaders
@@ -63,18 +229,141 @@ class AudioReceiver:
     def config_capture(
         self,
         segments_duration=1,
+        segments_hop=None,
+        blocksize=BLOCKSIZE_DEFAULT,
+        latency=None,
+        buffer_duration=None,
+        queue_size=0,
+        queue_policy=QUEUE_POLICY_DEFAULT,
+        latency_history_size=LATENCY_HISTORY_SIZE_DEFAULT,
+        statistics_dump_interval=None,
+        statistics_dump_file=sys.stderr,
+        shared_memory_slots=0,
     ):
-
+        """
+        :param segments_duration: duration of the segments put in the output queue, in seconds
+        :param segments_hop: time between the start of consecutive segments, in seconds. With a value lower
+            than segments_duration, segments overlap (sliding windows). If None, it is equal to
+            segments_duration, i.e., segments are back-to-back
+        :param blocksize: number of frames of each block given by PortAudio to the callback, for each device.
+            With 0, PortAudio chooses it
+        :param latency: input latency of the stream, in seconds, or "low"/"high". If None, uses the default
+            of sounddevice
+        :param buffer_duration: capacity of the ring buffers where blocks are copied to, in seconds. It must
+            be higher than segments_duration plus the duration of a block. If None, uses the maximum of
+            twice segments_duration and one second
+        :param queue_size: maximum number of segments in the output queue. With 0, the queue is unbounded
+        :param queue_policy: what happens when a segment is emitted and the output queue is full. One of
+            "block", "drop_oldest", "drop_newest" or "coalesce" (see MAAP.utils.SegmentQueue). Note that
+            "block" blocks the audio callback, which may cause input overflows
+        :param latency_history_size: number of most recent segments whose latencies are kept (see
+            get_latency_statistics)
+        :param statistics_dump_interval: if given, the callback statistics (see get_callback_statistics)
+            are printed every statistics_dump_interval seconds while capturing, by a thread apart from the
+            audio thread
+        :param statistics_dump_file: file object where the callback statistics are printed
+        :param shared_memory_slots: if higher than 0, segments are written in a SharedSegmentSlab with that
+            many slots, so they can be passed to worker processes as descriptors (see
+            get_segment_descriptor). Segments emitted while all slots are in use are discarded. Each slot
+            is released when its segment is marked as finished (see mark_segment_finished)
+        """
         try:
+            if segments_hop is None:
+                segments_hop = segments_duration
+            self._check_duration("segments_duration", segments_duration)
+            self._check_duration("segments_hop", segments_hop)
             self._segments_duration = segments_duration
-            self._check_segments_duration(segments_duration)
-            self._nr_frames_per_segment = int(self._segments_duration * self._sr)
+            self._segments_hop = segments_hop
+            self._nr_frames_per_segment = int(round(self._segments_duration * self._sr))
+            self._nr_frames_per_hop = int(round(self._segments_hop * self._sr))
+            self._blocksize = blocksize
+
+            if buffer_duration is None:
+                buffer_capacity = max(2 * self._nr_frames_per_segment, int(self._sr))
+            else:
+                buffer_capacity = int(buffer_duration * self._sr)
+            if buffer_capacity < self._nr_frames_per_segment + blocksize:
+                raise Exception(
+                    "buffer_duration must be higher than segments_duration plus the duration of a block"
+                )
+            self._audio_buffers = [
+                RingBuffer(buffer_capacity, device_channels)
+                for device_channels in self._devices_channels
+            ]
+            self._capture_times = [None] * len(self._devices)
+            self._are_audio_buffers_aligned = False
+            self._close_shared_segment_slab()
+            self.outQueue = SegmentQueue(
+                queue_size, queue_policy, on_drop=self._release_segment_slot
+            )
+            self._create_shared_segment_slab(shared_memory_slots)
+            self._latency_tracker = LatencyTracker(latency_history_size)
+            self._callback_statistics = CallbackStatistics()
+            if statistics_dump_interval is not None:
+                self._check_duration(
+                    "statistics_dump_interval", statistics_dump_interval
+                )
+            self._statistics_dump_interval = statistics_dump_interval
+            self._statistics_dump_file = statistics_dump_file
+
+            self._activity_intervals.clear()
+            self._nr_suppressed_segments = 0
+            if self._is_activity_gate_enabled:
+                self._check_activity_gate_buffer(self._nr_frames_pre_roll)
+
+            self._create_audio_streams(blocksize, latency)
         except Exception as e:
             self._is_configured = False
             print(f"Exception Error while configuring AudioReceiver; Message: {e}")
         else:
             self._is_configured = True
 
+    def config_activity_gate(
+        self, energy_threshold=None, zcr_threshold=None, pre_roll=0, hang_over=0
+    ):
+        """
+        Configures a gate that only emits segments while there is activity in the captured audio, so
+        silence is not queued nor processed. Each incoming block of the first device is active if its
+        energy is higher than energy_threshold and, if given, its zero-crossing rate is lower than
+        zcr_threshold. A segment is emitted if it has frames of active blocks, or if there are active blocks
+        up to pre_roll seconds after its end or hang_over seconds before its start. Other segments are
+        suppressed (see get_nr_suppressed_segments).
+
+        Segments are emitted pre_roll seconds later than without the gate, since their frames are kept in
+        the ring buffer until it is known whether activity follows. Run after config_capture.
+
+        :param energy_threshold: minimum energy of active blocks, in dBFS (e.g., -50). If None, the gate is
+            disabled and all segments are emitted
+        :param zcr_threshold: maximum zero-crossing rate of active blocks, as a fraction of the frames
+            (from 0 to 1), e.g., to not take broadband noise as activity. If None, it is not checked
+        :param pre_roll: in seconds
+        :param hang_over: in seconds
+        """
+        if not self._is_configured:
+            raise Exception("Capture was not configured yet. Run config_capture method")
+        if energy_threshold is None:
+            with self._capture_lock:
+                self._is_activity_gate_enabled = False
+            return
+
+        if pre_roll < 0 or hang_over < 0:
+            raise Exception(
+                "pre_roll and hang_over must not be negative. {} and {} were given".format(
+                    pre_roll, hang_over
+                )
+            )
+        nr_frames_pre_roll = int(round(pre_roll * self._sr))
+        self._check_activity_gate_buffer(nr_frames_pre_roll)
+
+        with self._capture_lock:
+            self._activity_mean_square_threshold = 10 ** (energy_threshold / 10)
+            self._activity_zcr_threshold = zcr_threshold
+            self._nr_frames_pre_roll = nr_frames_pre_roll
+            self._nr_frames_hang_over = int(round(hang_over * self._sr))
+            self._activity_intervals.clear()
+            self._nr_suppressed_segments = 0
+            self._is_activity_gate_enabled = True
+
     """
     Getters
     """
@@ -82,53 +371,457 @@ class AudioReceiver:
     def get_sample_rate(self):
         return self._sr
 
-    def get_sample_from_output_queue(self):
-        return self.outQueue.get()
+    def get_nr_channels(self):
+        """
+        :return: total number of channels of the segments, i.e., of all devices
+        """
+        return self._channels
+
+    def get_nr_devices(self):
+        return len(self._devices)
+
+    def get_sample_from_output_queue(self, timeout=None):
+        """
+        :param timeout: maximum time to wait for a segment, in seconds. If None, waits until there is one
+        :return: the oldest segment of the output queue, a CapturedAudioSignal. Raises queue.Empty if
+            timeout expires
+        """
+        segment = self.outQueue.get(timeout=timeout)
+        segment.mark_dequeued()
+        return segment
 
     def get_output_queue(self):
         return self.outQueue
 
+    def get_nr_dropped_segments(self):
+        """
+        :return: number of segments discarded because the output queue was full
+        """
+        return self.outQueue.get_nr_dropped_segments()
+
+    def get_nr_suppressed_segments(self):
+        """
+        :return: number of segments not emitted because there was no activity (see config_activity_gate)
+        """
+        return self._nr_suppressed_segments
+
+    def get_shared_segment_slab(self):
+        """
+        :return: SharedSegmentSlab where segments are written, or None if shared_memory_slots was 0
+        """
+        return self._shared_segment_slab
+
+    def get_segment_descriptor(self, segment):
+        """
+        :param segment: CapturedAudioSignal taken from the output queue, written in the shared segment slab
+        :return: SegmentDescriptor, to be read by other processes with SharedSegmentSlab.attach
+        """
+        return SegmentDescriptor(
+            segment.get_shared_memory_slot(),
+            len(segment.get_data()),
+            segment.get_sample_rate(),
+            segment.get_capture_start_time(),
+            segment.get_capture_end_time(),
+        )
+
+    def get_latency_tracker(self):
+        return self._latency_tracker
+
+    def get_latency_statistics(self):
+        """
+        :return: dict with the p50/p99, mean and max latencies, in seconds, of each stage of the segments
+            marked as finished (see mark_segment_finished and MAAP.CapturedAudioSignal)
+        """
+        return self._latency_tracker.get_statistics()
+
+    def get_callback_statistics(self):
+        """
+        :return: dict with the number of blocks and frames received by the callback, of input
+            overflows/underflows, the mean and max execution time of the callback, in seconds, the current
+            number of segments in the output queue, of dropped segments and of overwritten frames of the
+            ring buffers. With several devices, the values are aggregated over all of them
+        """
+        statistics = self._callback_statistics.get_statistics()
+        statistics["devices"] = len(self._devices)
+        statistics["queue_depth"] = self.outQueue.qsize()
+        statistics["dropped_segments"] = (
+            self.get_nr_dropped_segments() + self._nr_slab_dropped_segments
+        )
+        statistics["suppressed_segments"] = self._nr_suppressed_segments
+        statistics["overwritten_frames"] = sum(
+            audio_buffer.get_nr_overwritten_frames()
+            for audio_buffer in self._audio_buffers
+        )
+        return statistics
+
+    def get_callback_duration_histogram(self):
+        """
+        :return: (counts, bin_edges) of the execution times of the callback. See
+            MAAP.utils.CallbackStatistics.get_duration_histogram
+        """
+        return self._callback_statistics.get_duration_histogram()
+
     """
     Workers
     """
 
-    def _audio_stream_callback(self, indata, frames, time, status):
+    def _create_shared_segment_slab(self, nr_slots):
+        self._nr_slab_dropped_segments = 0
+        if nr_slots > 0:
+            self._shared_segment_slab = SharedSegmentSlab(
+                nr_slots, self._nr_frames_per_segment, self._channels
+            )
+
+    def _close_shared_segment_slab(self):
+        """
+        Discards the segments left in the output queue, releasing their slots, and closes the shared segment
+        slab. Its shared memory is only destroyed once the segments already taken from the queue are marked
+        as finished, since their frames are views of it.
+        """
+        if self._shared_segment_slab is None:
+            return
+        while True:
+            try:
+                self._release_segment_slot(self.outQueue.get_nowait())
+            except queue.Empty:
+                break
+        self._shared_segment_slab.close()
+        self._shared_segment_slab = None
+
+    def _release_segment_slot(self, segment):
+        # the slab of the segment, which may be a closed one, if the receiver was configured again
+        shared_segment_slab = segment.get_shared_segment_slab()
+        if shared_segment_slab is not None:
+            shared_segment_slab.release_slot(segment.get_shared_memory_slot())
+            # so the slot is not released twice
+            segment.shared_segment_slab = None
+
+    def _create_audio_streams(self, blocksize, latency):
+        for audio_stream in self._audioStreams:
+            audio_stream.close()
+
+        self._audioStreams = []
+        for device_index, (device, device_channels) in enumerate(
+            zip(self._devices, self._devices_channels)
+        ):
+            stream_class = VirtualInputStream if self._is_virtual else sd.InputStream
+            self._audioStreams.append(
+                stream_class(
+                    samplerate=self._sr,
+                    blocksize=blocksize,
+                    latency=latency,
+                    device=device,
+                    channels=device_channels,
+                    callback=functools.partial(
+                        self._audio_stream_callback, device_index
+                    ),
+                    finished_callback=self._audio_stream_finished_callback,
+                )
+            )
+
+    def _audio_stream_callback(self, device_index, indata, frames, time, status):
         """
         See callback parameter https://python-sounddevice.readthedocs.io/en/0.4.3/api/streams.html#sounddevice.Stream
 
         Here, with sd, the samples corresponds to frames.
         The parameter `frames` corresponds to the number of frames/samples collected by sd.InputStream
+
+        This runs in the real-time audio thread: the block is only copied into the preallocated ring
+        buffer, and the only allocation is the array of each emitted segment, where its frames are copied
+        directly from the ring buffer. After each segment, the buffer advances by the hop, so frames shared
+        by overlapping segments stay in the buffer.
+
+        The capture time of each segment is derived from the ADC time of the block and the absolute index
+        of its frames in the ring buffer. The status and the execution time are only counted (see
+        get_callback_statistics), since I/O in this thread may itself cause overflows.
+
+        :param device_index: index of the device of the stream, bound when the stream is created
         """
-        if status:
-            print(status, file=sys.stderr)
-        self._audio_buffer = np.concatenate((self._audio_buffer, indata), axis=0)
-        if self._audio_buffer.shape[0] > self._nr_frames_per_segment:
-            y, self._audio_buffer = np.split(
-                self._audio_buffer, [self._nr_frames_per_segment], axis=0
+        callback_start_time = time_module.perf_counter()
+        with self._capture_lock:
+            self._callback_statistics.record_block(frames, status)
+            self._update_capture_time(device_index, frames, time)
+            if self._is_activity_gate_enabled and device_index == 0:
+                self._record_block_activity(indata)
+            self._audio_buffers[device_index].write(indata)
+            if not self._are_audio_buffers_aligned:
+                self._align_audio_buffers()
+            if self._are_audio_buffers_aligned:
+                self._emit_segments()
+            self._callback_statistics.record_duration(
+                time_module.perf_counter() - callback_start_time
             )
-            signal = AudioSignal(y[:, 0], sample_rate=self._sr)
-            self.outQueue.put(signal)
-        else:
-            pass
+
+    def _emit_segments(self):
+        """
+        Puts in the output queue the segments available in all ring buffers. The frames of each device are
+        copied directly to its columns of the segment, which is a new array or a slot of the shared segment
+        slab.
+
+        With the activity gate, a segment is only decided when the frames of its pre-roll are available, and
+        the segments without activity are discarded before any copy.
+        """
+        nr_frames_needed = self._nr_frames_per_segment
+        if self._is_activity_gate_enabled:
+            nr_frames_needed += self._nr_frames_pre_roll
+        while all(
+            audio_buffer.get_nr_available_frames() >= nr_frames_needed
+            for audio_buffer in self._audio_buffers
+        ):
+            start_frame_index = self._audio_buffers[0].get_read_index()
+            if self._is_activity_gate_enabled and not self._has_activity(
+                start_frame_index
+            ):
+                self._nr_suppressed_segments += 1
+                self._consume_hop()
+                continue
+
+            slot = None
+            if self._shared_segment_slab is None:
+                y = np.empty((self._nr_frames_per_segment, self._channels))
+            else:
+                slot = self._shared_segment_slab.acquire_slot()
+                if slot is None:
+                    # all slots are in use by segments not yet finished
+                    self._nr_slab_dropped_segments += 1
+                    self._consume_hop()
+                    continue
+                y = self._shared_segment_slab.get_slot_array(slot, squeeze=False)
+            for audio_buffer, channels_slice in zip(
+                self._audio_buffers, self._devices_channels_slices
+            ):
+                audio_buffer.peek(self._nr_frames_per_segment, out=y[:, channels_slice])
+                audio_buffer.consume(self._nr_frames_per_hop)
+            if self._channels == 1:
+                y = y[:, 0]
+
+            # capture times of the first device, the reference of the alignment
+            signal = CapturedAudioSignal(
+                y,
+                sample_rate=self._sr,
+                capture_start_time=self._get_frame_capture_time(0, start_frame_index),
+                capture_end_time=self._get_frame_capture_time(
+                    0, start_frame_index + self._nr_frames_per_segment
+                ),
+                shared_memory_slot=slot,
+                shared_segment_slab=self._shared_segment_slab,
+            )
+            signal.mark_enqueued()
+            self.outQueue.put_segment(signal)
+            self._notify_async_consumer()
+
+    def _consume_hop(self):
+        for audio_buffer in self._audio_buffers:
+            audio_buffer.consume(self._nr_frames_per_hop)
+
+    def _record_block_activity(self, indata):
+        """
+        Checks if the block has activity, and keeps its frame interval if so. Only a dot product and a sign
+        comparison are computed, to be cheap in the audio thread.
+        """
+        frames = indata.ravel()
+        mean_square = np.dot(frames, frames) / len(frames)
+        is_active = mean_square >= self._activity_mean_square_threshold
+        if is_active and self._activity_zcr_threshold is not None:
+            first_channel = indata[:, 0]
+            nr_zero_crossings = np.count_nonzero(
+                (first_channel[1:] >= 0) != (first_channel[:-1] >= 0)
+            )
+            is_active = nr_zero_crossings <= self._activity_zcr_threshold * len(
+                first_channel
+            )
+        if not is_active:
+            return
+
+        start = self._audio_buffers[0].get_write_index()
+        stop = start + len(indata)
+        if self._activity_intervals and self._activity_intervals[-1][1] == start:
+            # consecutive active blocks are merged
+            start = self._activity_intervals.pop()[0]
+        self._activity_intervals.append((start, stop))
+
+    def _has_activity(self, start_frame_index):
+        """
+        :return: True if there are active frames from hang_over before the start of the segment to pre_roll
+            after its end
+        """
+        window_start = start_frame_index - self._nr_frames_hang_over
+        window_stop = (
+            start_frame_index + self._nr_frames_per_segment + self._nr_frames_pre_roll
+        )
+        # intervals that ended before the window are not needed by the next segments either
+        while (
+            self._activity_intervals and self._activity_intervals[0][1] <= window_start
+        ):
+            self._activity_intervals.popleft()
+        for interval_start, interval_stop in self._activity_intervals:
+            if interval_start >= window_stop:
+                break
+            if interval_stop > window_start:
+                return True
+        return False
+
+    def _check_activity_gate_buffer(self, nr_frames_pre_roll):
+        buffer_capacity = self._audio_buffers[0].get_capacity()
+        if (
+            buffer_capacity
+            < self._nr_frames_per_segment + nr_frames_pre_roll + self._blocksize
+        ):
+            raise Exception(
+                "buffer_duration must be higher than segments_duration plus pre_roll plus the duration of a block"
+            )
+
+    def _align_audio_buffers(self):
+        """
+        Once all devices gave a block, discards the frames of each ring buffer captured before the
+        latest first frame among all devices, so the segments start at the same capture time on all
+        devices.
+        """
+        if any(capture_time is None for capture_time in self._capture_times):
+            return
+
+        start_times = [
+            self._get_frame_capture_time(device_index, audio_buffer.get_read_index())
+            for device_index, audio_buffer in enumerate(self._audio_buffers)
+        ]
+        latest_start_time = max(start_times)
+        for audio_buffer, start_time, frame_duration in zip(
+            self._audio_buffers, start_times, self._devices_frame_durations
+        ):
+            audio_buffer.consume(
+                int(round((latest_start_time - start_time) / frame_duration))
+            )
+        self._are_audio_buffers_aligned = True
+
+    def _update_capture_time(self, device_index, frames, time):
+        """
+        Maps the ADC time of the first frame of the block, in the clock of the stream, to time.perf_counter.
+        Some host APIs do not give the ADC time (it is 0). Then, the block is assumed to end at the current
+        time of the stream.
+        """
+        perf_counter_offset = time_module.perf_counter() - time.currentTime
+        adc_time = time.inputBufferAdcTime
+        if adc_time == 0:
+            adc_time = (
+                time.currentTime - frames * self._devices_frame_durations[device_index]
+            )
+        self._capture_times[device_index] = adc_time + perf_counter_offset
+        self._capture_time_frame_indexes[device_index] = self._audio_buffers[
+            device_index
+        ].get_write_index()
+
+    def _get_frame_capture_time(self, device_index, frame_index):
+        return (
+            self._capture_times[device_index]
+            + (frame_index - self._capture_time_frame_indexes[device_index])
+            * self._devices_frame_durations[device_index]
+        )
+
+    def mark_segment_finished(self, segment):
+        """
+        Marks the segment as processed by its consumer, records the latencies of its stages (see
+        get_latency_statistics) and releases its shared memory slot, if any. It should be called once per
+        segment taken from the output queue.
+        :param segment: CapturedAudioSignal
+        """
+        segment.mark_finished()
+        self._latency_tracker.record(segment)
+        self._release_segment_slot(segment)
+
+    def _audio_stream_finished_callback(self):
+        # when the stream of any device finishes, no more aligned segments can be emitted
+        self._is_capturing = False
+        self._notify_async_consumer()
+        self._statistics_dump_stop_event.set()
+
+    def _bind_async_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._async_loop = loop
+            self._async_segment_event = asyncio.Event()
+
+    def _notify_async_consumer(self):
+        if self._async_loop is None:
+            return
+        try:
+            self._async_loop.call_soon_threadsafe(self._async_segment_event.set)
+        except RuntimeError:
+            # the loop was closed
+            self._async_loop = None
 
     def start(self):
 
         if not self._is_configured:
             raise Exception("Capture was not configured yet. Run config_capture method")
-        self._audioStream.start()
+        self._is_capturing = True
+        self.outQueue.resume_puts()
+        for audio_stream in self._audioStreams:
+            audio_stream.start()
+        self._start_statistics_dump()
+
+    def stop(self):
+        """
+        Stops the capture after the blocks already recorded are processed. With the "block" queue policy,
+        the segments that do not fit in the full output queue are discarded, since the callback waiting for
+        a free slot would never let the streams stop
+        """
+        self.outQueue.interrupt_puts()
+        for audio_stream in self._audioStreams:
+            audio_stream.stop()
+        self._is_capturing = False
+        self._notify_async_consumer()
+        self._stop_statistics_dump()
 
     def abort(self):
-        self._audioStream.abort()
+        self.outQueue.interrupt_puts()
+        for audio_stream in self._audioStreams:
+            audio_stream.abort()
+        self._is_capturing = False
+        self._notify_async_consumer()
+        self._stop_statistics_dump()
+
+    def _start_statistics_dump(self):
+        if self._statistics_dump_interval is None:
+            return
+        self._statistics_dump_stop_event.clear()
+        self._statistics_dump_thread = threading.Thread(
+            target=self._dump_statistics, daemon=True
+        )
+        self._statistics_dump_thread.start()
+
+    def _stop_statistics_dump(self):
+        if self._statistics_dump_thread is None:
+            return
+        self._statistics_dump_stop_event.set()
+        self._statistics_dump_thread.join()
+        self._statistics_dump_thread = None
+
+    def _dump_statistics(self):
+        while not self._statistics_dump_stop_event.wait(self._statistics_dump_interval):
+            print(
+                "{} callback statistics: {}".format(
+                    type(self).__name__, self.get_callback_statistics()
+                ),
+                file=self._statistics_dump_file,
+            )
 
     def close(self):
-        self._audioStream.close()
+        self.outQueue.interrupt_puts()
+        for audio_stream in self._audioStreams:
+            audio_stream.close()
+        self._close_shared_segment_slab()
 
     """
     Boolean methods
     """
 
     def is_capturing(self):
-        return self._is_capturing and self._audioStream.active
+        return self._is_capturing and all(
+            audio_stream.active for audio_stream in self._audioStreams
+        )
+
+    def is_virtual(self):
+        return self._is_virtual
 
     def is_configured(self):
         return self._is_configured
@@ -145,24 +838,16 @@ class AudioReceiver:
     """
 
     @staticmethod
-    def _check_segments_duration(segments_duration):
-        if isinstance(segments_duration, (int, float)):
-            if segments_duration >= 0.1 and segments_duration < 1.0:
-                # check it is an integer part of one second.
-                # The multiplication by 10 is an hack to avoid problems with floating point arithmetic.
-                is_intenger_part = (1.0 * 10) % (segments_duration * 10) == 0
-                if not is_intenger_part:
-                    raise Exception(
-                        "Segments duration must be an integer part of 1 second. Ex: 0.25 seconds, or 0.5 seconds"
-                    )
-            elif segments_duration <= 0.1:
-                raise Exception(
-                    "Segments duration must be greater or equal than 0.1 seconds"
-                )
-        else:
-            # raise exception
+    def _to_list(value):
+        return list(value) if isinstance(value, (list, tuple)) else [value]
+
+    @staticmethod
+    def _check_duration(name, duration):
+        if not isinstance(duration, (int, float)):
             raise Exception(
-                "var segments_duration must be of type int or float. This has type {}".format(
-                    type(segments_duration)
+                "var {} must be of type int or float. This has type {}".format(
+                    name, type(duration)
                 )
             )
+        if duration <= 0:
+            raise Exception("{} must be greater than 0 seconds".format(name))
@@ -1,9 +1,13 @@
 import datetime
 
-import librosa
 import matplotlib.pyplot as plt
 import numpy as np
-import sounddevice as sd
+
+try:
+    import sounddevice as sd
+except OSError:
+    # PortAudio library not found. Signals can not be played
+    sd = None
 
 
 class AudioSignal:
@@ -16,7 +20,8 @@ class AudioSignal:
 
         self.y = y
         self.sr = sample_rate
-        self.duration = librosa.get_duration(self.y, self.sr)
+        # frames are along the first axis, for mono (frames,) and multi-channel (frames, channels) signals
+        self.duration = self.y.shape[0] / self.sr
 
     def __repr__(self):
         class_name = type(self).__name__
@@ -67,6 +72,9 @@ class AudioSignal:
     def get_sample_rate(self):
         return self.sr
 
+    def get_nr_channels(self):
+        return 1 if self.y.ndim == 1 else self.y.shape[1]
+
     def get_duration(self):
         """
 
@@ -79,14 +87,18 @@ class AudioSignal:
 
     @staticmethod
     def _check_initial_parameters(y, sample_rate):
-        # y must by a np.ndarray with 1-dim
-        if (not isinstance(y, np.ndarray)) or (y.ndim != 1):
+        # y must by a np.ndarray with 1-dim (mono) or 2-dim (frames, channels)
+        if (not isinstance(y, np.ndarray)) or (y.ndim not in (1, 2)):
             raise Exception(
-                "y value must be a numpy.ndarray data type with 1-dimension"
+                "y value must be a numpy.ndarray data type with 1-dimension, or 2-dimensions (frames, channels)"
             )
 
     def play_audio(self):
-        sd.play(self.y.transpose(), self.sr, blocking=True)
+        if sd is None:
+            raise Exception(
+                "sounddevice could not be loaded (PortAudio library not found)"
+            )
+        sd.play(self.y, self.sr, blocking=True)
 
     def plot_signal(self, channel=0, ax=None):
 
@@ -96,9 +108,10 @@ class AudioSignal:
         self.t = [1 / self.sr * i for i in np.arange(0, len(self.y), 1)]
         t = self.get_timestamps_samples()
         ax.set_xlabel("Time (s)")
-        ax.plot(t, self.y)
+        y = self.y if self.y.ndim == 1 else self.y[:, channel]
+        ax.plot(t, y)
         ax.grid(True)
-        ax.set_ylim(self.y.min(), self.y.max())
+        ax.set_ylim(y.min(), y.max())
 
         return ax
 
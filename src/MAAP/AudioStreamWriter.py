@@ -0,0 +1,278 @@
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import soundfile as sf
+
+from MAAP.AudioSignal import AudioSignal
+
+FLUSH_INTERVAL_DEFAULT = 1  # seconds
+WAV_HEADER_SIZE = 44  # bytes, of PCM files. Other subtypes have slightly larger headers
+# bytes per sample of the PCM and float subtypes of WAV files
+SUBTYPES_SAMPLE_SIZE = {
+    "PCM_U8": 1,
+    "PCM_S8": 1,
+    "PCM_16": 2,
+    "PCM_24": 3,
+    "PCM_32": 4,
+    "FLOAT": 4,
+    "DOUBLE": 8,
+}
+
+
+class AudioStreamWriter:
+    """
+    Writes a stream of AudioSignals, e.g., the segments of an AudioReceiver, to .wav files as they arrive,
+    so memory does not grow with the duration of the stream. Signals are put in a queue and written by a
+    background thread. The files are flushed periodically, so their headers are valid and the audio written
+    so far survives an interruption.
+
+    The stream is split into several files (rotation) when a file reaches rotation_duration or
+    rotation_size. Files are named <file_prefix>_<index>.wav, with index starting at 0.
+    """
+
+    def __init__(
+        self,
+        dir_path,
+        file_prefix,
+        sample_rate,
+        channels=1,
+        rotation_duration=None,
+        rotation_size=None,
+        flush_interval=FLUSH_INTERVAL_DEFAULT,
+        subtype="PCM_16",
+        queue_size=0,
+    ):
+        """
+        Constructor for AudioStreamWriter
+
+        :param dir_path: directory of the files. It must exist
+        :param file_prefix:
+        :param sample_rate:
+        :param channels:
+        :param rotation_duration: maximum duration of each file, in seconds. If None, not limited
+        :param rotation_size: maximum size of each file, in bytes (approximate for non-PCM subtypes, whose
+            headers are larger). If None, not limited
+        :param flush_interval: maximum time between flushes of the file being written, in seconds
+        :param subtype: subtype of the .wav files (see soundfile.available_subtypes("WAV"))
+        :param queue_size: maximum number of signals waiting to be written. With 0, it is unbounded.
+            Otherwise, write blocks while the queue is full
+        """
+        if not os.path.isdir(dir_path):
+            raise Exception(
+                "Directory '{}' does not exist".format(os.path.abspath(dir_path))
+            )
+        if subtype not in SUBTYPES_SAMPLE_SIZE:
+            raise Exception(
+                "subtype '{}' not available. Allowed values are '{}'".format(
+                    subtype, list(SUBTYPES_SAMPLE_SIZE.keys())
+                )
+            )
+
+        self._dir_path = dir_path
+        self._file_prefix = file_prefix
+        self._sr = int(sample_rate)
+        self._channels = channels
+        self._subtype = subtype
+        self._flush_interval = flush_interval
+        self._max_frames_per_file = self._compute_max_frames_per_file(
+            rotation_duration, rotation_size
+        )
+
+        self._queue = queue.Queue(queue_size)
+        self._sound_file = None
+        self._file_paths = list()
+        self._nr_file_frames = 0
+        self._nr_written_frames = 0
+        self._last_flush_time = time.monotonic()
+        self._error = None
+        self._is_closed = False
+
+        self._writer_thread = threading.Thread(target=self._write_queue, daemon=True)
+        self._writer_thread.start()
+
+    def __repr__(self):
+        class_name = type(self).__name__
+        return "{}(sample_rate = {}; channels = {}; files = {}; written frames = {};)".format(
+            class_name,
+            self._sr,
+            self._channels,
+            len(self._file_paths),
+            self._nr_written_frames,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    """
+    Getters
+    """
+
+    def get_file_paths(self):
+        """
+        :return: paths of the files created so far, in order
+        """
+        return list(self._file_paths)
+
+    def get_nr_written_frames(self):
+        return self._nr_written_frames
+
+    def get_written_duration(self):
+        """
+        :return: duration of the audio written so far, in seconds
+        """
+        return self._nr_written_frames / self._sr
+
+    def get_nr_pending_signals(self):
+        return self._queue.qsize()
+
+    """
+    Workers
+    """
+
+    def write(self, audio_signal):
+        """
+        Puts the signal in the queue to be written by the background thread. Its data is not copied, so it
+        must not be modified until it is written.
+        :param audio_signal: AudioSignal with the sample rate and channels of the writer
+        """
+        self._check_error()
+        if self._is_closed:
+            raise Exception("Writer is closed")
+        if not isinstance(audio_signal, AudioSignal):
+            raise Exception(
+                "audio_signal must be an instance of class {}".format(
+                    AudioSignal.__name__
+                )
+            )
+        if audio_signal.get_sample_rate() != self._sr:
+            raise Exception(
+                "Sample rate of the signal {} differs from the sample rate of the writer {}".format(
+                    audio_signal.get_sample_rate(), self._sr
+                )
+            )
+        if audio_signal.get_nr_channels() != self._channels:
+            raise Exception(
+                "Signal has {} channels. The writer has {}".format(
+                    audio_signal.get_nr_channels(), self._channels
+                )
+            )
+        self._queue.put(audio_signal.get_data())
+
+    def close(self):
+        """
+        Waits until the signals in the queue are written, and closes the current file.
+        """
+        if not self._is_closed:
+            self._is_closed = True
+            self._queue.put(None)
+            self._writer_thread.join()
+        self._check_error()
+
+    def _write_queue(self):
+        try:
+            while True:
+                try:
+                    y = self._queue.get(timeout=self._flush_interval)
+                except queue.Empty:
+                    self._flush()
+                    continue
+                if y is None:
+                    break
+                self._write_frames(y)
+                if time.monotonic() - self._last_flush_time >= self._flush_interval:
+                    self._flush()
+        except Exception as e:
+            self._error = e
+        finally:
+            if self._sound_file is not None:
+                self._sound_file.close()
+                self._sound_file = None
+
+    def _write_frames(self, y):
+        """
+        Writes the frames in the current file, rotating to new files when it reaches its maximum number of
+        frames.
+        """
+        while len(y) > 0:
+            if self._sound_file is None:
+                self._open_next_file()
+            if self._max_frames_per_file is None:
+                nr_frames = len(y)
+            else:
+                nr_frames = min(
+                    len(y), self._max_frames_per_file - self._nr_file_frames
+                )
+
+            self._sound_file.write(y[:nr_frames])
+            self._nr_file_frames += nr_frames
+            self._nr_written_frames += nr_frames
+            y = y[nr_frames:]
+
+            if self._nr_file_frames == self._max_frames_per_file:
+                self._sound_file.close()
+                self._sound_file = None
+
+    def _open_next_file(self):
+        file_path = os.path.join(
+            self._dir_path,
+            "{}_{:04d}.wav".format(self._file_prefix, len(self._file_paths)),
+        )
+        self._sound_file = sf.SoundFile(
+            file_path,
+            "w",
+            samplerate=self._sr,
+            channels=self._channels,
+            subtype=self._subtype,
+        )
+        self._file_paths.append(file_path)
+        self._nr_file_frames = 0
+        self._last_flush_time = time.monotonic()
+
+    def _flush(self):
+        # flushing also updates the header of the file with the frames written so far
+        if self._sound_file is not None:
+            self._sound_file.flush()
+        self._last_flush_time = time.monotonic()
+
+    def _check_error(self):
+        if self._error is not None:
+            raise Exception(
+                "Error while writing audio stream; Message: {}".format(self._error)
+            )
+
+    def _compute_max_frames_per_file(self, rotation_duration, rotation_size):
+        max_frames = list()
+        if rotation_duration is not None:
+            max_frames.append(int(round(rotation_duration * self._sr)))
+        if rotation_size is not None:
+            frame_size = SUBTYPES_SAMPLE_SIZE[self._subtype] * self._channels
+            max_frames.append((rotation_size - WAV_HEADER_SIZE) // frame_size)
+        if not max_frames:
+            return None
+        if min(max_frames) <= 0:
+            raise Exception(
+                "rotation_duration and rotation_size must allow at least one frame per file"
+            )
+        return min(max_frames)
+
+
+if __name__ == "__main__":
+
+    duration = 2
+    sample_rate = 40000
+    nr_frames = duration * sample_rate
+    t = np.arange(0, nr_frames, 1)
+    y = np.sin(t * np.pi / 20000)
+
+    with AudioStreamWriter(
+        "/tmp/", "stream", sample_rate, rotation_duration=1.5
+    ) as writer:
+        for segment in np.split(y, 8):
+            writer.write(AudioSignal(segment, sample_rate))
+    print(writer.get_file_paths())
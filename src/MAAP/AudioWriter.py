@@ -1,16 +1,55 @@
 import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import numpy as np
 import soundfile as sf
 
 from MAAP.AudioSignal import AudioSignal
 
+# formats whose compression level can be chosen
+COMPRESSED_FORMATS = ["FLAC", "OGG", "MP3"]
+
+WriteManyReport = namedtuple(
+    "WriteManyReport",
+    [
+        "file_paths",
+        "errors",
+        "nr_written_files",
+        "nr_written_bytes",
+        "elapsed_time",
+        "files_per_second",
+        "bytes_per_second",
+    ],
+)
+
 
 class AudioWriter:
     """"""
 
-    def __init__(self, dir_path, file_name, audio_signal):
-        """Constructor for """
+    def __init__(
+        self,
+        dir_path,
+        file_name,
+        audio_signal,
+        subtype=None,
+        file_format=None,
+        compression_level=None,
+    ):
+        """
+        Constructor for AudioWriter
+
+        :param dir_path:
+        :param file_name:
+        :param audio_signal:
+        :param subtype: e.g., "PCM_16", "PCM_24", "FLOAT" or "VORBIS" (see soundfile.available_subtypes). If
+            None, uses the default subtype of the format (e.g., "PCM_16" for WAV and FLAC)
+        :param file_format: e.g., "WAV", "FLAC" or "OGG" (see soundfile.available_formats). If None, it is
+            given by the extension of file_name
+        :param compression_level: from 0 (fastest, largest) to 1 (slowest, smallest), only for the formats
+            of COMPRESSED_FORMATS. If None, uses the default of libsndfile
+        """
 
         # checks if audio signal
         if not isinstance(audio_signal, AudioSignal):
@@ -31,12 +70,195 @@ class AudioWriter:
         self._file_name = file_name
         self._final_path_name = os.path.join(self._dir_path, (self._file_name))
 
+        self._file_format = self._get_file_format(self._final_path_name, file_format)
+        self._check_write_options(self._file_format, subtype, compression_level)
+        self._subtype = subtype
+        self._compression_level = compression_level
+
     def write(self):
-        sf.write(
+        self._write_file(
             self._final_path_name,
-            self._audio_signal.get_data(),
-            int(self._audio_signal.get_sample_rate()),
+            self._audio_signal,
+            self._subtype,
+            self._file_format,
+            self._compression_level,
+        )
+
+    @classmethod
+    def write_many(
+        cls,
+        dir_path,
+        items,
+        workers=None,
+        max_pending=None,
+        subtype=None,
+        file_format=None,
+        compression_level=None,
+    ):
+        """
+        Writes many signals, each one to its file, concurrently on a thread pool. The directory is checked
+        once, and the write options once per format. Items are taken from the iterable as the pool has room
+        for them, so a generator is not entirely loaded into memory. A failed file does not stop the others.
+
+        :param dir_path: directory of the files. It must exist
+        :param items: iterable of (file_name, AudioSignal) pairs
+        :param workers: number of threads. If None, uses the default of ThreadPoolExecutor
+        :param max_pending: maximum number of signals submitted and not yet written. If None, twice the
+            number of threads
+        :param subtype: subtype of all files. See constructor
+        :param file_format: format of all files. See constructor
+        :param compression_level: See constructor
+        :return: WriteManyReport, with the path of each file in the order of items (None if it failed), the
+            errors as (item index, file name, exception) ordered by item index, the number of files and
+            bytes written, and the elapsed time and throughput (files and bytes per second)
+        """
+        if not os.path.isdir(dir_path):
+            raise Exception(
+                "Directory '{}' does not exist".format(os.path.abspath(dir_path))
+            )
+        if workers is None:
+            # default of ThreadPoolExecutor
+            workers = min(32, (os.cpu_count() or 1) + 4)
+        if max_pending is None:
+            max_pending = 2 * workers
+
+        file_paths = list()
+        errors = list()
+        nr_written_bytes = 0
+        # error of the write options for each format, or None if they are valid
+        write_options_errors = dict()
+
+        def collect(futures):
+            nonlocal nr_written_bytes
+            for future in futures:
+                index, file_name = pending.pop(future)
+                try:
+                    nr_written_bytes += future.result()
+                except Exception as e:
+                    file_paths[index] = None
+                    errors.append((index, file_name, e))
+
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = dict()
+            for index, (file_name, audio_signal) in enumerate(items):
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                file_path = os.path.join(dir_path, file_name)
+                file_paths.append(file_path)
+                item_file_format = cls._get_file_format(file_path, file_format)
+                if item_file_format not in write_options_errors:
+                    try:
+                        cls._check_write_options(
+                            item_file_format, subtype, compression_level
+                        )
+                        write_options_errors[item_file_format] = None
+                    except Exception as e:
+                        write_options_errors[item_file_format] = e
+                if write_options_errors[item_file_format] is not None:
+                    file_paths[index] = None
+                    errors.append(
+                        (index, file_name, write_options_errors[item_file_format])
+                    )
+                    continue
+                future = executor.submit(
+                    cls._write_file,
+                    file_path,
+                    audio_signal,
+                    subtype,
+                    item_file_format,
+                    compression_level,
+                )
+                pending[future] = (index, file_name)
+            collect(list(pending))
+        elapsed_time = time.perf_counter() - start_time
+
+        errors.sort(key=lambda error: error[0])
+        nr_written_files = len(file_paths) - len(errors)
+        return WriteManyReport(
+            file_paths,
+            errors,
+            nr_written_files,
+            nr_written_bytes,
+            elapsed_time,
+            nr_written_files / elapsed_time if elapsed_time > 0 else None,
+            nr_written_bytes / elapsed_time if elapsed_time > 0 else None,
+        )
+
+    @classmethod
+    def _write_file(
+        cls,
+        file_path,
+        audio_signal,
+        subtype=None,
+        file_format=None,
+        compression_level=None,
+    ):
+        """
+        The write options must have been checked by _check_write_options.
+        :return: size of the written file, in bytes
+        """
+        if not isinstance(audio_signal, AudioSignal):
+            raise Exception(
+                "audio_signal must be an instance of class {}".format(
+                    AudioSignal.__name__
+                )
+            )
+        kwargs = dict()
+        if compression_level is not None:
+            kwargs["compression_level"] = compression_level
+        sf.write(
+            file_path,
+            audio_signal.get_data(),
+            int(audio_signal.get_sample_rate()),
+            subtype=subtype,
+            format=file_format,
+            **kwargs,
         )
+        return os.path.getsize(file_path)
+
+    @staticmethod
+    def _get_file_format(file_path, file_format):
+        """
+        :return: file_format in upper case or, if it is None, the extension of file_path
+        """
+        if file_format is None:
+            file_format = os.path.splitext(file_path)[1][1:]
+        return file_format.upper()
+
+    @staticmethod
+    def _check_write_options(file_format, subtype, compression_level):
+        """
+        :param file_format: in upper case (see _get_file_format)
+        """
+        if file_format not in sf.available_formats():
+            raise Exception(
+                "format '{}' not available. Allowed values are '{}'".format(
+                    file_format, list(sf.available_formats().keys())
+                )
+            )
+        if subtype is not None and not sf.check_format(file_format, subtype):
+            raise Exception(
+                "subtype '{}' not available for format '{}'. Allowed values are '{}'".format(
+                    subtype,
+                    file_format,
+                    list(sf.available_subtypes(file_format).keys()),
+                )
+            )
+        if compression_level is not None:
+            if file_format not in COMPRESSED_FORMATS:
+                raise Exception(
+                    "compression_level is only available for the formats '{}'".format(
+                        COMPRESSED_FORMATS
+                    )
+                )
+            if not 0 <= compression_level <= 1:
+                raise Exception(
+                    "compression_level must be between 0 and 1. {} was given".format(
+                        compression_level
+                    )
+                )
 
 
 if __name__ == "__main__":
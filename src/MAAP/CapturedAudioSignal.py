@@ -0,0 +1,99 @@
+import time
+
+from MAAP.AudioSignal import AudioSignal
+
+# stages of the path of a captured segment, in order, and the pair of timestamps that delimits each one
+LATENCY_STAGES = {
+    "emission": ("capture_end_time", "enqueue_time"),
+    "queue": ("enqueue_time", "dequeue_time"),
+    "processing": ("dequeue_time", "finish_time"),
+    "end_to_end": ("capture_end_time", "finish_time"),
+}
+
+
+class CapturedAudioSignal(AudioSignal):
+    """
+    AudioSignal of a segment captured by an AudioReceiver, with the timestamps of its path from the
+    microphone to the consumer. All timestamps are in seconds of time.perf_counter:
+
+    - capture_start_time / capture_end_time: when the first / last frame of the segment was captured by the
+      ADC
+    - enqueue_time: when the segment was put in the output queue of the receiver
+    - dequeue_time: when the segment was taken from the output queue
+    - finish_time: when the consumer finished processing the segment
+
+    Timestamps of the steps not yet done are None.
+
+    If the receiver writes segments in shared memory (see MAAP.utils.SharedSegmentSlab), y is a view of the
+    slot of the segment in shared_segment_slab, and it must not be used after the segment is marked as
+    finished, since the slot is then reused.
+    """
+
+    def __init__(
+        self,
+        y,
+        sample_rate,
+        capture_start_time,
+        capture_end_time,
+        shared_memory_slot=None,
+        shared_segment_slab=None,
+    ):
+        """Constructor for CapturedAudioSignal"""
+        super().__init__(y, sample_rate)
+        self.shared_memory_slot = shared_memory_slot
+        self.shared_segment_slab = shared_segment_slab
+        self.capture_start_time = capture_start_time
+        self.capture_end_time = capture_end_time
+        self.enqueue_time = None
+        self.dequeue_time = None
+        self.finish_time = None
+
+    """
+    Getters
+    """
+
+    def get_shared_memory_slot(self):
+        return self.shared_memory_slot
+
+    def get_shared_segment_slab(self):
+        return self.shared_segment_slab
+
+    def get_capture_start_time(self):
+        return self.capture_start_time
+
+    def get_capture_end_time(self):
+        return self.capture_end_time
+
+    def get_enqueue_time(self):
+        return self.enqueue_time
+
+    def get_dequeue_time(self):
+        return self.dequeue_time
+
+    def get_finish_time(self):
+        return self.finish_time
+
+    def get_latencies(self):
+        """
+        :return: dict with the latency of each stage of LATENCY_STAGES, in seconds. The stages whose
+            timestamps are not set yet are not included
+        """
+        latencies = dict()
+        for stage, (start_attr, end_attr) in LATENCY_STAGES.items():
+            start, end = getattr(self, start_attr), getattr(self, end_attr)
+            if start is not None and end is not None:
+                latencies[stage] = end - start
+        return latencies
+
+    """
+    Workers
+    """
+
+    def mark_enqueued(self):
+        self.enqueue_time = time.perf_counter()
+
+    def mark_dequeued(self):
+        self.dequeue_time = time.perf_counter()
+
+    def mark_finished(self):
+        self.finish_time = time.perf_counter()
@@ -0,0 +1,345 @@
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from MAAP.AudioReader import AudioReader
+from MAAP.AudioSignal import AudioSignal
+
+# block size used when 0 is given, since there is no PortAudio to choose it
+VIRTUAL_BLOCKSIZE_DEFAULT = 512
+
+# same fields as the time parameter given by sounddevice to the callback, in seconds of time.perf_counter
+CallbackTime = namedtuple("CallbackTime", ["inputBufferAdcTime", "currentTime"])
+
+
+class CallbackFlags:
+    """
+    Status given to the callback of a VirtualInputStream, with the input flags of sounddevice.CallbackFlags.
+    It is True if any flag is set.
+    """
+
+    def __init__(self, input_overflow=False, input_underflow=False):
+        """Constructor for CallbackFlags"""
+        self.input_overflow = input_overflow
+        self.input_underflow = input_underflow
+
+    def __repr__(self):
+        class_name = type(self).__name__
+        return "{}(input_overflow = {}; input_underflow = {};)".format(
+            class_name, self.input_overflow, self.input_underflow
+        )
+
+    def __str__(self):
+        flags = [
+            name
+            for name in ["input_overflow", "input_underflow"]
+            if getattr(self, name)
+        ]
+        return ", ".join(flags)
+
+    def __bool__(self):
+        return self.input_overflow or self.input_underflow
+
+
+class VirtualInputDevice:
+    """
+    Stand-in for a PortAudio input device, to run an AudioReceiver without audio hardware (e.g., in
+    benchmarks and headless servers). The device replays a signal, read from .wav files or given as an
+    array, through the same callback interface of sounddevice.InputStream.
+
+    Blocks are delivered at speed times real time. When the consumer of the blocks (the callback) cannot
+    keep up with that rate, the blocks are delivered late and flagged with input_overflow, as PortAudio
+    would do, but no frame is lost. The maximum sustainable rate of a capture stack is the highest speed
+    without overflows.
+    """
+
+    def __init__(
+        self, source, sample_rate=None, speed=1, jitter=0, loop=False, seed=None
+    ):
+        """
+        Constructor for VirtualInputDevice
+
+        :param source: AudioSignal, np.ndarray with shape (frames,) or (frames, channels), or path, or list
+            of paths, of .wav files
+        :param sample_rate: sample rate of the source. Required, and only used, if source is a np.ndarray
+        :param speed: replay rate relative to real time, e.g., 2 delivers blocks twice as fast
+        :param jitter: maximum random delay of each block, in seconds (of replay time). The delays do not
+            accumulate, i.e., the average rate is kept
+        :param loop: if True, the source is replayed indefinitely. Otherwise, the stream finishes at the
+            end of the source
+        :param seed: seed of the random generator of the jitter
+        """
+        if isinstance(source, AudioSignal):
+            y, sample_rate = source.get_data(), source.get_sample_rate()
+        elif isinstance(source, np.ndarray):
+            if sample_rate is None:
+                raise Exception("sample_rate must be given when source is an array")
+            y = source
+        else:
+            audio_signal = AudioReader(source).read()
+            y, sample_rate = audio_signal.get_data(), audio_signal.get_sample_rate()
+
+        if y.ndim == 1:
+            y = y[:, np.newaxis]
+        if y.ndim != 2 or len(y) == 0:
+            raise Exception(
+                "source must have shape (frames,) or (frames, channels) with at least one frame"
+            )
+        if speed <= 0:
+            raise Exception(
+                "speed must be higher than zero. {} was given".format(speed)
+            )
+        if jitter < 0:
+            raise Exception("jitter must not be negative. {} was given".format(jitter))
+
+        # converted once to the dtype of the blocks given by sounddevice
+        self._y = np.ascontiguousarray(y, dtype=np.float32)
+        self._sr = sample_rate
+        self._speed = speed
+        self._jitter = jitter
+        self._loop = loop
+        self._seed = seed
+
+    def __repr__(self):
+        class_name = type(self).__name__
+        return "{}(sample_rate = {}; channels = {}; speed = {}; loop = {};)".format(
+            class_name, self._sr, self.get_channels(), self._speed, self._loop
+        )
+
+    @classmethod
+    def from_synthetic(
+        cls, duration, sample_rate, frequency=None, amplitude=0.5, channels=1, **kwargs
+    ):
+        """
+        Creates a device that replays a synthetic signal: a sine if frequency is given, white noise
+        otherwise.
+
+        :param duration: of the signal, in seconds
+        :param kwargs: other parameters of the constructor (speed, jitter, loop, seed)
+        """
+        nr_frames = int(round(duration * sample_rate))
+        if frequency is None:
+            rng = np.random.default_rng(kwargs.get("seed"))
+            y = rng.uniform(-amplitude, amplitude, nr_frames)
+        else:
+            t = np.arange(nr_frames) / sample_rate
+            y = amplitude * np.sin(2 * np.pi * frequency * t)
+        y = np.repeat(y[:, np.newaxis], channels, axis=1)
+        return cls(y, sample_rate=sample_rate, **kwargs)
+
+    """
+    Getters
+    """
+
+    def get_sample_rate(self):
+        return self._sr
+
+    def get_channels(self):
+        return self._y.shape[1]
+
+    def get_duration(self):
+        """
+        :return: duration of the source, in seconds
+        """
+        return len(self._y) / self._sr
+
+    def get_speed(self):
+        return self._speed
+
+    def get_jitter(self):
+        return self._jitter
+
+    def get_seed(self):
+        return self._seed
+
+    def get_data(self):
+        return self._y
+
+    """
+    Boolean methods
+    """
+
+    def is_looping(self):
+        return self._loop
+
+
+class VirtualInputStream:
+    """
+    Replays a VirtualInputDevice, in a thread, with the interface of sounddevice.InputStream used by
+    AudioReceiver.
+    """
+
+    def __init__(
+        self,
+        device,
+        samplerate=None,
+        blocksize=0,
+        channels=None,
+        callback=None,
+        finished_callback=None,
+        **kwargs
+    ):
+        """
+        Constructor for VirtualInputStream
+
+        :param device: VirtualInputDevice
+        :param samplerate: must be None or the sample rate of the device, since there is no resampling
+        :param blocksize: number of frames of each block. With 0, uses VIRTUAL_BLOCKSIZE_DEFAULT
+        :param channels: number of channels of each block, i.e., the first channels of the device. If
+            None, all the channels of the device
+        :param callback: called as callback(indata, frames, time, status), as in sounddevice
+        :param finished_callback: called when the stream becomes inactive
+        :param kwargs: other parameters of sounddevice.InputStream (e.g., latency), ignored
+        """
+        if not isinstance(device, VirtualInputDevice):
+            raise Exception(
+                "device must be an instance of class {}".format(
+                    VirtualInputDevice.__name__
+                )
+            )
+        if samplerate is not None and samplerate != device.get_sample_rate():
+            raise Exception(
+                "samplerate {} differs from the sample rate of the device {}".format(
+                    samplerate, device.get_sample_rate()
+                )
+            )
+        if channels is None:
+            channels = device.get_channels()
+        if channels > device.get_channels():
+            raise Exception(
+                "The device has only {} channels. {} were requested".format(
+                    device.get_channels(), channels
+                )
+            )
+
+        self._device = device
+        self._blocksize = blocksize if blocksize > 0 else VIRTUAL_BLOCKSIZE_DEFAULT
+        self._channels = channels
+        self._callback = callback
+        self._finished_callback = finished_callback
+
+        self._y = device.get_data()[:, :channels]
+        self._nr_frames_sent = 0
+        self._rng = np.random.default_rng(device.get_seed())
+
+        self._thread = None
+        self._is_stopping = False
+        self.active = False
+        self.stopped = True
+        self.closed = False
+
+    def __repr__(self):
+        class_name = type(self).__name__
+        return "{}(blocksize = {}; channels = {}; active = {};)".format(
+            class_name, self._blocksize, self._channels, self.active
+        )
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+        self.close()
+
+    """
+    Getters
+    """
+
+    def get_blocksize(self):
+        return self._blocksize
+
+    def get_nr_frames_sent(self):
+        return self._nr_frames_sent
+
+    """
+    Workers
+    """
+
+    def start(self):
+        if self.closed:
+            raise Exception("Stream is closed")
+        if self.active:
+            return
+        self._is_stopping = False
+        self.active = True
+        self.stopped = False
+        self._thread = threading.Thread(target=self._replay, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the stream after the block being delivered
+        """
+        self._is_stopping = True
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.stopped = True
+
+    def abort(self):
+        self.stop()
+
+    def close(self):
+        self.stop()
+        self.closed = True
+
+    def _replay(self):
+        sr = self._device.get_sample_rate()
+        seconds_per_frame = 1 / (sr * self._device.get_speed())
+        jitter = self._device.get_jitter()
+        # replay clock, in time.perf_counter seconds, of the frame _nr_frames_sent
+        start_time = time.perf_counter() - self._nr_frames_sent * seconds_per_frame
+        is_late = False
+
+        while not self._is_stopping:
+            block = self._next_block()
+            if block is None:
+                break
+            nr_frames = len(block)
+
+            # the block is complete when its last frame is "recorded"
+            adc_time = start_time + self._nr_frames_sent * seconds_per_frame
+            delivery_time = adc_time + nr_frames * seconds_per_frame
+            if jitter > 0:
+                delivery_time += self._rng.uniform(0, jitter)
+            delay = delivery_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            status = CallbackFlags(input_overflow=is_late)
+            self._callback(
+                block, nr_frames, CallbackTime(adc_time, time.perf_counter()), status
+            )
+            self._nr_frames_sent += nr_frames
+
+            # the callback returned after the next block was due, so the next block is delivered late
+            is_late = (
+                time.perf_counter()
+                > start_time
+                + (self._nr_frames_sent + self._blocksize) * seconds_per_frame
+                + jitter
+            )
+
+        self.active = False
+        if self._finished_callback is not None:
+            self._finished_callback()
+
+    def _next_block(self):
+        """
+        :return: np.ndarray with shape (frames, channels), or None at the end of the source
+        """
+        nr_frames = len(self._y)
+        start = self._nr_frames_sent
+        if self._device.is_looping():
+            start %= nr_frames
+        if start >= nr_frames:
+            return None
+
+        stop = start + self._blocksize
+        if stop <= nr_frames:
+            return self._y[start:stop]
+        if not self._device.is_looping():
+            return self._y[start:]
+        return np.take(self._y, np.arange(start, stop), axis=0, mode="wrap")
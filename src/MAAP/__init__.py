@@ -2,10 +2,14 @@ __all__ = [
     "AudioCutter",
     "AudioFeature",
     "AudioFeatureExtractor",
+    "AudioFeaturePipeline",
     "AudioReader",
     "AudioReceiver",
     "AudioSignal",
+    "AudioStreamWriter",
     "AudioWriter",
+    "CapturedAudioSignal",
+    "VirtualInputDevice",
     "utils",
 ]
 
@@ -15,10 +19,14 @@ from MAAP import utils
 from MAAP.AudioCutter import AudioCutter
 from MAAP.AudioFeature import AudioFeature
 from MAAP.AudioFeatureExtractor import AudioFeatureExtractor
+from MAAP.AudioFeaturePipeline import AudioFeaturePipeline
 from MAAP.AudioReader import AudioReader
 from MAAP.AudioReceiver import AudioReceiver
 from MAAP.AudioSignal import AudioSignal
+from MAAP.AudioStreamWriter import AudioStreamWriter
 from MAAP.AudioWriter import AudioWriter
+from MAAP.CapturedAudioSignal import CapturedAudioSignal
+from MAAP.VirtualInputDevice import VirtualInputDevice
 
 if sys.version_info[:2] >= (3, 8):
     # TODO: Import directly (no need for conditional) when `python_requires = >= 3.8`
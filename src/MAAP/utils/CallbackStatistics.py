@@ -0,0 +1,128 @@
+from bisect import bisect_left
+
+import numpy as np
+
+# upper edges of the bins of the histogram of callback durations, in seconds. The last bin has the durations
+# above the last edge
+CALLBACK_DURATION_BIN_EDGES_DEFAULT = (
+    0.0001,
+    0.0002,
+    0.0005,
+    0.001,
+    0.002,
+    0.005,
+    0.01,
+    0.02,
+    0.05,
+)
+
+
+class CallbackStatistics:
+    """
+    Counters of an audio callback: blocks and frames received, input overflows/underflows, and the duration
+    of each call. It is made to be updated inside the real-time audio thread: updating only increments
+    counters and one preallocated histogram bin, with no I/O, lock or allocation.
+
+    The counters are written by one thread (the callback) and read by others. The values read are not
+    guaranteed to be consistent with each other, but each one is.
+    """
+
+    def __init__(self, duration_bin_edges=CALLBACK_DURATION_BIN_EDGES_DEFAULT):
+        """
+        Constructor for CallbackStatistics
+
+        :param duration_bin_edges: increasing upper edges of the bins of the histogram of callback
+            durations, in seconds
+        """
+        if np.any(np.diff(duration_bin_edges) <= 0):
+            raise Exception("duration_bin_edges must be increasing")
+        # a tuple, since bisect is faster than numpy for single values
+        self._duration_bin_edges = tuple(float(edge) for edge in duration_bin_edges)
+        self._duration_histogram = np.zeros(
+            len(self._duration_bin_edges) + 1, dtype=np.int64
+        )
+        self.reset()
+
+    def __repr__(self):
+        class_name = type(self).__name__
+        return "{}(blocks = {}; input overflows = {}; input underflows = {};)".format(
+            class_name,
+            self._nr_blocks,
+            self._nr_input_overflows,
+            self._nr_input_underflows,
+        )
+
+    """
+    Getters
+    """
+
+    def get_nr_blocks(self):
+        return self._nr_blocks
+
+    def get_nr_frames(self):
+        return self._nr_frames
+
+    def get_nr_input_overflows(self):
+        return self._nr_input_overflows
+
+    def get_nr_input_underflows(self):
+        return self._nr_input_underflows
+
+    def get_duration_histogram(self):
+        """
+        :return: (counts, bin_edges), with the upper edges of the bins in seconds. The last count has the
+            durations above the last edge
+        """
+        return self._duration_histogram.copy(), np.array(self._duration_bin_edges)
+
+    def get_statistics(self):
+        """
+        :return: dict with the counters and the mean and max callback durations, in seconds (None if there
+            were no calls)
+        """
+        nr_blocks = self._nr_blocks
+        return {
+            "blocks": nr_blocks,
+            "frames": self._nr_frames,
+            "input_overflows": self._nr_input_overflows,
+            "input_underflows": self._nr_input_underflows,
+            "callback_duration_mean": (
+                self._total_duration / nr_blocks if nr_blocks > 0 else None
+            ),
+            "callback_duration_max": self._max_duration if nr_blocks > 0 else None,
+        }
+
+    """
+    Workers
+    """
+
+    def record_block(self, frames, status):
+        """
+        Counts a block received by the callback.
+        :param frames: number of frames of the block
+        :param status: sounddevice.CallbackFlags, or an object with its input flags
+        """
+        self._nr_blocks += 1
+        self._nr_frames += frames
+        if status.input_overflow:
+            self._nr_input_overflows += 1
+        if status.input_underflow:
+            self._nr_input_underflows += 1
+
+    def record_duration(self, duration):
+        """
+        :param duration: execution time of one call of the callback, in seconds
+        """
+        self._total_duration += duration
+        if duration > self._max_duration:
+            self._max_duration = duration
+        self._duration_histogram[bisect_left(self._duration_bin_edges, duration)] += 1
+
+    def reset(self):
+        self._nr_blocks = 0
+        self._nr_frames = 0
+        self._nr_input_overflows = 0
+        self._nr_input_underflows = 0
+        self._total_duration = 0.0
+        self._max_duration = 0.0
+        self._duration_histogram[:] = 0
@@ -0,0 +1,117 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+LATENCY_HISTORY_SIZE_DEFAULT = 1000
+PERCENTILES_DEFAULT = (50, 99)
+
+
+class LatencyTracker:
+    """
+    Keeps the latencies of the most recent segments, per stage (see MAAP.CapturedAudioSignal), and computes
+    their percentiles and histograms.
+    """
+
+    def __init__(self, history_size=LATENCY_HISTORY_SIZE_DEFAULT):
+        """
+        Constructor for LatencyTracker
+
+        :param history_size: maximum number of latencies kept per stage. The oldest are discarded
+        """
+        if history_size <= 0:
+            raise Exception(
+                "history_size must be higher than zero. {} was given".format(
+                    history_size
+                )
+            )
+        self._history_size = history_size
+        self._latencies = dict()
+        self._nr_recorded_segments = 0
+        # latencies are usually recorded and read by different threads
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        class_name = type(self).__name__
+        return "{}(history_size = {}; recorded segments = {};)".format(
+            class_name, self._history_size, self._nr_recorded_segments
+        )
+
+    """
+    Getters
+    """
+
+    def get_stages(self):
+        with self._lock:
+            return list(self._latencies.keys())
+
+    def get_nr_recorded_segments(self):
+        return self._nr_recorded_segments
+
+    def get_latencies(self, stage):
+        """
+        :return: np.ndarray with the latencies of the stage, in seconds, from the oldest to the newest
+        """
+        with self._lock:
+            if stage in self._latencies:
+                return np.array(self._latencies[stage])
+        raise Exception(
+            "stage '{}' has no latencies. Stages with latencies are '{}'".format(
+                stage, self.get_stages()
+            )
+        )
+
+    def get_percentiles(self, stage, percentiles=PERCENTILES_DEFAULT):
+        """
+        :return: dict with the latency, in seconds, of each percentile, e.g., {"p50": ..., "p99": ...}
+        """
+        latencies = self.get_latencies(stage)
+        values = np.percentile(latencies, percentiles)
+        return {
+            "p{}".format(percentile): value
+            for percentile, value in zip(percentiles, values)
+        }
+
+    def get_histogram(self, stage, bins=10):
+        """
+        :param bins: number of bins, or their edges, in seconds. See numpy.histogram
+        :return: (counts, bin_edges)
+        """
+        return np.histogram(self.get_latencies(stage), bins=bins)
+
+    def get_statistics(self, percentiles=PERCENTILES_DEFAULT):
+        """
+        :return: dict with, for each stage, a dict with the percentiles, the mean and the max latencies, in
+            seconds, and the number of latencies kept
+        """
+        statistics = dict()
+        for stage in self.get_stages():
+            latencies = self.get_latencies(stage)
+            statistics[stage] = {
+                **self.get_percentiles(stage, percentiles),
+                "mean": latencies.mean(),
+                "max": latencies.max(),
+                "count": len(latencies),
+            }
+        return statistics
+
+    """
+    Workers
+    """
+
+    def record(self, captured_audio_signal):
+        """
+        Keeps the latencies of the stages of the segment whose timestamps are set.
+        :param captured_audio_signal: CapturedAudioSignal
+        """
+        with self._lock:
+            for stage, latency in captured_audio_signal.get_latencies().items():
+                if stage not in self._latencies:
+                    self._latencies[stage] = deque(maxlen=self._history_size)
+                self._latencies[stage].append(latency)
+            self._nr_recorded_segments += 1
+
+    def reset(self):
+        with self._lock:
+            self._latencies = dict()
+            self._nr_recorded_segments = 0
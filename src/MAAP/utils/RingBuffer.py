@@ -0,0 +1,139 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity FIFO of audio frames, allocated once. It is made to be used inside an audio callback:
+    writing only copies the incoming block into the buffer, and no memory is (re)allocated.
+
+    Frames are identified by their absolute index since the creation of the buffer. The read index is the
+    index of the oldest frame not yet consumed, and the write index is the index of the next frame to be
+    written. When the buffer is full, the oldest frames are overwritten.
+    """
+
+    def __init__(self, capacity, channels=1, dtype=np.float32):
+        """
+        Constructor for RingBuffer
+
+        :param capacity: maximum number of frames kept in the buffer
+        :param channels:
+        :param dtype: data type of the frames in the buffer
+        """
+        if capacity <= 0:
+            raise Exception(
+                "capacity must be higher than zero. {} was given".format(capacity)
+            )
+
+        self._buffer = np.zeros((capacity, channels), dtype=dtype)
+        self._capacity = capacity
+        self._channels = channels
+        self._read_index = 0
+        self._write_index = 0
+        self._nr_overwritten_frames = 0
+
+    def __repr__(self):
+        class_name = type(self).__name__
+        return "{}(capacity = {}; channels = {}; available frames = {};)".format(
+            class_name, self._capacity, self._channels, self.get_nr_available_frames()
+        )
+
+    """
+    Getters
+    """
+
+    def get_capacity(self):
+        return self._capacity
+
+    def get_channels(self):
+        return self._channels
+
+    def get_read_index(self):
+        return self._read_index
+
+    def get_write_index(self):
+        return self._write_index
+
+    def get_nr_available_frames(self):
+        return max(self._write_index - self._read_index, 0)
+
+    def get_nr_overwritten_frames(self):
+        """
+        :return: number of frames that were overwritten before being consumed, since the buffer was full
+        """
+        return self._nr_overwritten_frames
+
+    """
+    Workers
+    """
+
+    def write(self, frames):
+        """
+        Copies frames into the buffer.
+        :param frames: np.ndarray with shape (nr_frames, channels)
+        """
+        nr_frames = len(frames)
+        write_index = self._write_index
+        self._write_index += nr_frames
+
+        # frames that would not fit in the buffer are never copied
+        if nr_frames > self._capacity:
+            frames = frames[nr_frames - self._capacity :]
+            write_index = self._write_index - self._capacity
+            nr_frames = self._capacity
+
+        self._copy_in(frames, write_index)
+
+        nr_exceeding_frames = self._write_index - self._read_index - self._capacity
+        if nr_exceeding_frames > 0:
+            self._nr_overwritten_frames += nr_exceeding_frames
+            self._read_index += nr_exceeding_frames
+
+    def peek(self, nr_frames, out=None):
+        """
+        Copies the nr_frames oldest frames, without consuming them.
+        :param nr_frames: must not be higher than the number of available frames
+        :param out: np.ndarray with shape (nr_frames, channels) where frames are copied to. If None, a new
+            array is allocated
+        :return: out
+        """
+        if nr_frames > self.get_nr_available_frames():
+            raise Exception(
+                "Only {} frames are available. {} were requested".format(
+                    self.get_nr_available_frames(), nr_frames
+                )
+            )
+        if out is None:
+            out = np.empty((nr_frames, self._channels))
+
+        start = self._read_index % self._capacity
+        nr_frames_until_end = min(nr_frames, self._capacity - start)
+        out[:nr_frames_until_end] = self._buffer[start : start + nr_frames_until_end]
+        out[nr_frames_until_end:] = self._buffer[: nr_frames - nr_frames_until_end]
+        return out
+
+    def consume(self, nr_frames):
+        """
+        Discards the nr_frames oldest frames. If nr_frames is higher than the number of available frames,
+        the frames that are missing are discarded as soon as they are written.
+        """
+        self._read_index += nr_frames
+
+    def read(self, nr_frames, out=None):
+        """
+        Copies and consumes the nr_frames oldest frames. See peek.
+        """
+        out = self.peek(nr_frames, out)
+        self.consume(nr_frames)
+        return out
+
+    def _copy_in(self, frames, write_index):
+        # frames before the read index were already consumed (see consume), so they are not copied
+        nr_consumed_frames = min(max(self._read_index - write_index, 0), len(frames))
+        frames = frames[nr_consumed_frames:]
+        write_index += nr_consumed_frames
+
+        nr_frames = len(frames)
+        start = write_index % self._capacity
+        nr_frames_until_end = min(nr_frames, self._capacity - start)
+        self._buffer[start : start + nr_frames_until_end] = frames[:nr_frames_until_end]
+        self._buffer[: nr_frames - nr_frames_until_end] = frames[nr_frames_until_end:]
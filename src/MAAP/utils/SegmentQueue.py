@@ -0,0 +1,104 @@
+import queue
+
+QUEUE_POLICY_DEFAULT = "block"
+AVAILABLE_QUEUE_POLICIES = ["block", "drop_oldest", "drop_newest", "coalesce"]
+
+
+class SegmentQueue(queue.Queue):
+    """
+    queue.Queue with a policy that defines what happens when a segment is put in the queue and it is full:
+
+    - "block": waits until there is a free slot (as queue.Queue.put), or until the waiting puts are
+      interrupted (see interrupt_puts), in which case the segment is discarded
+    - "drop_oldest": the oldest segment in the queue is discarded
+    - "drop_newest": the segment being put is discarded
+    - "coalesce": the newest segment in the queue is replaced by the segment being put, so consumers always
+      get the most recent audio at the end of the queue
+
+    The number of discarded segments is counted. With maxsize <= 0 the queue is unbounded, and no segment
+    is ever discarded.
+    """
+
+    def __init__(self, maxsize=0, policy=QUEUE_POLICY_DEFAULT, on_drop=None):
+        """
+        Constructor for SegmentQueue
+
+        :param maxsize:
+        :param policy:
+        :param on_drop: if given, called with each discarded segment, e.g., to release its resources
+        """
+        if policy not in AVAILABLE_QUEUE_POLICIES:
+            raise Exception(
+                "policy '{}' not available. Allowed values are '{}'".format(
+                    policy, AVAILABLE_QUEUE_POLICIES
+                )
+            )
+
+        super().__init__(maxsize)
+        self._policy = policy
+        self._nr_dropped_segments = 0
+        self._on_drop = on_drop
+        self._are_puts_interrupted = False
+
+    """
+    Getters
+    """
+
+    def get_policy(self):
+        return self._policy
+
+    def get_nr_dropped_segments(self):
+        return self._nr_dropped_segments
+
+    """
+    Workers
+    """
+
+    def put_segment(self, segment):
+        """
+        Puts the segment in the queue, applying the policy if the queue is full.
+        :return: True if the segment was put in the queue, False if it was discarded
+        """
+        with self.not_full:
+            if self._policy == "block":
+                while (
+                    0 < self.maxsize <= self._qsize() and not self._are_puts_interrupted
+                ):
+                    self.not_full.wait()
+
+            if 0 < self.maxsize <= self._qsize():
+                self._nr_dropped_segments += 1
+                # a "block" put only gets here if it was interrupted
+                if self._policy in ("drop_newest", "block"):
+                    self._drop(segment)
+                    return False
+                if self._policy == "coalesce":
+                    self._drop(self.queue[-1])
+                    self.queue[-1] = segment
+                    return True
+                # drop_oldest. The discarded segment will never be marked with task_done
+                self._drop(self._get())
+                self.unfinished_tasks -= 1
+
+            self._put(segment)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+            return True
+
+    def interrupt_puts(self):
+        """
+        Wakes up the puts waiting for a free slot with the "block" policy, and makes the next ones discard
+        their segment instead of waiting while the queue is full, e.g., so the thread putting the segments
+        can be stopped while no consumer takes them. Undone by resume_puts.
+        """
+        with self.not_full:
+            self._are_puts_interrupted = True
+            self.not_full.notify_all()
+
+    def resume_puts(self):
+        with self.not_full:
+            self._are_puts_interrupted = False
+
+    def _drop(self, segment):
+        if self._on_drop is not None:
+            self._on_drop(segment)
@@ -0,0 +1,220 @@
+import threading
+from collections import deque, namedtuple
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# what a worker process needs to attach to a slab created by another process
+SlabLayout = namedtuple(
+    "SlabLayout", ["name", "nr_slots", "segment_frames", "channels", "dtype"]
+)
+
+# reference to a segment written in a slab, passed to worker processes instead of its frames
+SegmentDescriptor = namedtuple(
+    "SegmentDescriptor",
+    ["slot", "length", "sample_rate", "capture_start_time", "capture_end_time"],
+)
+
+
+class SharedSegmentSlab:
+    """
+    Fixed number of segment slots in one multiprocessing.shared_memory block. The process that creates the
+    slab writes segments in free slots, and passes SegmentDescriptors to worker processes, which attach to
+    the slab (see attach) and read the segments as np.ndarray views, without copying or pickling their
+    frames.
+
+    Slots are taken from, and released to, a deque of free slots kept by the creator process. A slot must
+    only be released after the workers finished reading it. The creator destroys the block when it is
+    closed and every slot was released, so workers can still attach to it while segments are in use. The
+    memory of the block is only freed once no view of it is left, so a view kept after its slot was
+    released, or after the slab was closed, is still safe to read.
+    """
+
+    def __init__(self, nr_slots, segment_frames, channels=1, dtype=np.float64):
+        """
+        Constructor for SharedSegmentSlab. Creates the shared memory block.
+
+        :param nr_slots: maximum number of segments in the slab at the same time
+        :param segment_frames: maximum number of frames of each segment
+        :param channels:
+        :param dtype: data type of the frames
+        """
+        if nr_slots <= 0 or segment_frames <= 0:
+            raise Exception(
+                "nr_slots and segment_frames must be higher than zero. {} and {} were given".format(
+                    nr_slots, segment_frames
+                )
+            )
+        dtype = np.dtype(dtype)
+        shared_memory_block = shared_memory.SharedMemory(
+            create=True, size=nr_slots * segment_frames * channels * dtype.itemsize
+        )
+        self._init_slab(
+            shared_memory_block, nr_slots, segment_frames, channels, dtype, True
+        )
+        self._free_slots = deque(range(nr_slots))
+
+    def __repr__(self):
+        class_name = type(self).__name__
+        return "{}(name = {}; slots = {}; segment frames = {}; channels = {};)".format(
+            class_name,
+            self._shared_memory.name,
+            self._nr_slots,
+            self._segment_frames,
+            self._channels,
+        )
+
+    @classmethod
+    def attach(cls, layout):
+        """
+        Attaches to a slab created by another process. The attached slab can only read and write slots;
+        it does not manage the free slots.
+
+        :param layout: SlabLayout, given by get_layout of the creator slab
+        :return: SharedSegmentSlab
+        """
+        try:
+            # Python >= 3.13: the creator process is the only one that unlinks the block
+            shared_memory_block = shared_memory.SharedMemory(
+                name=layout.name, track=False
+            )
+        except TypeError:
+            shared_memory_block = _attach_untracked_shared_memory(layout.name)
+
+        slab = cls.__new__(cls)
+        slab._init_slab(
+            shared_memory_block,
+            layout.nr_slots,
+            layout.segment_frames,
+            layout.channels,
+            np.dtype(layout.dtype),
+            False,
+        )
+        slab._free_slots = None
+        return slab
+
+    def _init_slab(
+        self, shared_memory_block, nr_slots, segment_frames, channels, dtype, is_owner
+    ):
+        self._shared_memory = shared_memory_block
+        self._nr_slots = nr_slots
+        self._segment_frames = segment_frames
+        self._channels = channels
+        self._dtype = dtype
+        self._is_owner = is_owner
+        self._is_closed = False
+        self._lock = threading.Lock()
+        self._slots = np.ndarray(
+            (nr_slots, segment_frames, channels),
+            dtype=dtype,
+            buffer=shared_memory_block.buf,
+        )
+
+    """
+    Getters
+    """
+
+    def get_layout(self):
+        return SlabLayout(
+            self._shared_memory.name,
+            self._nr_slots,
+            self._segment_frames,
+            self._channels,
+            self._dtype.str,
+        )
+
+    def get_nr_slots(self):
+        return self._nr_slots
+
+    def get_nr_free_slots(self):
+        return len(self._free_slots)
+
+    def get_nr_acquired_slots(self):
+        return self._nr_slots - len(self._free_slots)
+
+    def get_slot_array(self, slot, length=None, squeeze=True):
+        """
+        :param slot:
+        :param length: number of frames. If None, all the frames of the slot
+        :param squeeze: if True, and the slab has one channel, the view has shape (length,)
+        :return: view of the slot with shape (length, channels)
+        """
+        slot_array = self._slots[slot, :length]
+        if squeeze and self._channels == 1:
+            return slot_array[:, 0]
+        return slot_array
+
+    def get_descriptor_array(self, descriptor):
+        """
+        :param descriptor: SegmentDescriptor
+        :return: view of the frames of the segment. See get_slot_array
+        """
+        return self.get_slot_array(descriptor.slot, descriptor.length)
+
+    """
+    Workers
+    """
+
+    def acquire_slot(self):
+        """
+        :return: index of a free slot, which stops being free, or None if all slots are in use
+        """
+        with self._lock:
+            if self._is_closed:
+                raise Exception(
+                    "Slots can not be acquired from the closed slab {}".format(
+                        self._shared_memory.name
+                    )
+                )
+            try:
+                return self._free_slots.popleft()
+            except IndexError:
+                return None
+
+    def release_slot(self, slot):
+        """
+        Releases an acquired slot. If the slab was closed, and it was the last acquired slot, the shared
+        memory block is destroyed.
+        """
+        with self._lock:
+            self._free_slots.append(slot)
+            if self._is_closed and not self.get_nr_acquired_slots():
+                self._close_shared_memory()
+
+    def close(self):
+        """
+        Detaches from the shared memory block. The creator also destroys the block, but only once every
+        acquired slot is released, since workers may still attach to it to read their segments. Until then,
+        no slot can be acquired.
+        """
+        with self._lock:
+            if self._is_closed:
+                return
+            self._is_closed = True
+            if not self._is_owner or not self.get_nr_acquired_slots():
+                self._close_shared_memory()
+
+    def _close_shared_memory(self):
+        self._slots = None
+        if self._is_owner:
+            self._shared_memory.unlink()
+        # the views of the slots keep a reference to the mmap of the block, but SharedMemory.close (also
+        # called when it is collected) unmaps it at once, and reading a view afterwards crashes the process.
+        # So the mmap is detached before closing, and it is only unmapped when the last view is collected
+        self._shared_memory._mmap = None
+        self._shared_memory.close()
+
+
+def _attach_untracked_shared_memory(name):
+    """
+    Python < 3.13 registers attached blocks in the resource tracker too, which unlinks them when the process
+    exits, and warns about leaked blocks. Unregistering the block afterwards is not enough, since processes
+    started by multiprocessing share the resource tracker of the creator, which would lose the
+    registration of the creator. So the block is attached without registering it.
+    """
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
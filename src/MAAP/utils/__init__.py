@@ -1,4 +1,17 @@
-__all__ = ["audio_feature_2_tensor", "concat_audio_signals"]
+__all__ = [
+    "audio_feature_2_tensor",
+    "CallbackStatistics",
+    "concat_audio_signals",
+    "LatencyTracker",
+    "RingBuffer",
+    "SegmentQueue",
+    "SharedSegmentSlab",
+]
 
 from MAAP.utils.AudioFeature2Tensor import audio_feature_2_tensor
+from MAAP.utils.CallbackStatistics import CallbackStatistics
 from MAAP.utils.concat_audio_signal import concat_audio_signals
+from MAAP.utils.LatencyTracker import LatencyTracker
+from MAAP.utils.RingBuffer import RingBuffer
+from MAAP.utils.SegmentQueue import SegmentQueue
+from MAAP.utils.SharedSegmentSlab import SharedSegmentSlab
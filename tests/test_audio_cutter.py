@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from MAAP import AudioCutter, AudioSignal
+
+SAMPLE_RATE = 1000
+
+
+@pytest.fixture
+def cutter():
+    return AudioCutter(AudioSignal(np.arange(1000, dtype=float), SAMPLE_RATE))
+
+
+def test_frame_signal_with_hop(cutter):
+    frames = cutter.frame_signal(0.1, hop_duration=0.04)
+
+    assert frames.shape == (23, 100)
+    for index, frame in enumerate(frames):
+        np.testing.assert_array_equal(frame, cutter.y[index * 40 : index * 40 + 100])
+
+
+def test_frame_signal_is_a_read_only_view(cutter):
+    frames = cutter.frame_signal(0.1)
+
+    assert frames.shape == (10, 100)
+    assert np.shares_memory(frames, cutter.y)
+    assert not frames.flags.writeable
+
+
+def test_frame_signal_time_range_ignores_incomplete_segment(cutter):
+    frames = cutter.frame_signal(0.1, start_time=0.25, end_time=0.6)
+
+    assert frames.shape == (3, 100)
+    np.testing.assert_array_equal(frames.ravel(), cutter.y[250:550])
+
+
+def test_frame_signal_with_start_time_only(cutter):
+    frames = cutter.frame_signal(0.25, start_time=0.5)
+
+    assert frames.shape == (2, 250)
+    np.testing.assert_array_equal(frames.ravel(), cutter.y[500:])
+    assert len(list(cutter.iter_frames(0.25, start_time=0.5))) == 2
+
+
+def test_frame_signal_matches_slice_signal_in_multi(cutter):
+    frames = cutter.frame_signal(0.1)
+    audio_signals = cutter.slice_signal_in_multi(0.1)
+
+    np.testing.assert_array_equal(
+        frames, np.stack([audio_signal.y for audio_signal in audio_signals])
+    )
+
+
+def test_iter_frames_yields_audio_signals(cutter):
+    audio_signals = list(cutter.iter_frames(0.2, hop_duration=0.1))
+
+    assert len(audio_signals) == 9
+    assert all(
+        audio_signal.get_sample_rate() == SAMPLE_RATE for audio_signal in audio_signals
+    )
+    np.testing.assert_array_equal(audio_signals[-1].y, cutter.y[800:1000])
+
+
+def test_frame_signal_rejects_segments_shorter_than_one_sample(cutter):
+    with pytest.raises(Exception, match="higher than one sample"):
+        cutter.frame_signal(0.0001)
+
+
+@pytest.mark.parametrize(
+    "nr_frames, segment_frames, hop_frames, nr_segments",
+    [(99, 100, 50, 0), (100, 100, 50, 1), (249, 100, 50, 3), (250, 100, 50, 4)],
+)
+def test_compute_nr_segments(nr_frames, segment_frames, hop_frames, nr_segments):
+    assert (
+        AudioCutter.compute_nr_segments(nr_frames, segment_frames, hop_frames)
+        == nr_segments
+    )
+
+
+def test_frame_signal_keeps_channels():
+    y = np.stack([np.arange(1000.0), -np.arange(1000.0)], axis=1)
+    cutter = AudioCutter(AudioSignal(y, SAMPLE_RATE))
+
+    frames = cutter.frame_signal(0.1, hop_duration=0.05)
+
+    assert frames.shape == (19, 100, 2)
+    assert np.shares_memory(frames, y)
+    for index, frame in enumerate(frames):
+        np.testing.assert_array_equal(frame, y[index * 50 : index * 50 + 100])
+    assert [
+        audio_signal.get_nr_channels() for audio_signal in cutter.iter_frames(0.5)
+    ] == [2, 2]
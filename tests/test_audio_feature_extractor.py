@@ -0,0 +1,383 @@
+import librosa
+import numpy as np
+import pytest
+import soundfile as sf
+
+from MAAP import AudioCutter, AudioFeatureExtractor, AudioSignal
+from MAAP.AudioFeatureExtractor import (
+    _make_picklable_error,
+    compute_feature_requirements_dict,
+    compute_intermediate_functions_dict,
+    compute_intermediate_requirements_dict,
+)
+
+SAMPLE_RATE = 8000
+FEATURES_FUNC_ARGS = {
+    "mfcc_func_args": {"n_mfcc": 13, "pooling": "mean"},
+    "rms_func_args": {"pooling": "max"},
+    "spectral_centroid_func_args": {"pooling": "mean"},
+    "zero_cross_rate_func_args": {"pooling": "sum"},
+}
+
+
+@pytest.fixture
+def audio_signal():
+    rng = np.random.default_rng(0)
+    t = np.arange(4 * SAMPLE_RATE) / SAMPLE_RATE
+    y = np.sin(2 * np.pi * (200 + 100 * t) * t) + 0.1 * rng.standard_normal(len(t))
+    return AudioSignal(y, SAMPLE_RATE)
+
+
+@pytest.fixture
+def extractor():
+    extractor = AudioFeatureExtractor()
+    extractor.config(
+        ("mfcc", "rms", "spectral_centroid", "zero_cross_rate"), **FEATURES_FUNC_ARGS
+    )
+    return extractor
+
+
+def compute_segment_features(extractor, segment):
+    extractor.load_audio_signal(AudioSignal(segment, SAMPLE_RATE))
+    features = extractor.compute_features_by_config()
+    return np.concatenate(
+        [np.atleast_1d(features[feature_name]) for feature_name in sorted(features)]
+    )
+
+
+def test_compute_features_batch_matches_segment_by_segment(audio_signal, extractor):
+    segments = AudioCutter(audio_signal).frame_signal(0.5, hop_duration=0.25)
+
+    extractor.load_audio_batch(segments, SAMPLE_RATE)
+    features_batch = extractor.compute_features_batch()
+
+    assert features_batch.shape == (len(segments), 13 + 3)
+    assert extractor.get_features_batch_columns() == [
+        "mfcc_{}".format(i) for i in range(1, 14)
+    ] + ["rms", "spectral_centroid", "zero_cross_rate"]
+    for segment, segment_features in zip(segments, features_batch):
+        np.testing.assert_allclose(
+            segment_features, compute_segment_features(extractor, segment), rtol=1e-6
+        )
+
+
+def test_compute_features_batch_requires_pooling(audio_signal):
+    extractor = AudioFeatureExtractor()
+    extractor.config(("rms",), rms_func_args={})
+    extractor.load_audio_batch(AudioCutter(audio_signal).frame_signal(0.5), SAMPLE_RATE)
+
+    with pytest.raises(Exception, match="pooling strategy"):
+        extractor.compute_features_batch()
+
+
+def test_load_audio_batch_rejects_1d_arrays(audio_signal):
+    with pytest.raises(Exception, match="2-dimensions"):
+        AudioFeatureExtractor().load_audio_batch(audio_signal.y, SAMPLE_RATE)
+
+
+def test_compute_features_by_texture_windows_pools_full_signal_frames(
+    audio_signal, extractor
+):
+    extractor.load_audio_signal(audio_signal)
+    features_windows = extractor.compute_features_by_texture_windows(0.5, 0.25)
+
+    mfcc = extractor.compute_feature_mfcc(n_mfcc=13)
+    rms = extractor.compute_feature_rms()
+    spectral_centroid = extractor.compute_feature_spectral_centroid()
+    zero_cross_rate = extractor.compute_feature_zero_cross_rate()
+    assert features_windows.shape == (15, 13 + 3)
+    for index, window_features in enumerate(features_windows):
+        # frames whose center, at frame * hop length, is inside the segment
+        start = index * 2000
+        first, last = -(-start // 512), -(-(start + 4000) // 512)
+        np.testing.assert_allclose(
+            window_features,
+            np.concatenate(
+                [
+                    mfcc[:, first:last].mean(axis=-1),
+                    [rms[first:last].max()],
+                    [spectral_centroid[first:last].mean()],
+                    [zero_cross_rate[first:last].sum()],
+                ]
+            ),
+        )
+
+
+def test_compute_features_by_texture_windows_ignores_incomplete_segment(
+    audio_signal, extractor
+):
+    extractor.load_audio_signal(audio_signal)
+
+    assert len(extractor.compute_features_by_texture_windows(1.5)) == 2
+
+
+@pytest.fixture
+def stereo_signal(audio_signal):
+    return AudioSignal(
+        np.stack([audio_signal.y, audio_signal.y[::-1]], axis=1), SAMPLE_RATE
+    )
+
+
+def compute_channels_features(extractor, stereo_signal):
+    channels_features = list()
+    for channel in range(2):
+        extractor.load_audio_signal(
+            AudioSignal(stereo_signal.y[:, channel], SAMPLE_RATE)
+        )
+        channels_features.append(dict(extractor.compute_features_by_config()))
+    return channels_features
+
+
+@pytest.mark.parametrize(
+    "output_format", ["dict_key_per_feature", "dict_key_per_feature_dim"]
+)
+def test_multi_channel_signal_features_per_channel(stereo_signal, output_format):
+    extractor = AudioFeatureExtractor()
+    extractor.config(
+        ("mfcc", "rms", "spectral_centroid", "zero_cross_rate"),
+        output_format=output_format,
+        **FEATURES_FUNC_ARGS
+    )
+    channels_features = compute_channels_features(extractor, stereo_signal)
+
+    extractor.load_audio_signal(stereo_signal)
+    features = extractor.compute_features_by_config()
+
+    assert list(features) == list(channels_features[0])
+    for feature_name, values in features.items():
+        assert len(values) == 2
+        for channel in range(2):
+            np.testing.assert_allclose(
+                values[channel], channels_features[channel][feature_name], rtol=1e-6
+            )
+
+
+def test_load_audio_file_keeps_channels(tmp_path, stereo_signal, extractor):
+    file_path = str(tmp_path / "stereo.wav")
+    sf.write(file_path, stereo_signal.y, SAMPLE_RATE, subtype="DOUBLE")
+    channels_features = compute_channels_features(extractor, stereo_signal)
+
+    extractor.load_audio_file(file_path)
+    features = extractor.compute_features_by_config()
+
+    assert extractor.y.shape == (2, len(stereo_signal.y))
+    for channel in range(2):
+        np.testing.assert_allclose(
+            features["mfcc"][channel], channels_features[channel]["mfcc"], rtol=1e-6
+        )
+
+
+def test_texture_windows_reject_multi_channel_signals(stereo_signal, extractor):
+    extractor.load_audio_signal(stereo_signal)
+
+    with pytest.raises(Exception, match="mono signals"):
+        extractor.compute_features_by_texture_windows(0.5)
+
+
+def count_calls(monkeypatch, module, function_name):
+    calls = list()
+    function = getattr(module, function_name)
+
+    def counted_function(*args, **kwargs):
+        calls.append(function_name)
+        return function(*args, **kwargs)
+
+    monkeypatch.setattr(module, function_name, counted_function)
+    return calls
+
+
+def test_features_match_librosa(audio_signal):
+    y = audio_signal.y
+    extractor = AudioFeatureExtractor()
+    extractor.load_audio_signal(audio_signal)
+
+    np.testing.assert_allclose(
+        extractor.compute_feature_mfcc(n_mfcc=13),
+        librosa.feature.mfcc(y=y, sr=SAMPLE_RATE, n_mfcc=13),
+        rtol=1e-5,
+        atol=1e-5,
+    )
+    np.testing.assert_allclose(
+        extractor.compute_feature_spectral_centroid(),
+        librosa.feature.spectral_centroid(y=y)[0],
+    )
+    np.testing.assert_allclose(
+        extractor.compute_feature_spectral_rolloff(),
+        librosa.feature.spectral_rolloff(y=y, sr=SAMPLE_RATE)[0],
+    )
+    np.testing.assert_allclose(
+        extractor.compute_spectrogram_magnitude(),
+        librosa.amplitude_to_db(np.abs(librosa.stft(y))),
+    )
+    np.testing.assert_allclose(
+        extractor.compute_feature_rms(), librosa.feature.rms(y=y)[0]
+    )
+    np.testing.assert_allclose(
+        extractor.compute_feature_zero_cross_rate(),
+        librosa.feature.zero_crossing_rate(y)[0],
+    )
+
+
+def test_intermediates_are_computed_once_for_all_features(monkeypatch, audio_signal):
+    stft_calls = count_calls(monkeypatch, librosa, "stft")
+    mel_calls = count_calls(monkeypatch, librosa.feature, "melspectrogram")
+    extractor = AudioFeatureExtractor()
+    extractor.config(
+        ("mfcc", "spectral_centroid", "spectral_rolloff", "spectrogram_magnitude"),
+        mfcc_func_args={"n_mfcc": 13},
+        spectral_centroid_func_args={},
+        spectral_rolloff_func_args={},
+        spectrogram_magnitude_func_args={},
+    )
+    extractor.load_audio_signal(audio_signal)
+
+    extractor.compute_features_by_config()
+    extractor.compute_features_by_config()
+
+    assert stft_calls == ["stft"]
+    assert mel_calls == ["melspectrogram"]
+
+
+def test_loading_a_signal_resets_the_intermediates(monkeypatch, audio_signal):
+    stft_calls = count_calls(monkeypatch, librosa, "stft")
+    other_signal = AudioSignal(audio_signal.y[::-1].copy(), SAMPLE_RATE)
+    extractor = AudioFeatureExtractor()
+
+    extractor.load_audio_signal(audio_signal)
+    extractor.get_intermediate("stft_magnitude")
+    extractor.load_audio_signal(other_signal)
+    stft_magnitude = extractor.get_intermediate("stft_magnitude")
+
+    assert stft_calls == ["stft", "stft"]
+    np.testing.assert_allclose(stft_magnitude, np.abs(librosa.stft(other_signal.y)))
+
+
+def test_parametrized_intermediates_are_cached_by_arguments(audio_signal):
+    extractor = AudioFeatureExtractor()
+    extractor.load_audio_signal(audio_signal)
+
+    mel_spectrogram = extractor.get_intermediate("mel_spectrogram", n_mels=40)
+
+    assert mel_spectrogram.shape[0] == 40
+    assert extractor.get_intermediate("mel_spectrogram", n_mels=40) is mel_spectrogram
+    assert extractor.get_intermediate("mel_spectrogram").shape[0] == 128
+
+
+def test_execution_plan_of_time_domain_features_is_empty():
+    assert (
+        AudioFeatureExtractor.compile_execution_plan(["zero_cross_rate", "rms"]) == []
+    )
+
+
+def test_execution_plan_is_in_dependency_order():
+    assert AudioFeatureExtractor.compile_execution_plan(["mfcc"]) == [
+        ("stft_magnitude", ()),
+        ("power_spectrum", ()),
+        ("mel_spectrogram", (("n_mels", 128),)),
+    ]
+    # shared intermediates are planned once
+    assert AudioFeatureExtractor.compile_execution_plan(
+        ["spectral_centroid", "mfcc", "spectral_rolloff"]
+    ) == [
+        ("stft_magnitude", ()),
+        ("power_spectrum", ()),
+        ("mel_spectrogram", (("n_mels", 128),)),
+    ]
+
+
+def test_execution_plan_of_unknown_intermediate(monkeypatch):
+    monkeypatch.setitem(compute_feature_requirements_dict, "fake", (("missing", ()),))
+
+    with pytest.raises(Exception, match="Intermediate 'missing' does not exist"):
+        AudioFeatureExtractor.compile_execution_plan(["fake"])
+
+
+def test_execution_plan_of_circular_dependency(monkeypatch):
+    for name, requirement in (("first", "second"), ("second", "first")):
+        monkeypatch.setitem(compute_intermediate_functions_dict, name, None)
+        monkeypatch.setitem(
+            compute_intermediate_requirements_dict, name, ((requirement, ()),)
+        )
+    monkeypatch.setitem(compute_feature_requirements_dict, "fake", (("first", ()),))
+
+    with pytest.raises(Exception, match="has a circular dependency"):
+        AudioFeatureExtractor.compile_execution_plan(["fake"])
+
+
+@pytest.fixture
+def audio_files(tmp_path, audio_signal):
+    """
+    Files of different durations, the longest in the middle
+    """
+    file_paths = list()
+    for index, duration in enumerate((1, 3, 2)):
+        file_path = str(tmp_path / "{}.wav".format(index))
+        sf.write(
+            file_path, audio_signal.y[: duration * SAMPLE_RATE], SAMPLE_RATE, "DOUBLE"
+        )
+        file_paths.append(file_path)
+    return file_paths
+
+
+def test_extract_many_in_input_order(audio_files, extractor):
+    results = extractor.extract_many(audio_files, workers=2)
+
+    assert [result.file_path for result in results] == audio_files
+    for result in results:
+        assert result.error is None
+        extractor.load_audio_file(result.file_path)
+        expected_features = extractor.compute_features_by_config()
+        for feature_name, values in expected_features.items():
+            np.testing.assert_allclose(result.features[feature_name], values)
+
+
+def test_extract_many_unordered_starts_with_the_largest_files(audio_files, extractor):
+    results = extractor.extract_many(audio_files, workers=1, ordered=False)
+
+    assert not isinstance(results, list)
+    # with one process, results are computed in the order the files were scheduled
+    assert [result.file_path for result in results] == [
+        audio_files[1],
+        audio_files[2],
+        audio_files[0],
+    ]
+
+
+def test_extract_many_failing_files_do_not_stop_the_others(
+    tmp_path, audio_files, extractor
+):
+    junk_file_path = str(tmp_path / "junk.wav")
+    with open(junk_file_path, "wb") as junk_file:
+        junk_file.write(b"not audio")
+    file_paths = [audio_files[0], junk_file_path, str(tmp_path / "missing.wav")]
+
+    results = extractor.extract_many(file_paths, workers=2)
+
+    assert results[0].error is None and results[0].features is not None
+    for result in results[1:]:
+        assert result.features is None
+        # the error keeps its original type
+        assert isinstance(result.error, sf.LibsndfileError)
+        assert result.file_path in str(result.error)
+
+
+def test_extract_many_without_config_computes_all_features(audio_files):
+    results = AudioFeatureExtractor().extract_many(audio_files[:1], workers=1)
+
+    assert results[0].error is None
+    assert "spectral_rolloff" in results[0].features
+
+
+class UnpicklableError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+def test_errors_that_can_not_be_unpickled_keep_their_type_name():
+    error = _make_picklable_error(UnpicklableError(3, "broken file"))
+
+    assert type(error) is Exception
+    assert str(error) == "UnpicklableError: broken file"
+    original_error = ValueError("bad value")
+    assert _make_picklable_error(original_error) is original_error
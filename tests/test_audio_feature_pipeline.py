@@ -0,0 +1,143 @@
+import threading
+
+import numpy as np
+import pytest
+
+from MAAP import (
+    AudioFeatureExtractor,
+    AudioFeaturePipeline,
+    AudioReceiver,
+    AudioSignal,
+    VirtualInputDevice,
+)
+from MAAP.utils import SharedSegmentSlab
+
+SAMPLE_RATE = 8000
+
+
+@pytest.fixture
+def virtual_device():
+    return VirtualInputDevice.from_synthetic(2, SAMPLE_RATE, speed=20, seed=0)
+
+
+@pytest.fixture
+def receiver(virtual_device):
+    receiver = AudioReceiver(virtual_device=virtual_device)
+    receiver.config_capture(segments_duration=0.25, blocksize=400)
+    yield receiver
+    receiver.close()
+
+
+@pytest.fixture
+def extractor():
+    extractor = AudioFeatureExtractor()
+    extractor.config(
+        ("rms", "zero_cross_rate"),
+        rms_func_args={"pooling": "mean"},
+        zero_cross_rate_func_args={"pooling": "mean"},
+    )
+    return extractor
+
+
+def run_with_timeout(function, timeout=10):
+    """
+    Runs function in a thread, failing if it does not return before timeout
+    """
+    outcome = dict()
+
+    def target():
+        try:
+            outcome["result"] = function()
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "{} did not return".format(function.__name__)
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
+
+
+def test_results_in_capture_order(receiver, extractor):
+    pipeline = AudioFeaturePipeline(receiver, extractor, workers=2)
+    with pipeline:
+        with receiver:
+            results = [
+                pipeline.get_result_from_output_queue(timeout=10) for _ in range(8)
+            ]
+
+    assert [result.index for result in results] == list(range(8))
+    assert all(result.error is None for result in results)
+    assert all(result.latency >= result.processing_time > 0 for result in results)
+    capture_start_times = [result.capture_start_time for result in results]
+    assert capture_start_times == sorted(capture_start_times)
+    assert receiver.get_latency_statistics()["end_to_end"]["count"] == 8
+
+
+def test_features_match_direct_extraction(virtual_device, receiver, extractor):
+    y = virtual_device.get_data()[:, 0]
+    pipeline = AudioFeaturePipeline(receiver, extractor, workers=1)
+    with pipeline:
+        with receiver:
+            results = [
+                pipeline.get_result_from_output_queue(timeout=10) for _ in range(8)
+            ]
+
+    for index, result in enumerate(results):
+        extractor.load_audio_signal(
+            AudioSignal(y[index * 2000 : (index + 1) * 2000].astype(float), SAMPLE_RATE)
+        )
+        features = extractor.compute_features_by_config()
+        for feature_name in ("rms", "zero_cross_rate"):
+            np.testing.assert_allclose(
+                result.features[feature_name], features[feature_name], rtol=1e-6
+            )
+
+
+def test_stop_before_start_does_nothing(receiver, extractor):
+    pipeline = AudioFeaturePipeline(receiver, extractor, workers=1)
+
+    pipeline.stop()
+
+    assert not pipeline.is_running()
+
+
+def test_submit_error_stops_pipeline_and_is_raised(receiver, extractor, monkeypatch):
+    def broken_submit(worker_pool, audio_signal):
+        raise RuntimeError("broken worker pool")
+
+    monkeypatch.setattr(AudioFeatureExtractor, "submit_audio_signal", broken_submit)
+    pipeline = AudioFeaturePipeline(receiver, extractor, workers=1)
+    pipeline.start()
+    receiver.start()
+
+    with pytest.raises(Exception, match="broken worker pool"):
+        run_with_timeout(pipeline.get_result_from_output_queue)
+    assert not pipeline.is_running()
+    with pytest.raises(Exception, match="broken worker pool"):
+        run_with_timeout(pipeline.stop)
+    receiver.stop()
+
+
+def test_workers_read_segments_from_shared_memory(virtual_device, extractor):
+    receiver = AudioReceiver(virtual_device=virtual_device)
+    receiver.config_capture(
+        segments_duration=0.25, blocksize=400, shared_memory_slots=8
+    )
+    pipeline = AudioFeaturePipeline(receiver, extractor, workers=2)
+    with pipeline:
+        with receiver:
+            results = [
+                pipeline.get_result_from_output_queue(timeout=10) for _ in range(6)
+            ]
+    slab = receiver.get_shared_segment_slab()
+    receiver.close()
+
+    assert [result.index for result in results] == list(range(6))
+    assert all(result.error is None for result in results)
+    assert all(result.features["rms"] > 0 for result in results)
+    # every slot was released, so closing the receiver destroyed the slab
+    with pytest.raises(FileNotFoundError):
+        SharedSegmentSlab.attach(slab.get_layout())
@@ -0,0 +1,248 @@
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from MAAP import AudioReader
+
+SAMPLE_RATE = 8000
+
+
+def write_wav(path, y, sample_rate=SAMPLE_RATE, subtype="DOUBLE"):
+    sf.write(str(path), y, sample_rate, subtype=subtype)
+    return str(path)
+
+
+@pytest.fixture
+def two_files(tmp_path):
+    rng = np.random.default_rng(0)
+    y1 = rng.uniform(-0.5, 0.5, 1000)
+    y2 = rng.uniform(-0.5, 0.5, 700)
+    paths = [
+        write_wav(tmp_path / "1.wav", y1),
+        write_wav(tmp_path / "2.wav", y2),
+    ]
+    return paths, np.concatenate([y1, y2])
+
+
+def test_iter_blocks_spans_files(two_files):
+    paths, y = two_files
+    blocks = list(AudioReader(paths).iter_blocks(300 / SAMPLE_RATE))
+
+    assert [len(block.y) for block in blocks] == [300] * 5 + [200]
+    np.testing.assert_array_equal(np.concatenate([block.y for block in blocks]), y)
+
+
+def test_iter_blocks_overlap(two_files):
+    paths, y = two_files
+    blocks = list(AudioReader(paths).iter_blocks(400 / SAMPLE_RATE, 100 / SAMPLE_RATE))
+
+    for index, block in enumerate(blocks):
+        start = index * 300
+        np.testing.assert_array_equal(block.y, y[start : start + 400])
+    assert index * 300 + len(blocks[-1].y) == len(y)
+
+
+def test_iter_blocks_yields_independent_blocks(two_files):
+    paths, _ = two_files
+    blocks = list(AudioReader(paths).iter_blocks(300 / SAMPLE_RATE))
+
+    assert not any(
+        np.shares_memory(block_a.y, block_b.y)
+        for block_a, block_b in zip(blocks, blocks[1:])
+    )
+
+
+def test_iter_blocks_rejects_different_sample_rates(tmp_path):
+    paths = [
+        write_wav(tmp_path / "1.wav", np.zeros(100)),
+        write_wav(tmp_path / "2.wav", np.zeros(100), sample_rate=16000),
+    ]
+    with pytest.raises(Exception, match="sample rates"):
+        list(AudioReader(paths).iter_blocks(0.001))
+
+
+@pytest.mark.parametrize("overlap_duration", [-0.001, 0.01])
+def test_iter_blocks_rejects_invalid_overlap(two_files, overlap_duration):
+    paths, _ = two_files
+    with pytest.raises(Exception, match="overlap_duration"):
+        list(AudioReader(paths).iter_blocks(0.01, overlap_duration))
+
+
+@pytest.mark.parametrize(
+    "subtype, dtype", [("PCM_16", np.int16), ("FLOAT", np.float32)]
+)
+def test_read_memmap_maps_data_chunk(tmp_path, subtype, dtype):
+    y = np.linspace(-0.5, 0.5, 500)
+    path = write_wav(tmp_path / "1.wav", y, subtype=subtype)
+
+    audio_signal = AudioReader().read_memmap(path)
+
+    assert isinstance(audio_signal.y, np.memmap)
+    assert audio_signal.y.dtype == dtype
+    assert audio_signal.get_sample_rate() == SAMPLE_RATE
+    np.testing.assert_array_equal(audio_signal.y, sf.read(path, dtype=dtype)[0])
+
+
+def test_read_memmap_keeps_channels(tmp_path):
+    y = np.stack([np.linspace(-0.5, 0.5, 500), np.linspace(0.5, -0.5, 500)], axis=1)
+    path = write_wav(tmp_path / "1.wav", y, subtype="FLOAT")
+
+    audio_signal = AudioReader().read_memmap(path)
+
+    assert audio_signal.y.shape == (500, 2)
+    np.testing.assert_allclose(audio_signal.y, y, atol=1e-7)
+
+
+def test_read_memmap_rejects_compressed_files(tmp_path):
+    path = str(tmp_path / "1.wav")
+    sf.write(path, np.zeros(500), SAMPLE_RATE, subtype="IMA_ADPCM")
+    with pytest.raises(Exception, match="can not be memory-mapped"):
+        AudioReader().read_memmap(path)
+
+
+def test_read_time_range_seeks_into_files(two_files):
+    paths, y = two_files
+    audio_signal = AudioReader(paths).read(
+        start_time=900 / SAMPLE_RATE, end_time=1200 / SAMPLE_RATE
+    )
+
+    np.testing.assert_array_equal(audio_signal.y, y[900:1200])
+
+
+def test_read_end_time_is_clipped_to_duration(two_files):
+    paths, y = two_files
+    audio_signal = AudioReader(paths).read(start_time=1500 / SAMPLE_RATE, end_time=10)
+
+    np.testing.assert_array_equal(audio_signal.y, y[1500:])
+
+
+def test_read_ranges(two_files):
+    paths, y = two_files
+    audio_signals = AudioReader(paths).read_ranges(
+        [
+            (None, 100 / SAMPLE_RATE),
+            (950 / SAMPLE_RATE, 1050 / SAMPLE_RATE),
+            (1600 / SAMPLE_RATE, None),
+        ]
+    )
+
+    assert len(audio_signals) == 3
+    np.testing.assert_array_equal(audio_signals[0].y, y[:100])
+    np.testing.assert_array_equal(audio_signals[1].y, y[950:1050])
+    np.testing.assert_array_equal(audio_signals[2].y, y[1600:])
+
+
+@pytest.mark.parametrize(
+    "start_time, end_time, message",
+    [
+        (-0.01, None, "start_time must be positive"),
+        (1, None, "start_time must be positive"),
+        (0.1, 0.05, "lower than end_time"),
+    ],
+)
+def test_read_rejects_invalid_time_range(two_files, start_time, end_time, message):
+    paths, _ = two_files
+    with pytest.raises(Exception, match=message):
+        AudioReader(paths).read(start_time=start_time, end_time=end_time)
+
+
+def test_info_searches_directories(tmp_path):
+    (tmp_path / "sub").mkdir()
+    write_wav(tmp_path / "1.wav", np.zeros(800))
+    write_wav(tmp_path / "sub" / "2.wav", np.zeros((400, 2)), sample_rate=16000)
+    (tmp_path / "notes.txt").write_text("not audio")
+
+    files_info = AudioReader.info(str(tmp_path))
+
+    assert [os.path.basename(info.file_path) for info in files_info] == [
+        "1.wav",
+        "2.wav",
+    ]
+    assert files_info[0][1:4] == (SAMPLE_RATE, 1, 800)
+    assert files_info[1][1:4] == (16000, 2, 400)
+    assert files_info[1].duration == 0.025
+
+
+def test_info_index_reuses_unchanged_files(tmp_path, monkeypatch):
+    path = write_wav(tmp_path / "1.wav", np.zeros(800))
+    index_path = str(tmp_path / "index.csv")
+    files_info = AudioReader.info(path, index_path=index_path)
+
+    def fail_info(file_path):
+        raise AssertionError("{} was read again".format(file_path))
+
+    monkeypatch.setattr(sf, "info", fail_info)
+
+    assert AudioReader.info(path, index_path=index_path) == files_info
+    assert AudioReader.load_index(index_path) == {path: files_info[0]}
+
+
+def test_info_bad_files_do_not_stop_the_others(tmp_path):
+    path = write_wav(tmp_path / "a.wav", np.zeros(800))
+    (tmp_path / "b.wav").write_bytes(b"not a wav file")
+    index_path = str(tmp_path / "index.csv")
+
+    files_info = AudioReader.info(str(tmp_path), index_path=index_path)
+
+    assert [os.path.basename(info.file_path) for info in files_info] == [
+        "a.wav",
+        "b.wav",
+    ]
+    assert files_info[0].error is None and files_info[0].frames == 800
+    assert isinstance(files_info[1].error, sf.LibsndfileError)
+    assert files_info[1].frames is None
+    assert AudioReader.load_index(index_path) == {path: files_info[0]}
+
+
+def test_info_missing_file(tmp_path):
+    path = str(tmp_path / "missing.wav")
+
+    (file_info,) = AudioReader.info(path)
+
+    assert file_info.file_path == path
+    assert isinstance(file_info.error, FileNotFoundError)
+
+
+def test_read_decodes_files_in_order(two_files):
+    paths, y = two_files
+    audio_signal = AudioReader(paths, workers=2).read()
+
+    assert audio_signal.get_sample_rate() == SAMPLE_RATE
+    np.testing.assert_array_equal(audio_signal.y, y)
+
+
+def test_read_keeps_channels(tmp_path):
+    y = np.random.default_rng(0).uniform(-0.5, 0.5, (300, 2))
+    paths = [
+        write_wav(tmp_path / "1.wav", y[:100]),
+        write_wav(tmp_path / "2.wav", y[100:]),
+    ]
+
+    np.testing.assert_array_equal(AudioReader(paths).read().y, y)
+
+
+def test_read_empty_file(tmp_path):
+    path = write_wav(tmp_path / "1.wav", np.zeros(0))
+
+    audio_signal = AudioReader(path).read()
+
+    assert audio_signal.y.shape == (0,)
+    assert audio_signal.get_duration() == 0
+    with pytest.raises(Exception, match="no frames"):
+        AudioReader(path).read(start_time=0.1)
+
+
+def test_read_rejects_different_channels(tmp_path):
+    paths = [
+        write_wav(tmp_path / "1.wav", np.zeros(100)),
+        write_wav(tmp_path / "2.wav", np.zeros((100, 2))),
+    ]
+    with pytest.raises(Exception, match="number of channels"):
+        AudioReader(paths).read()
+
+
+def test_read_raises_original_errors(tmp_path):
+    with pytest.raises(sf.LibsndfileError):
+        AudioReader(str(tmp_path / "missing.wav")).read()
@@ -0,0 +1,436 @@
+import asyncio
+import io
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from MAAP import AudioReceiver, VirtualInputDevice
+from MAAP.utils import SharedSegmentSlab
+
+SAMPLE_RATE = 8000
+SPEED = 50
+
+
+def make_receiver(y, speed=SPEED, channels=1, **config_capture_kwargs):
+    receiver = AudioReceiver(
+        channels=channels,
+        virtual_device=VirtualInputDevice(y, sample_rate=SAMPLE_RATE, speed=speed),
+    )
+    receiver.config_capture(**config_capture_kwargs)
+    assert receiver.is_configured()
+    return receiver
+
+
+def capture_segments(receiver, timeout=10):
+    """
+    Replays the whole virtual device, and returns the segments of the output queue
+    """
+    receiver.start()
+    deadline = time.monotonic() + timeout
+    while receiver.is_capturing():
+        assert time.monotonic() < deadline, "the capture did not finish"
+        time.sleep(0.005)
+    receiver.stop()
+
+    segments = list()
+    while receiver.output_queue_has_samples():
+        segments.append(receiver.get_sample_from_output_queue())
+    return segments
+
+
+@pytest.fixture
+def ramp():
+    # integer values are exact in the float32 blocks of the stream
+    return np.arange(2 * SAMPLE_RATE, dtype=float)
+
+
+def test_back_to_back_segments(ramp):
+    receiver = make_receiver(ramp, segments_duration=0.25, blocksize=300)
+    segments = capture_segments(receiver)
+
+    assert len(segments) == 8
+    for index, segment in enumerate(segments):
+        assert segment.y.shape == (2000,)
+        np.testing.assert_array_equal(
+            segment.y, ramp[index * 2000 : (index + 1) * 2000]
+        )
+    receiver.close()
+
+
+def test_overlapping_segments(ramp):
+    receiver = make_receiver(
+        ramp, segments_duration=0.25, segments_hop=0.1, blocksize=300
+    )
+    segments = capture_segments(receiver)
+
+    assert len(segments) == 1 + (len(ramp) - 2000) // 800
+    for index, segment in enumerate(segments):
+        np.testing.assert_array_equal(segment.y, ramp[index * 800 : index * 800 + 2000])
+    receiver.close()
+
+
+def test_segments_with_gaps(ramp):
+    receiver = make_receiver(
+        ramp, segments_duration=0.1, segments_hop=0.25, blocksize=300
+    )
+    segments = capture_segments(receiver)
+
+    assert len(segments) == 8
+    for index, segment in enumerate(segments):
+        np.testing.assert_array_equal(
+            segment.y, ramp[index * 2000 : index * 2000 + 800]
+        )
+    receiver.close()
+
+
+def test_buffer_must_hold_a_segment_and_a_block(ramp):
+    receiver = AudioReceiver(
+        virtual_device=VirtualInputDevice(ramp, sample_rate=SAMPLE_RATE)
+    )
+    receiver.config_capture(segments_duration=1, buffer_duration=1, blocksize=512)
+
+    assert not receiver.is_configured()
+
+
+def test_full_output_queue_drops_oldest_segments(ramp):
+    receiver = make_receiver(
+        ramp,
+        segments_duration=0.25,
+        blocksize=300,
+        queue_size=3,
+        queue_policy="drop_oldest",
+    )
+    segments = capture_segments(receiver)
+
+    assert receiver.get_nr_dropped_segments() == 5
+    assert receiver.get_callback_statistics()["dropped_segments"] == 5
+    for index, segment in zip(range(5, 8), segments):
+        np.testing.assert_array_equal(
+            segment.y, ramp[index * 2000 : (index + 1) * 2000]
+        )
+    receiver.close()
+
+
+def test_stop_while_the_blocking_output_queue_is_full(ramp):
+    receiver = make_receiver(
+        ramp, segments_duration=0.1, blocksize=300, queue_size=2, queue_policy="block"
+    )
+    receiver.start()
+    time.sleep(0.5)
+    # the callback waits for a free slot of the queue, so stop must not wait for it
+    stop_thread = threading.Thread(target=receiver.stop, daemon=True)
+    stop_thread.start()
+    stop_thread.join(10)
+
+    assert not stop_thread.is_alive(), "stop is blocked by the full output queue"
+    assert receiver.get_nr_dropped_segments() >= 1
+    for index in range(2):
+        np.testing.assert_array_equal(
+            receiver.get_sample_from_output_queue().y,
+            ramp[index * 800 : (index + 1) * 800],
+        )
+    assert not receiver.output_queue_has_samples()
+    receiver.close()
+
+
+def test_async_iterator_yields_segments_until_capture_stops(ramp):
+    receiver = make_receiver(ramp, segments_duration=0.25, blocksize=300)
+
+    async def consume():
+        segments = list()
+        async with receiver:
+            async for segment in receiver:
+                segments.append(segment)
+        return segments
+
+    segments = asyncio.run(asyncio.wait_for(consume(), timeout=10))
+
+    assert len(segments) == 8
+    assert all(segment.get_dequeue_time() is not None for segment in segments)
+    np.testing.assert_array_equal(
+        np.concatenate([segment.y for segment in segments]), ramp
+    )
+    receiver.close()
+
+
+def test_async_iteration_can_stop_early_with_a_full_queue(ramp):
+    receiver = make_receiver(
+        ramp, segments_duration=0.1, blocksize=300, queue_size=2, queue_policy="block"
+    )
+
+    async def consume_one():
+        async with receiver:
+            async for segment in receiver:
+                # the queue gets full while the event loop is busy with the segment
+                await asyncio.sleep(0.5)
+                break
+        return segment
+
+    segment = asyncio.run(asyncio.wait_for(consume_one(), timeout=10))
+
+    np.testing.assert_array_equal(segment.y, ramp[:800])
+    assert not receiver.is_capturing()
+    receiver.close()
+
+
+@pytest.mark.parametrize("speed", [1, 4])
+def test_latencies_follow_the_replay_speed(speed):
+    y = np.zeros(SAMPLE_RATE)
+    receiver = make_receiver(y, speed=speed, segments_duration=0.1, blocksize=200)
+    segments = capture_segments(receiver)
+
+    for segment in segments:
+        receiver.mark_segment_finished(segment)
+        assert segment.get_capture_end_time() - segment.get_capture_start_time() == (
+            pytest.approx(0.1 / speed)
+        )
+    statistics = receiver.get_latency_statistics()
+    assert statistics["end_to_end"]["count"] == 10
+    # segments are emitted as soon as the block with their last frame is received
+    assert 0 <= statistics["emission"]["max"] < 0.05
+    assert all(
+        latency >= 0
+        for latency in receiver.get_latency_tracker().get_latencies("end_to_end")
+    )
+    receiver.close()
+
+
+def test_callback_statistics(ramp):
+    receiver = make_receiver(ramp, segments_duration=0.25, blocksize=400)
+    segments = capture_segments(receiver)
+
+    statistics = receiver.get_callback_statistics()
+    assert statistics["blocks"] == 40
+    assert statistics["frames"] == len(ramp)
+    assert statistics["queue_depth"] == 0
+    assert statistics["dropped_segments"] == 0
+    assert statistics["overwritten_frames"] == 0
+    assert (
+        statistics["callback_duration_max"] >= statistics["callback_duration_mean"] > 0
+    )
+    assert receiver.get_callback_duration_histogram()[0].sum() == 40
+    assert len(segments) == 8
+    receiver.close()
+
+
+def test_statistics_dump(ramp):
+    dump_file = io.StringIO()
+    receiver = make_receiver(
+        ramp,
+        speed=2,
+        segments_duration=0.25,
+        statistics_dump_interval=0.1,
+        statistics_dump_file=dump_file,
+    )
+    capture_segments(receiver)
+
+    lines = dump_file.getvalue().splitlines()
+    assert len(lines) >= 3
+    assert all(
+        line.startswith("AudioReceiver callback statistics: {") for line in lines
+    )
+    receiver.close()
+
+
+def test_devices_are_captured_in_the_columns_of_the_segments(ramp):
+    stereo = np.stack([ramp, -ramp, np.ones(len(ramp))], axis=1)
+    receiver = AudioReceiver(
+        channels=[1, 2],
+        virtual_device=[
+            VirtualInputDevice(ramp, sample_rate=SAMPLE_RATE, speed=10),
+            VirtualInputDevice(stereo, sample_rate=SAMPLE_RATE, speed=10),
+        ],
+    )
+    receiver.config_capture(segments_duration=0.25, blocksize=200)
+    segments = capture_segments(receiver)
+
+    assert receiver.get_nr_channels() == 3
+    assert len(segments) >= 7
+    # the devices started at slightly different times. After the alignment, the offset between their
+    # frames is the same in every segment
+    offset = segments[0].y[0, 1] - segments[0].y[0, 0]
+    assert abs(offset) < 2000
+    for segment in segments:
+        assert segment.y.shape == (2000, 3)
+        np.testing.assert_array_equal(segment.y[:, 2], -segment.y[:, 1])
+        np.testing.assert_array_equal(segment.y[:, 1] - segment.y[:, 0], offset)
+    receiver.close()
+
+
+def test_devices_must_have_the_same_sample_rate(ramp):
+    with pytest.raises(Exception, match="sample rates of the devices are different"):
+        AudioReceiver(
+            virtual_device=[
+                VirtualInputDevice(ramp, sample_rate=SAMPLE_RATE),
+                VirtualInputDevice(ramp, sample_rate=16000),
+            ]
+        )
+
+
+def test_shared_memory_segments(ramp):
+    receiver = make_receiver(
+        ramp, segments_duration=0.25, blocksize=300, shared_memory_slots=8
+    )
+    segments = capture_segments(receiver)
+    slab = receiver.get_shared_segment_slab()
+
+    assert len(segments) == 8
+    assert slab.get_nr_acquired_slots() == 8
+    for index, segment in enumerate(segments):
+        descriptor = receiver.get_segment_descriptor(segment)
+        np.testing.assert_array_equal(
+            slab.get_descriptor_array(descriptor),
+            ramp[index * 2000 : (index + 1) * 2000],
+        )
+        receiver.mark_segment_finished(segment)
+        receiver.mark_segment_finished(segment)
+    assert slab.get_nr_acquired_slots() == 0
+    receiver.close()
+
+
+def test_full_shared_memory_drops_segments(ramp):
+    receiver = make_receiver(
+        ramp, segments_duration=0.25, blocksize=300, shared_memory_slots=3
+    )
+    segments = capture_segments(receiver)
+
+    assert len(segments) == 3
+    assert receiver.get_callback_statistics()["dropped_segments"] == 5
+    receiver.close()
+
+
+@pytest.mark.parametrize("reconfigure", [False, True])
+def test_shared_memory_outlives_the_receiver_until_segments_finish(ramp, reconfigure):
+    receiver = make_receiver(
+        ramp, segments_duration=0.25, blocksize=300, shared_memory_slots=8
+    )
+    receiver.start()
+    while receiver.is_capturing():
+        time.sleep(0.005)
+    receiver.stop()
+    segment = receiver.get_sample_from_output_queue()
+    slab = receiver.get_shared_segment_slab()
+
+    if reconfigure:
+        receiver.config_capture(
+            segments_duration=0.25, blocksize=300, shared_memory_slots=8
+        )
+        assert receiver.get_shared_segment_slab() is not slab
+        assert not receiver.output_queue_has_samples()
+    else:
+        receiver.close()
+    # the segments left in the output queue were discarded, but the segment taken is still readable
+    assert slab.get_nr_acquired_slots() == 1
+    np.testing.assert_array_equal(segment.y, ramp[:2000])
+
+    receiver.mark_segment_finished(segment)
+    assert slab.get_nr_acquired_slots() == 0
+    with pytest.raises(FileNotFoundError):
+        SharedSegmentSlab.attach(slab.get_layout())
+    receiver.close()
+
+
+def test_finished_segments_can_be_read_after_the_receiver_is_closed(ramp):
+    receiver = make_receiver(
+        ramp, segments_duration=0.25, blocksize=300, shared_memory_slots=8
+    )
+    segments = capture_segments(receiver)
+    layout = receiver.get_shared_segment_slab().get_layout()
+
+    for segment in segments:
+        receiver.mark_segment_finished(segment)
+    receiver.close()
+
+    with pytest.raises(FileNotFoundError):
+        SharedSegmentSlab.attach(layout)
+    np.testing.assert_array_equal(segments[0].get_data()[:3], ramp[:3])
+
+
+@pytest.fixture
+def burst():
+    # a ramp, far below the energy threshold, to know the first frame of each segment, and a 0.25 s tone
+    # from frame 4000 to 6000
+    y = 1e-7 * np.arange(2 * SAMPLE_RATE)
+    y[4000:6000] += 0.5 * np.sin(2 * np.pi * 1000 * np.arange(2000) / SAMPLE_RATE)
+    return y
+
+
+def capture_gated_segments(receiver, **config_activity_gate_kwargs):
+    """
+    :return: index of the emitted segments, of 2000 frames each
+    """
+    receiver.config_activity_gate(energy_threshold=-30, **config_activity_gate_kwargs)
+    segments = capture_segments(receiver)
+    return [int(round(segment.y[0] * 1e7)) // 2000 for segment in segments]
+
+
+@pytest.mark.parametrize(
+    "pre_roll, hang_over, expected_indexes",
+    [(0, 0, [2]), (0.25, 0, [1, 2]), (0, 0.25, [2, 3]), (0.1, 0.1, [1, 2, 3])],
+)
+def test_activity_gate(burst, pre_roll, hang_over, expected_indexes):
+    receiver = make_receiver(burst, segments_duration=0.25, blocksize=200)
+    indexes = capture_gated_segments(receiver, pre_roll=pre_roll, hang_over=hang_over)
+
+    assert indexes == expected_indexes
+    # the last segments are not decided until the frames of their pre-roll are received
+    nr_decided_segments = (len(burst) - int(pre_roll * SAMPLE_RATE)) // 2000
+    assert receiver.get_nr_suppressed_segments() == nr_decided_segments - len(indexes)
+    assert (
+        receiver.get_callback_statistics()["suppressed_segments"]
+        == receiver.get_nr_suppressed_segments()
+    )
+    receiver.close()
+    assert receiver.get_nr_suppressed_segments() == nr_decided_segments - len(indexes)
+
+
+def test_activity_gate_zero_crossing_rate(burst):
+    receiver = make_receiver(burst, segments_duration=0.25, blocksize=200)
+
+    # the tone crosses zero in a quarter of its frames
+    assert capture_gated_segments(receiver, zcr_threshold=0.2) == []
+    assert receiver.get_nr_suppressed_segments() == 8
+    receiver.close()
+
+
+def test_activity_gate_is_kept_when_capture_is_configured_again(burst):
+    receiver = make_receiver(burst, segments_duration=0.25, blocksize=200)
+    receiver.config_activity_gate(energy_threshold=-30, pre_roll=0.25)
+    receiver.config_capture(segments_duration=0.25, blocksize=400)
+
+    segments = capture_segments(receiver)
+    assert [int(round(segment.y[0] * 1e7)) // 2000 for segment in segments] == [1, 2]
+    receiver.close()
+
+
+def test_activity_gate_disabled(burst):
+    receiver = make_receiver(burst, segments_duration=0.25, blocksize=200)
+    receiver.config_activity_gate(energy_threshold=-30)
+    receiver.config_activity_gate(energy_threshold=None)
+
+    assert len(capture_segments(receiver)) == 8
+    assert receiver.get_nr_suppressed_segments() == 0
+    receiver.close()
+
+
+def test_pre_roll_must_fit_in_the_buffer(burst):
+    # the default buffer holds 16000 frames: a segment of 8000, the pre-roll and a block of 800
+    receiver = make_receiver(burst, segments_duration=1, blocksize=800)
+    with pytest.raises(Exception, match="plus pre_roll plus the duration of a block"):
+        receiver.config_activity_gate(energy_threshold=-30, pre_roll=1)
+    receiver.config_activity_gate(energy_threshold=-30, pre_roll=0.9)
+
+    # neither can the capture be configured again with a buffer too small for the pre-roll
+    receiver.config_capture(segments_duration=1, blocksize=800, buffer_duration=1.5)
+    assert not receiver.is_configured()
+    receiver.close()
+
+
+def test_activity_gate_needs_configured_capture(burst):
+    receiver = AudioReceiver(
+        virtual_device=VirtualInputDevice(burst, sample_rate=SAMPLE_RATE)
+    )
+    with pytest.raises(Exception, match="Run config_capture"):
+        receiver.config_activity_gate(energy_threshold=-30)
@@ -0,0 +1,118 @@
+import os
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from MAAP import AudioSignal
+from MAAP.AudioStreamWriter import AudioStreamWriter
+
+SAMPLE_RATE = 8000
+
+
+def write_segments(writer, y, nr_segments):
+    for segment in np.array_split(y, nr_segments):
+        writer.write(AudioSignal(segment, SAMPLE_RATE))
+
+
+def read_files(file_paths):
+    return [sf.read(file_path, dtype="float32")[0] for file_path in file_paths]
+
+
+@pytest.fixture
+def y():
+    return np.random.default_rng(0).uniform(-0.5, 0.5, SAMPLE_RATE).astype(np.float32)
+
+
+def test_stream_is_written_in_one_file(tmp_path, y):
+    with AudioStreamWriter(tmp_path, "stream", SAMPLE_RATE, subtype="FLOAT") as writer:
+        write_segments(writer, y, 8)
+    file_paths = writer.get_file_paths()
+
+    assert file_paths == [os.path.join(tmp_path, "stream_0000.wav")]
+    np.testing.assert_array_equal(read_files(file_paths)[0], y)
+    assert writer.get_nr_written_frames() == len(y)
+    assert writer.get_written_duration() == 1
+
+
+def test_rotation_by_duration(tmp_path, y):
+    with AudioStreamWriter(
+        tmp_path, "stream", SAMPLE_RATE, rotation_duration=0.3, subtype="FLOAT"
+    ) as writer:
+        write_segments(writer, y, 7)
+    files = read_files(writer.get_file_paths())
+
+    assert [len(file) for file in files] == [2400, 2400, 2400, 800]
+    np.testing.assert_array_equal(np.concatenate(files), y)
+
+
+def test_rotation_by_size(tmp_path, y):
+    stereo = np.stack([y, -y], axis=1)
+    with AudioStreamWriter(
+        tmp_path, "stream", SAMPLE_RATE, channels=2, rotation_size=10044
+    ) as writer:
+        write_segments(writer, stereo, 4)
+    file_paths = writer.get_file_paths()
+
+    # 2500 frames of 2 channels of PCM_16 per file, plus the header
+    assert [os.path.getsize(file_path) for file_path in file_paths[:-1]] == [10044] * 3
+    files = read_files(file_paths)
+    assert [len(file) for file in files] == [2500, 2500, 2500, 500]
+    np.testing.assert_allclose(np.concatenate(files), stereo, atol=1 / 2 ** 15)
+
+
+def test_files_are_flushed_while_writing(tmp_path, y):
+    writer = AudioStreamWriter(tmp_path, "stream", SAMPLE_RATE, flush_interval=0.01)
+    write_segments(writer, y, 2)
+    file_path = os.path.join(tmp_path, "stream_0000.wav")
+
+    deadline = time.monotonic() + 5
+    while not os.path.exists(file_path) or sf.info(file_path).frames < len(y):
+        assert time.monotonic() < deadline, "the file was not flushed"
+        time.sleep(0.01)
+    writer.close()
+
+
+def test_writer_thread_errors_are_raised(tmp_path, y, monkeypatch):
+    def broken_open_next_file(writer):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(AudioStreamWriter, "_open_next_file", broken_open_next_file)
+    writer = AudioStreamWriter(tmp_path, "stream", SAMPLE_RATE)
+    writer.write(AudioSignal(y, SAMPLE_RATE))
+
+    with pytest.raises(Exception, match="disk full"):
+        writer.close()
+    with pytest.raises(Exception, match="disk full"):
+        writer.write(AudioSignal(y, SAMPLE_RATE))
+
+
+def test_invalid_signals(tmp_path, y):
+    writer = AudioStreamWriter(tmp_path, "stream", SAMPLE_RATE)
+
+    with pytest.raises(Exception, match="must be an instance of class AudioSignal"):
+        writer.write(y)
+    with pytest.raises(Exception, match="differs from the sample rate of the writer"):
+        writer.write(AudioSignal(y, 16000))
+    with pytest.raises(Exception, match="Signal has 2 channels"):
+        writer.write(AudioSignal(np.stack([y, y], axis=1), SAMPLE_RATE))
+    writer.close()
+    with pytest.raises(Exception, match="Writer is closed"):
+        writer.write(AudioSignal(y, SAMPLE_RATE))
+    assert writer.get_file_paths() == []
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"dir_path": "missing"}, "does not exist"),
+        ({"subtype": "VORBIS"}, "subtype 'VORBIS' not available"),
+        ({"rotation_size": 44}, "at least one frame per file"),
+        ({"rotation_duration": 0}, "at least one frame per file"),
+    ],
+)
+def test_invalid_writer(tmp_path, kwargs, message):
+    kwargs.setdefault("dir_path", tmp_path)
+    with pytest.raises(Exception, match=message):
+        AudioStreamWriter(file_prefix="stream", sample_rate=SAMPLE_RATE, **kwargs)
@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from MAAP import AudioSignal
+from MAAP.AudioWriter import AudioWriter
+
+SAMPLE_RATE = 8000
+
+
+def make_signal(seed, duration=0.1):
+    y = np.random.default_rng(seed).uniform(-0.5, 0.5, int(duration * SAMPLE_RATE))
+    return AudioSignal(y, SAMPLE_RATE)
+
+
+def test_write_many(tmp_path):
+    items = [("{}.wav".format(index), make_signal(index)) for index in range(10)]
+    report = AudioWriter.write_many(tmp_path, items, workers=3, subtype="FLOAT")
+
+    assert report.file_paths == [os.path.join(tmp_path, name) for name, _ in items]
+    assert report.errors == []
+    assert report.nr_written_files == 10
+    assert report.nr_written_bytes == sum(
+        os.path.getsize(file_path) for file_path in report.file_paths
+    )
+    assert report.files_per_second > 0 and report.bytes_per_second > 0
+    for file_path, (_, audio_signal) in zip(report.file_paths, items):
+        y, sample_rate = sf.read(file_path)
+        assert sample_rate == SAMPLE_RATE
+        np.testing.assert_allclose(y, audio_signal.get_data(), rtol=1e-6)
+
+
+def test_write_many_errors_are_ordered_by_item(tmp_path, monkeypatch):
+    # the failing items finish in the inverse order of the items
+    delays = {"1.wav": 0.2, "3.wav": 0.1, "4.wav": 0}
+    write_file = AudioWriter._write_file
+
+    def slow_write_file(cls, file_path, audio_signal, *args):
+        file_name = os.path.basename(file_path)
+        if file_name in delays:
+            time.sleep(delays[file_name])
+            raise RuntimeError("cannot write {}".format(file_name))
+        return write_file(file_path, audio_signal, *args)
+
+    monkeypatch.setattr(AudioWriter, "_write_file", classmethod(slow_write_file))
+    items = [("{}.wav".format(index), make_signal(index)) for index in range(6)]
+    report = AudioWriter.write_many(tmp_path, items, workers=6)
+
+    assert [(index, name) for index, name, _ in report.errors] == [
+        (1, "1.wav"),
+        (3, "3.wav"),
+        (4, "4.wav"),
+    ]
+    assert all(
+        str(error) == "cannot write {}".format(name) for _, name, error in report.errors
+    )
+    assert [file_path is None for file_path in report.file_paths] == [
+        False,
+        True,
+        False,
+        True,
+        True,
+        False,
+    ]
+    assert report.nr_written_files == 3
+    assert sorted(os.listdir(tmp_path)) == ["0.wav", "2.wav", "5.wav"]
+
+
+def test_write_many_invalid_items_do_not_stop_the_others(tmp_path):
+    items = [
+        ("0.wav", make_signal(0)),
+        ("1.wav", np.zeros(10)),
+        (os.path.join("missing", "2.wav"), make_signal(2)),
+        ("3.wav", make_signal(3)),
+    ]
+    report = AudioWriter.write_many(tmp_path, items, workers=2)
+
+    assert [index for index, _, _ in report.errors] == [1, 2]
+    assert "must be an instance of class AudioSignal" in str(report.errors[0][2])
+    assert report.nr_written_files == 2
+    assert sorted(os.listdir(tmp_path)) == ["0.wav", "3.wav"]
+
+
+def test_write_many_takes_items_as_the_pool_has_room(tmp_path, monkeypatch):
+    nr_written_files = 0
+    lock = threading.Lock()
+    write_file = AudioWriter._write_file
+    nr_pending = list()
+
+    def counted_write_file(cls, *args):
+        nonlocal nr_written_files
+        nr_bytes = write_file(*args)
+        with lock:
+            nr_written_files += 1
+        return nr_bytes
+
+    def items():
+        for index in range(20):
+            nr_pending.append(index - nr_written_files)
+            yield "{}.wav".format(index), make_signal(index)
+
+    monkeypatch.setattr(AudioWriter, "_write_file", classmethod(counted_write_file))
+    report = AudioWriter.write_many(tmp_path, items(), workers=2, max_pending=3)
+
+    assert report.nr_written_files == 20
+    assert max(nr_pending) <= 3
+
+
+def test_write_many_directory_must_exist(tmp_path):
+    with pytest.raises(Exception, match="does not exist"):
+        AudioWriter.write_many(os.path.join(tmp_path, "missing"), [])
+
+
+@pytest.mark.parametrize(
+    "file_name, kwargs, expected_format, expected_subtype",
+    [
+        ("signal.wav", {}, "WAV", "PCM_16"),
+        ("signal.wav", {"subtype": "FLOAT"}, "WAV", "FLOAT"),
+        ("signal.flac", {"subtype": "PCM_24"}, "FLAC", "PCM_24"),
+        ("signal.ogg", {"subtype": "VORBIS"}, "OGG", "VORBIS"),
+        ("signal.dat", {"file_format": "wav"}, "WAV", "PCM_16"),
+    ],
+)
+def test_formats_and_subtypes(
+    tmp_path, file_name, kwargs, expected_format, expected_subtype
+):
+    audio_signal = make_signal(0)
+    AudioWriter(tmp_path, file_name, audio_signal, **kwargs).write()
+
+    info = sf.info(os.path.join(tmp_path, file_name))
+    assert (info.format, info.subtype) == (expected_format, expected_subtype)
+    assert info.frames == len(audio_signal.get_data())
+
+
+def test_compression_level(tmp_path):
+    audio_signal = make_signal(0, duration=1)
+    for compression_level in (0, 1):
+        AudioWriter(
+            tmp_path,
+            "{}.flac".format(compression_level),
+            audio_signal,
+            compression_level=compression_level,
+        ).write()
+
+    sizes = [
+        os.path.getsize(os.path.join(tmp_path, name)) for name in ("0.flac", "1.flac")
+    ]
+    assert sizes[1] < sizes[0]
+    y, _ = sf.read(os.path.join(tmp_path, "1.flac"))
+    np.testing.assert_allclose(y, audio_signal.get_data(), atol=1 / 2 ** 15)
+
+
+@pytest.mark.parametrize(
+    "file_name, kwargs, message",
+    [
+        ("signal.xyz", {}, "format 'XYZ' not available"),
+        ("signal.wav", {"subtype": "VORBIS"}, "subtype 'VORBIS' not available"),
+        ("signal.wav", {"compression_level": 0.5}, "only available for the formats"),
+        ("signal.flac", {"compression_level": 2}, "must be between 0 and 1"),
+    ],
+)
+def test_invalid_write_options(tmp_path, file_name, kwargs, message):
+    with pytest.raises(Exception, match=message):
+        AudioWriter(tmp_path, file_name, make_signal(0), **kwargs)
+
+
+def test_write_many_checks_the_options_once_per_format(tmp_path, monkeypatch):
+    checked_formats = list()
+    check_write_options = AudioWriter._check_write_options
+
+    def counted_check_write_options(file_format, *args):
+        checked_formats.append(file_format)
+        return check_write_options(file_format, *args)
+
+    monkeypatch.setattr(
+        AudioWriter, "_check_write_options", staticmethod(counted_check_write_options)
+    )
+    items = [
+        ("{}.{}".format(index, extension), make_signal(index))
+        for index, extension in enumerate(["wav", "flac", "xyz"] * 3)
+    ]
+    report = AudioWriter.write_many(tmp_path, items, compression_level=0.5)
+
+    assert checked_formats == ["WAV", "FLAC", "XYZ"]
+    assert report.nr_written_files == 3
+    assert [index for index, _, _ in report.errors] == [0, 2, 3, 5, 6, 8]
+    assert "only available for the formats" in str(report.errors[0][2])
+    assert "format 'XYZ' not available" in str(report.errors[1][2])
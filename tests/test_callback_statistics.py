@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from MAAP.utils import CallbackStatistics
+from MAAP.VirtualInputDevice import CallbackFlags
+
+
+def test_counts_blocks_and_flags():
+    callback_statistics = CallbackStatistics()
+    callback_statistics.record_block(512, CallbackFlags())
+    callback_statistics.record_block(512, CallbackFlags(input_overflow=True))
+    callback_statistics.record_block(256, CallbackFlags(input_underflow=True))
+
+    statistics = callback_statistics.get_statistics()
+    assert statistics["blocks"] == 3
+    assert statistics["frames"] == 1280
+    assert statistics["input_overflows"] == 1
+    assert statistics["input_underflows"] == 1
+
+
+def test_duration_histogram():
+    callback_statistics = CallbackStatistics(duration_bin_edges=(0.001, 0.01))
+    for duration in (0.0005, 0.001, 0.002, 0.02, 0.03):
+        callback_statistics.record_duration(duration)
+    callback_statistics.record_block(1, CallbackFlags())
+
+    counts, bin_edges = callback_statistics.get_duration_histogram()
+    np.testing.assert_array_equal(counts, [2, 1, 2])
+    np.testing.assert_array_equal(bin_edges, [0.001, 0.01])
+    assert callback_statistics.get_statistics()["callback_duration_max"] == 0.03
+
+
+def test_reset():
+    callback_statistics = CallbackStatistics()
+    callback_statistics.record_block(512, CallbackFlags(input_overflow=True))
+    callback_statistics.record_duration(0.001)
+    callback_statistics.reset()
+
+    statistics = callback_statistics.get_statistics()
+    assert statistics["blocks"] == 0
+    assert statistics["callback_duration_mean"] is None
+    assert callback_statistics.get_duration_histogram()[0].sum() == 0
+
+
+def test_bin_edges_must_increase():
+    with pytest.raises(Exception, match="increasing"):
+        CallbackStatistics(duration_bin_edges=(0.01, 0.001))
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from MAAP import CapturedAudioSignal
+from MAAP.utils import LatencyTracker
+
+
+def make_segment(capture_end_time, enqueue_time, dequeue_time, finish_time):
+    segment = CapturedAudioSignal(
+        np.zeros(10), 10, capture_end_time - 1, capture_end_time
+    )
+    segment.enqueue_time = enqueue_time
+    segment.dequeue_time = dequeue_time
+    segment.finish_time = finish_time
+    return segment
+
+
+def test_captured_audio_signal_latencies():
+    segment = CapturedAudioSignal(np.zeros(10), 10, 0.0, 1.0)
+    assert segment.get_latencies() == {}
+
+    segment.mark_enqueued()
+    segment.mark_dequeued()
+    segment.mark_finished()
+    segment.capture_end_time = segment.get_enqueue_time() - 0.5
+
+    latencies = segment.get_latencies()
+    assert set(latencies) == {"emission", "queue", "processing", "end_to_end"}
+    assert latencies["emission"] == pytest.approx(0.5)
+    assert latencies["end_to_end"] == pytest.approx(
+        latencies["emission"] + latencies["queue"] + latencies["processing"]
+    )
+
+
+def test_statistics_per_stage():
+    latency_tracker = LatencyTracker()
+    for i in range(1, 101):
+        latency_tracker.record(make_segment(0, 0.001 * i, 0.002 * i, 0.004 * i))
+
+    statistics = latency_tracker.get_statistics()
+
+    assert latency_tracker.get_nr_recorded_segments() == 100
+    assert statistics["emission"]["count"] == 100
+    assert statistics["emission"]["p50"] == pytest.approx(0.0505)
+    assert statistics["emission"]["max"] == pytest.approx(0.1)
+    assert statistics["processing"]["mean"] == pytest.approx(0.101)
+    assert statistics["end_to_end"]["p99"] == pytest.approx(0.39604)
+
+
+def test_history_keeps_most_recent_latencies():
+    latency_tracker = LatencyTracker(history_size=3)
+    for i in range(5):
+        latency_tracker.record(make_segment(0, i, i, i))
+
+    np.testing.assert_array_equal(latency_tracker.get_latencies("emission"), [2, 3, 4])
+    counts, _ = latency_tracker.get_histogram("emission", bins=3)
+    assert counts.sum() == 3
+
+
+def test_stage_without_latencies():
+    latency_tracker = LatencyTracker()
+    latency_tracker.record(CapturedAudioSignal(np.zeros(10), 10, 0.0, 1.0))
+
+    with pytest.raises(Exception, match="stage 'queue' has no latencies"):
+        latency_tracker.get_latencies("queue")
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from MAAP.utils import RingBuffer
+
+
+def make_frames(start, stop, channels=1):
+    return np.arange(start * channels, stop * channels, dtype=float).reshape(
+        -1, channels
+    )
+
+
+def test_write_and_read_fifo():
+    ring_buffer = RingBuffer(10, dtype=np.float64)
+    ring_buffer.write(make_frames(0, 4))
+    ring_buffer.write(make_frames(4, 7))
+
+    assert ring_buffer.get_nr_available_frames() == 7
+    np.testing.assert_array_equal(ring_buffer.read(5), make_frames(0, 5))
+    assert ring_buffer.get_read_index() == 5
+    assert ring_buffer.get_write_index() == 7
+    np.testing.assert_array_equal(ring_buffer.read(2), make_frames(5, 7))
+
+
+def test_read_wraps_around():
+    ring_buffer = RingBuffer(8, channels=2, dtype=np.float64)
+    ring_buffer.write(make_frames(0, 6, 2))
+    ring_buffer.consume(4)
+    ring_buffer.write(make_frames(6, 12, 2))
+
+    np.testing.assert_array_equal(ring_buffer.read(8), make_frames(4, 12, 2))
+
+
+def test_peek_does_not_consume():
+    ring_buffer = RingBuffer(8, dtype=np.float64)
+    ring_buffer.write(make_frames(0, 5))
+    out = np.empty((3, 1))
+
+    assert ring_buffer.peek(3, out) is out
+    np.testing.assert_array_equal(out, make_frames(0, 3))
+    assert ring_buffer.get_nr_available_frames() == 5
+
+
+def test_full_buffer_overwrites_oldest_frames():
+    ring_buffer = RingBuffer(8, dtype=np.float64)
+    ring_buffer.write(make_frames(0, 6))
+    ring_buffer.write(make_frames(6, 11))
+
+    assert ring_buffer.get_nr_overwritten_frames() == 3
+    assert ring_buffer.get_read_index() == 3
+    np.testing.assert_array_equal(ring_buffer.read(8), make_frames(3, 11))
+
+
+def test_block_larger_than_capacity_keeps_newest_frames():
+    ring_buffer = RingBuffer(4, dtype=np.float64)
+    ring_buffer.write(make_frames(0, 10))
+
+    assert ring_buffer.get_nr_overwritten_frames() == 6
+    np.testing.assert_array_equal(ring_buffer.read(4), make_frames(6, 10))
+
+
+def test_consume_ahead_discards_frames_when_written():
+    ring_buffer = RingBuffer(8, dtype=np.float64)
+    ring_buffer.write(make_frames(0, 2))
+    ring_buffer.consume(5)
+
+    assert ring_buffer.get_nr_available_frames() == 0
+    ring_buffer.write(make_frames(2, 7))
+    assert ring_buffer.get_nr_available_frames() == 2
+    np.testing.assert_array_equal(ring_buffer.read(2), make_frames(5, 7))
+
+
+def test_peek_more_than_available_frames_raises():
+    ring_buffer = RingBuffer(8)
+    ring_buffer.write(make_frames(0, 2))
+
+    with pytest.raises(Exception, match="Only 2 frames are available"):
+        ring_buffer.peek(3)
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(Exception, match="capacity"):
+        RingBuffer(0)
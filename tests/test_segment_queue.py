@@ -0,0 +1,114 @@
+import queue
+import threading
+
+import pytest
+
+from MAAP.utils import SegmentQueue
+
+
+def fill(segment_queue, segments):
+    return [segment_queue.put_segment(segment) for segment in segments]
+
+
+def drain(segment_queue):
+    segments = list()
+    while not segment_queue.empty():
+        segments.append(segment_queue.get_nowait())
+        segment_queue.task_done()
+    return segments
+
+
+def test_drop_oldest():
+    dropped = list()
+    segment_queue = SegmentQueue(2, "drop_oldest", on_drop=dropped.append)
+
+    assert fill(segment_queue, range(5)) == [True] * 5
+    assert drain(segment_queue) == [3, 4]
+    assert dropped == [0, 1, 2]
+    assert segment_queue.get_nr_dropped_segments() == 3
+
+
+def test_drop_newest():
+    dropped = list()
+    segment_queue = SegmentQueue(2, "drop_newest", on_drop=dropped.append)
+
+    assert fill(segment_queue, range(5)) == [True, True, False, False, False]
+    assert drain(segment_queue) == [0, 1]
+    assert dropped == [2, 3, 4]
+    assert segment_queue.get_nr_dropped_segments() == 3
+
+
+def test_coalesce_replaces_newest_segment():
+    dropped = list()
+    segment_queue = SegmentQueue(2, "coalesce", on_drop=dropped.append)
+
+    assert fill(segment_queue, range(5)) == [True] * 5
+    assert drain(segment_queue) == [0, 4]
+    assert dropped == [1, 2, 3]
+    assert segment_queue.get_nr_dropped_segments() == 3
+
+
+@pytest.mark.parametrize("policy", ["drop_oldest", "drop_newest", "coalesce"])
+def test_dropped_segments_are_not_unfinished_tasks(policy):
+    segment_queue = SegmentQueue(2, policy)
+    fill(segment_queue, range(5))
+    drain(segment_queue)
+
+    # join returns at once if every segment still in the queue was marked as done
+    segment_queue.join()
+
+
+def test_block_waits_for_a_free_slot():
+    segment_queue = SegmentQueue(1, "block")
+    segment_queue.put_segment(0)
+    put_thread = threading.Thread(target=segment_queue.put_segment, args=(1,))
+    put_thread.start()
+
+    put_thread.join(0.05)
+    assert put_thread.is_alive()
+    assert segment_queue.get_nowait() == 0
+    put_thread.join(1)
+    assert not put_thread.is_alive()
+    assert segment_queue.get_nowait() == 1
+    assert segment_queue.get_nr_dropped_segments() == 0
+
+
+def test_interrupted_block_discards_the_segments():
+    dropped = list()
+    segment_queue = SegmentQueue(1, "block", on_drop=dropped.append)
+    segment_queue.put_segment(0)
+    results = list()
+    put_thread = threading.Thread(
+        target=lambda: results.append(segment_queue.put_segment(1))
+    )
+    put_thread.start()
+
+    put_thread.join(0.05)
+    assert put_thread.is_alive()
+    segment_queue.interrupt_puts()
+    put_thread.join(1)
+    assert not put_thread.is_alive()
+    assert results == [False]
+    assert segment_queue.put_segment(2) is False
+    assert dropped == [1, 2]
+    assert segment_queue.get_nr_dropped_segments() == 2
+
+    segment_queue.resume_puts()
+    assert segment_queue.get_nowait() == 0
+    assert segment_queue.put_segment(3) is True
+    assert drain(segment_queue) == [3]
+
+
+def test_unbounded_queue_never_drops():
+    segment_queue = SegmentQueue(0, "drop_newest")
+
+    assert all(fill(segment_queue, range(100)))
+    assert segment_queue.get_nr_dropped_segments() == 0
+    assert drain(segment_queue) == list(range(100))
+    with pytest.raises(queue.Empty):
+        segment_queue.get_nowait()
+
+
+def test_unknown_policy():
+    with pytest.raises(Exception, match="policy 'drop_all' not available"):
+        SegmentQueue(2, "drop_all")
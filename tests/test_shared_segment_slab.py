@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from MAAP.utils import SharedSegmentSlab
+from MAAP.utils.SharedSegmentSlab import SegmentDescriptor
+
+
+def is_destroyed(layout):
+    try:
+        SharedSegmentSlab.attach(layout).close()
+    except FileNotFoundError:
+        return True
+    return False
+
+
+@pytest.fixture
+def slab():
+    slab = SharedSegmentSlab(2, 4, channels=2)
+    yield slab
+    slab.close()
+
+
+def test_acquire_and_release_slots(slab):
+    assert [slab.acquire_slot(), slab.acquire_slot()] == [0, 1]
+    assert slab.acquire_slot() is None
+    assert slab.get_nr_acquired_slots() == 2
+
+    slab.release_slot(1)
+    assert slab.get_nr_free_slots() == 1
+    assert slab.acquire_slot() == 1
+    slab.release_slot(0)
+    slab.release_slot(1)
+
+
+def test_attached_slab_reads_the_written_slots(slab):
+    slot = slab.acquire_slot()
+    slab.get_slot_array(slot)[:] = np.arange(8).reshape(4, 2)
+
+    attached_slab = SharedSegmentSlab.attach(slab.get_layout())
+    y = attached_slab.get_descriptor_array(SegmentDescriptor(slot, 3, 8000, 0, 1))
+    np.testing.assert_array_equal(y, np.arange(6).reshape(3, 2))
+    attached_slab.close()
+    slab.release_slot(slot)
+
+
+def test_mono_slots_are_squeezed():
+    slab = SharedSegmentSlab(1, 4)
+
+    assert slab.get_slot_array(0).shape == (4,)
+    assert slab.get_slot_array(0, squeeze=False).shape == (4, 1)
+    slab.close()
+
+
+def test_close_without_acquired_slots_destroys_the_block(slab):
+    layout = slab.get_layout()
+    slab.close()
+
+    assert is_destroyed(layout)
+
+
+def test_close_waits_for_the_acquired_slots(slab):
+    layout = slab.get_layout()
+    slots = [slab.acquire_slot(), slab.acquire_slot()]
+    y = slab.get_slot_array(slots[0])
+    y[:] = 1
+
+    slab.close()
+    # the views of the acquired slots are still valid
+    assert y.sum() == 8
+    assert not is_destroyed(layout)
+    with pytest.raises(Exception, match="closed slab"):
+        slab.acquire_slot()
+
+    slab.release_slot(slots[0])
+    assert not is_destroyed(layout)
+    slab.release_slot(slots[1])
+    assert is_destroyed(layout)
+
+
+def test_views_can_be_read_after_the_block_is_destroyed(slab):
+    layout = slab.get_layout()
+    slot = slab.acquire_slot()
+    y = slab.get_slot_array(slot)
+    y[:] = 1
+
+    slab.close()
+    slab.release_slot(slot)
+    assert is_destroyed(layout)
+    # the memory of the block is only freed when the views are collected
+    assert y.sum() == 8
+    y[:] = 2
+    assert y.sum() == 16
+
+
+def test_views_of_an_attached_slab_can_be_read_after_it_is_closed(slab):
+    slot = slab.acquire_slot()
+    slab.get_slot_array(slot)[:] = 1
+
+    attached_slab = SharedSegmentSlab.attach(slab.get_layout())
+    y = attached_slab.get_slot_array(slot)
+    attached_slab.close()
+    del attached_slab
+    slab.release_slot(slot)
+    assert y.sum() == 8
+
+
+def test_invalid_slab():
+    with pytest.raises(Exception, match="must be higher than zero"):
+        SharedSegmentSlab(0, 4)
@@ -0,0 +1,136 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from MAAP import AudioSignal, VirtualInputDevice
+from MAAP.VirtualInputDevice import VirtualInputStream
+
+SAMPLE_RATE = 8000
+
+
+class BlockRecorder:
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.blocks = list()
+        self.times = list()
+        self.statuses = list()
+        self.finished = threading.Event()
+
+    def callback(self, indata, frames, time_info, status):
+        assert len(indata) == frames
+        self.blocks.append(indata.copy())
+        self.times.append(time_info)
+        self.statuses.append(status)
+        if self.delay:
+            time.sleep(self.delay)
+
+    def replay(self, device, timeout=10, **stream_kwargs):
+        stream = VirtualInputStream(
+            device,
+            callback=self.callback,
+            finished_callback=self.finished.set,
+            **stream_kwargs
+        )
+        with stream:
+            assert self.finished.wait(timeout), "the stream did not finish"
+        assert not stream.active
+        return stream
+
+
+def test_replays_every_frame_in_blocks():
+    y = np.arange(1000, dtype=float)
+    recorder = BlockRecorder()
+    stream = recorder.replay(
+        VirtualInputDevice(y, sample_rate=SAMPLE_RATE, speed=50), blocksize=300
+    )
+
+    assert [len(block) for block in recorder.blocks] == [300, 300, 300, 100]
+    assert all(
+        block.shape[1] == 1 and block.dtype == np.float32 for block in recorder.blocks
+    )
+    np.testing.assert_array_equal(np.concatenate(recorder.blocks)[:, 0], y)
+    assert stream.get_nr_frames_sent() == 1000
+    assert not recorder.statuses[0]
+
+
+def test_adc_times_follow_replay_speed():
+    recorder = BlockRecorder()
+    recorder.replay(
+        VirtualInputDevice(np.zeros(4000), sample_rate=SAMPLE_RATE, speed=4),
+        blocksize=400,
+    )
+
+    adc_times = np.array([time_info.inputBufferAdcTime for time_info in recorder.times])
+    np.testing.assert_allclose(np.diff(adc_times), 400 / SAMPLE_RATE / 4)
+    assert all(
+        time_info.currentTime >= time_info.inputBufferAdcTime
+        for time_info in recorder.times
+    )
+
+
+def test_loop_replays_the_source_again():
+    y = np.arange(500, dtype=float)
+    device = VirtualInputDevice(y, sample_rate=SAMPLE_RATE, speed=50, loop=True)
+    recorder = BlockRecorder()
+    stream = VirtualInputStream(device, blocksize=300, callback=recorder.callback)
+    stream.start()
+    while len(recorder.blocks) < 4:
+        time.sleep(0.001)
+    stream.close()
+
+    np.testing.assert_array_equal(
+        np.concatenate(recorder.blocks[:4])[:, 0], np.tile(y, 3)[:1200]
+    )
+
+
+def test_slow_callback_is_flagged_as_overflow_without_losing_frames():
+    y = np.arange(2000, dtype=float)
+    recorder = BlockRecorder(delay=0.05)
+    recorder.replay(
+        VirtualInputDevice(y, sample_rate=SAMPLE_RATE, speed=10), blocksize=200
+    )
+
+    assert not recorder.statuses[0]
+    assert all(status.input_overflow for status in recorder.statuses[1:])
+    np.testing.assert_array_equal(np.concatenate(recorder.blocks)[:, 0], y)
+
+
+def test_stream_takes_the_first_channels():
+    y = np.stack([np.arange(600.0), -np.arange(600.0), np.ones(600)], axis=1)
+    recorder = BlockRecorder()
+    recorder.replay(
+        VirtualInputDevice(AudioSignal(y, SAMPLE_RATE), speed=50), channels=2
+    )
+
+    np.testing.assert_array_equal(np.concatenate(recorder.blocks), y[:, :2])
+
+
+def test_from_synthetic():
+    device = VirtualInputDevice.from_synthetic(
+        0.5, SAMPLE_RATE, frequency=1000, amplitude=0.25, channels=2
+    )
+
+    assert device.get_duration() == 0.5
+    assert device.get_channels() == 2
+    np.testing.assert_allclose(np.abs(device.get_data()).max(), 0.25)
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"source": np.zeros(10)}, "sample_rate must be given"),
+        ({"source": np.zeros(0), "sample_rate": SAMPLE_RATE}, "at least one frame"),
+        ({"source": np.zeros(10), "sample_rate": SAMPLE_RATE, "speed": 0}, "speed"),
+    ],
+)
+def test_invalid_device(kwargs, message):
+    with pytest.raises(Exception, match=message):
+        VirtualInputDevice(**kwargs)
+
+
+def test_stream_rejects_other_sample_rate():
+    device = VirtualInputDevice(np.zeros(10), sample_rate=SAMPLE_RATE)
+    with pytest.raises(Exception, match="differs from the sample rate"):
+        VirtualInputStream(device, samplerate=16000)